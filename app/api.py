@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""
+Servicio HTTP de sólo lectura sobre data/catalog.jsonl (sin dependencias).
+
+    python -m app.api --port 8765
+
+Endpoints:
+- GET /events?desde=YYYY-MM-DD&hasta=YYYY-MM-DD&categoria=a,b&source=x,y&q=texto&limit=&offset=
+- GET /meta     — totales, categorías y fuentes
+- GET /health
+
+El catálogo se carga una vez y se recarga en caliente cuando cambia el
+fichero (mtime/tamaño). Las respuestas llevan ETag y Last-Modified
+(304 con If-None-Match / If-Modified-Since) y se comprimen con gzip si el
+cliente lo acepta.
+"""
+from __future__ import annotations
+
+import os
+import gzip
+import json
+import time
+import bisect
+import hashlib
+import argparse
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+log = logging.getLogger(__name__)
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CATALOG = os.path.join(ROOT, "data", "catalog.jsonl")
+
+GZIP_MIN_BYTES = 512
+RELOAD_CHECK_S = 1.0
+CACHE_SIZE = 256
+
+def _iso(d: Optional[str]) -> Optional[str]:
+    if not d:
+        return None
+    try:
+        return date.fromisoformat(str(d)[:10]).isoformat()
+    except ValueError:
+        return None
+
+def _csv(qs: Dict[str, List[str]], key: str) -> Optional[set]:
+    vals = [v for raw in qs.get(key, []) for v in raw.split(",") if v]
+    return set(vals) or None
+
+class _ApiError(ValueError):
+    pass
+
+def _int_param(qs: Dict[str, List[str]], key: str, default: int) -> int:
+    raw = (qs.get(key) or [None])[0]
+    if raw is None or raw == "":
+        return default
+    try:
+        v = int(raw)
+    except ValueError:
+        raise _ApiError(f"{key} must be an integer")
+    if v < 0:
+        raise _ApiError(f"{key} must be >= 0")
+    return v
+
+class Snapshot(NamedTuple):
+    """Una versión del catálogo: todo lo que se lee para una respuesta sale de aquí."""
+    etag: str
+    mtime: float
+    items: List[Dict[str, Any]]
+    starts: List[str]
+    ends: List[str]
+    undated: List[Dict[str, Any]]
+    text: Dict[int, str]
+
+class Catalog:
+    """Catálogo en memoria, ordenado por fecha_inicio, con recarga en caliente."""
+
+    def __init__(self, path: str = CATALOG):
+        self.path = path
+        self._lock = threading.Lock()
+        self._checked = 0.0
+        self._stat: Optional[Tuple[float, int]] = None
+        self.items: List[Dict[str, Any]] = []
+        self.undated: List[Dict[str, Any]] = []
+        self._starts: List[str] = []
+        self._ends: List[str] = []
+        self._text: Dict[int, str] = {}
+        self.etag = '"empty"'
+        self.mtime = 0.0
+        self._cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self.reload()
+
+    def reload(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        h = hashlib.sha1()
+        dated: List[Tuple[str, str, Dict[str, Any]]] = []
+        undated: List[Dict[str, Any]] = []
+        text: Dict[int, str] = {}
+        with open(self.path, "rb") as f:
+            for raw in f:
+                h.update(raw)
+                if not raw.strip():
+                    continue
+                it = json.loads(raw)
+                text[id(it)] = " ".join(
+                    str(it.get(k) or "") for k in ("titulo", "descripcion", "lugar")
+                ).lower()
+                fi = _iso(it.get("fecha_inicio"))
+                ff = _iso(it.get("fecha_fin")) or fi
+                if fi:
+                    dated.append((fi, ff, it))
+                else:
+                    undated.append(it)
+        dated.sort(key=lambda t: t[0])
+        with self._lock:
+            self.items = [t[2] for t in dated]
+            self._starts = [t[0] for t in dated]
+            self._ends = [t[1] for t in dated]
+            self.undated = undated
+            self._text = text
+            self.etag = '"%s"' % h.hexdigest()[:20]
+            self.mtime = st.st_mtime
+            self._stat = (st.st_mtime, st.st_size)
+            self._cache.clear()
+        log.info("catalog loaded: %d dated, %d undated", len(self.items), len(undated))
+
+    def maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked < RELOAD_CHECK_S:
+            return
+        self._checked = now
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if (st.st_mtime, st.st_size) != self._stat:
+            self.reload()
+
+    def snapshot(self) -> Snapshot:
+        with self._lock:
+            return Snapshot(self.etag, self.mtime, self.items, self._starts, self._ends,
+                            self.undated, self._text)
+
+    def query(self, qs: Dict[str, List[str]], snap: Optional[Snapshot] = None) -> List[Dict[str, Any]]:
+        desde = _iso((qs.get("desde") or [None])[0])
+        hasta = _iso((qs.get("hasta") or [None])[0])
+        cats = _csv(qs, "categoria")
+        sources = _csv(qs, "source")
+        q = ((qs.get("q") or [""])[0]).strip().lower()
+
+        snap = snap or self.snapshot()
+        items, starts, ends, text = snap.items, snap.starts, snap.ends, snap.text
+        undated = snap.undated
+        if desde or hasta:
+            # eventos con fecha_inicio <= hasta (búsqueda binaria) y fecha_fin >= desde
+            stop = bisect.bisect_right(starts, hasta) if hasta else len(items)
+            cand = (items[i] for i in range(stop) if not desde or ends[i] >= desde)
+        else:
+            cand = iter(items + undated)
+
+        out = []
+        for it in cand:
+            if cats and it.get("categoria") not in cats:
+                continue
+            if sources and it.get("source_id") not in sources:
+                continue
+            if q and q not in text.get(id(it), ""):
+                continue
+            out.append(it)
+        return out
+
+    def cached(self, key: tuple, build) -> bytes:
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+                return body
+        body = build()
+        with self._lock:
+            if key[0] != self.etag:
+                return body  # se recargó mientras tanto: no se guarda una versión vieja
+            self._cache[key] = body
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return body
+
+class Handler(BaseHTTPRequestHandler):
+    catalog: Catalog
+    protocol_version = "HTTP/1.1"
+    # cabeceras y cuerpo van en dos write(): sin esto keep-alive paga ~40 ms de delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, fmt, *args):
+        log.debug("%s - %s", self.address_string(), fmt % args)
+
+    def do_GET(self):
+        cat = self.catalog
+        cat.maybe_reload()
+        parts = urlsplit(self.path)
+        qs = parse_qs(parts.query)
+
+        if parts.path == "/health":
+            return self._send(200, b'{"ok": true}', cacheable=False)
+        if parts.path not in ("/events", "/meta"):
+            return self._send(404, b'{"error": "not found"}', cacheable=False)
+
+        try:
+            page = (_int_param(qs, "offset", 0), _int_param(qs, "limit", 0))
+        except _ApiError as e:
+            return self._send(400, json.dumps({"error": str(e)}).encode("utf-8"), cacheable=False)
+
+        # ETag, clave de caché y cuerpo salen de la misma versión del catálogo
+        snap = cat.snapshot()
+        etag = 'W/"%s-%s"' % (snap.etag.strip('"'),
+                              hashlib.sha1(parts.query.encode("utf-8")).hexdigest()[:10])
+        if self._not_modified(etag, snap.mtime):
+            return self._send(304, b"", etag=etag, mtime=snap.mtime)
+
+        gz = "gzip" in (self.headers.get("Accept-Encoding") or "")
+        key = (snap.etag, parts.path, parts.query, gz)
+        body = cat.cached(key, lambda: self._render(parts.path, qs, gz, snap, page))
+        self._send(200, body, etag=etag, mtime=snap.mtime, gz=gz and body[:2] == b"\x1f\x8b")
+
+    def _render(self, path: str, qs: Dict[str, List[str]], gz: bool,
+                snap: Snapshot, page: Tuple[int, int]) -> bytes:
+        if path == "/meta":
+            every = snap.items + snap.undated
+            doc: Dict[str, Any] = {
+                "count": len(every),
+                "categorias": sorted({str(it.get("categoria")) for it in every if it.get("categoria")}),
+                "sources": sorted({str(it.get("source_id")) for it in every if it.get("source_id")}),
+            }
+        else:
+            found = self.catalog.query(qs, snap)
+            offset, limit = page
+            limit = limit or len(found)
+            doc = {"count": len(found), "items": found[offset:offset + limit]}
+        body = json.dumps(doc, ensure_ascii=False).encode("utf-8")
+        if gz and len(body) >= GZIP_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=5)
+        return body
+
+    def _not_modified(self, etag: str, mtime: float) -> bool:
+        inm = self.headers.get("If-None-Match")
+        if inm is not None:
+            return etag in [t.strip() for t in inm.split(",")] or inm.strip() == "*"
+        ims = self.headers.get("If-Modified-Since")
+        if ims and mtime:
+            try:
+                return int(mtime) <= parsedate_to_datetime(ims).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _send(self, code: int, body: bytes, etag: Optional[str] = None,
+              mtime: float = 0.0, gz: bool = False, cacheable: bool = True):
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if gz:
+            self.send_header("Content-Encoding", "gzip")
+        if cacheable:
+            self.send_header("Vary", "Accept-Encoding")
+            self.send_header("Cache-Control", "public, max-age=60")
+        if etag:
+            self.send_header("ETag", etag)
+        if mtime:
+            self.send_header("Last-Modified", formatdate(mtime, usegmt=True))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_HEAD = do_GET
+
+def make_server(host: str = "127.0.0.1", port: int = 8765, path: str = CATALOG) -> ThreadingHTTPServer:
+    handler = type("CatalogHandler", (Handler,), {"catalog": Catalog(path)})
+    srv = ThreadingHTTPServer((host, port), handler)
+    srv.daemon_threads = True
+    return srv
+
+def main():
+    ap = argparse.ArgumentParser(description="API de sólo lectura del catálogo")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--catalog", default=CATALOG)
+    args = ap.parse_args()
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+                        format="%(asctime)s [%(levelname)s] %(message)s")
+    srv = make_server(args.host, args.port, args.catalog)
+    log.info("listening on http://%s:%d", args.host, args.port)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Camino de datos de la app (carga → filtro → orden), sin Streamlit.
+
+streamlit_app.py sólo pinta; aquí está lo que se mide con
+scripts/bench_app.py:
+
+- `load_catalog` lee data/catalog.jsonl en un DataFrame; `load_range` lee
+  sólo los shards de data/shards/ que solapan con el rango pedido.
+- `select` quita primero los ids de baja calidad (data/quality_index.json,
+  de una vez con `isin`) y aplica el preset / rango y las categorías:
+  listas precalculadas de quick_ranges.json si valen para hoy, si no la
+  consulta indexada del almacén SQLite (si existe) y, si tampoco, el
+  filtro en vivo.
+"""
+from __future__ import annotations
+
+import os
+import json
+from datetime import date
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from scrapers import quickranges, shards, store
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CATALOG = os.path.join(ROOT, "data", "catalog.jsonl")
+
+def load_catalog(path: str = CATALOG) -> pd.DataFrame:
+    records = []
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    records.append(json.loads(line))
+    return pd.DataFrame(records)
+
+def load_range(desde: Optional[date], hasta: Optional[date],
+               root: str = shards.ROOT, path: str = CATALOG) -> pd.DataFrame:
+    """
+    Eventos de los shards que solapan [desde, hasta]; sin rango (preset
+    "Todo") también los no fechados. Sin manifiesto, el catálogo entero.
+    """
+    manifest = shards.load_manifest(root)
+    if not manifest.get("shards"):
+        return load_catalog(path)
+    unbounded = desde is None and hasta is None
+    return pd.DataFrame(list(shards.iter_events(desde, hasta, include_undated=unbounded, root=root)))
+
+def bounds(preset: str, start: date, end: date, today: date) -> Tuple[Optional[date], Optional[date]]:
+    """Rango de fechas que cubre el preset (None, None para "Todo")."""
+    if preset == "Personalizado":
+        return start, end
+    return quickranges.preset_range(preset, today) or (None, None)
+
+def categories(df: pd.DataFrame) -> List[str]:
+    return sorted(df["categoria"].dropna().unique().tolist())
+
+def select(df: pd.DataFrame, preset: str, sel_cats: List[str], cats: List[str],
+           start: date, end: date, today: date,
+           index: Optional[Dict[str, Any]] = None, db: Optional[str] = store.DB,
+           hide: Optional[Collection[str]] = None) -> pd.DataFrame:
+    """
+    Eventos a mostrar, ordenados por fecha_inicio. `start`/`end` sólo cuentan
+    con preset "Personalizado"; `index` es quick_ranges.json ya cargado,
+    `db` el almacén SQLite (None para no usarlo) y `hide` los ids a quitar
+    (`quality.load_low()`).
+    """
+    if hide:
+        df = df[~df["id"].isin(hide)]
+    ids = None
+    if preset != "Personalizado":
+        ids = quickranges.lookup(index, preset, sel_cats, cats, today)
+        rng = quickranges.preset_range(preset, today)
+        if rng:
+            start, end = rng
+    if ids is None and db and os.path.exists(db):
+        # consulta indexada en el almacén SQLite (si el colector lo mantiene)
+        if preset == "Todo":
+            ids = [it["id"] for it in store.query(categorias=sel_cats, path=db)]
+        else:
+            ids = [it["id"] for it in store.query(start, end, sel_cats, path=db)]
+
+    if ids is not None:
+        by_id = df.drop_duplicates("id").set_index("id", drop=False)
+        return by_id.loc[[i for i in ids if i in by_id.index]]
+    filtered = df[df["categoria"].isin(sel_cats)]
+    if preset != "Todo":
+        mask = [quickranges.overlaps(fi, ff, start, end)
+                for fi, ff in zip(filtered["fecha_inicio"], filtered["fecha_fin"])]
+        filtered = filtered[mask]
+    return filtered.sort_values("fecha_inicio", na_position="last")
@@ -1,100 +1,55 @@
-
 import streamlit as st
-import pandas as pd
-import json, os
-from datetime import date, datetime
+import os, sys
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app import data
+from scrapers import quality, quickranges
+from scrapers.quickranges import PRESETS
 
 st.set_page_config(page_title="Málaga Cultural", layout="wide")
 
 st.title("Agenda cultural · Málaga")
 
-# Load data
-records = []
-if os.path.exists("data/catalog.jsonl"):
-    with open("data/catalog.jsonl","r",encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                records.append(json.loads(line))
-df = pd.DataFrame(records)
-
-# Manual CSV
-if os.path.exists("data/manual_events.csv"):
-    try:
-        m = pd.read_csv("data/manual_events.csv")
-        # normalize minimal fields
-        if not m.empty:
-            m["source_id"] = m.get("source_id","manual")
-            dfm = pd.DataFrame([{
-                "id": f"manual-{i}",
-                "source_id": row.get("source_id","manual"),
-                "source_url": row.get("source_url",""),
-                "categoria": row.get("categoria","actividad"),
-                "titulo": row.get("titulo","(sin título)"),
-                "descripcion": row.get("descripcion",""),
-                "fecha_inicio": row.get("fecha_inicio"),
-                "fecha_fin": row.get("fecha_fin") or row.get("fecha_inicio"),
-                "ocurrencias": str(row.get("ocurrencias","")).split(";") if pd.notna(row.get("ocurrencias")) else [],
-                "all_day": True,
-                "lugar": row.get("lugar",""),
-                "imagen_url": row.get("imagen_url",""),
-                "timezone": "Europe/Madrid",
-            } for i,row in m.iterrows()])
-            df = pd.concat([df, dfm], ignore_index=True)
-    except Exception as e:
-        st.warning(f"No se pudo cargar manual_events.csv: {e}")
-
-if df.empty:
-    st.info("No hay datos todavía. Ejecuta el colector.")
-    st.stop()
-
 # Date filters
 today = date.today()
 col1, col2, col3 = st.columns(3)
 with col1:
-    preset = st.selectbox("Rango rápido", ["Hoy","Mañana","Próximos 7 días","Este mes","Todo"], index=2)
+    preset = st.selectbox("Rango rápido", PRESETS + ["Personalizado"], index=2)
 with col2:
-    start = st.date_input("Desde", today)
+    start = st.date_input("Desde", today, disabled=preset != "Personalizado")
 with col3:
-    end = st.date_input("Hasta", today)
+    end = st.date_input("Hasta", today, disabled=preset != "Personalizado")
 
-if preset == "Hoy":
-    start = end = today
-elif preset == "Mañana":
-    start = end = today.fromordinal(today.toordinal()+1)
-elif preset == "Próximos 7 días":
-    end = date.fromordinal(today.toordinal()+7)
-elif preset == "Este mes":
-    start = date(today.year, today.month, 1)
-    if today.month==12:
-        end = date(today.year, 12, 31)
-    else:
-        from calendar import monthrange
-        end = date(today.year, today.month, monthrange(today.year, today.month)[1])
-# else: use chosen
+# Load data (el colector ya incluye manual_events.csv y curated.json); sólo
+# los shards de fuente/mes que solapan con el rango
+df = data.load_range(*data.bounds(preset, start, end, today))
 
-cats = sorted(df["categoria"].dropna().unique().tolist())
-sel_cats = st.multiselect("Categorías", cats, default=cats)
+if df.empty:
+    st.info("No hay eventos en este rango. ¿Has ejecutado el colector?")
+    st.stop()
 
-def overlaps(row):
-    try:
-        fi = datetime.fromisoformat(str(row.get("fecha_inicio"))).date()
-        ff = datetime.fromisoformat(str(row.get("fecha_fin"))).date()
-    except Exception:
-        return False
-    return not (ff < start or fi > end)
+cats = data.categories(df)
+sel_cats = st.multiselect("Categorías", cats, default=cats)
+hide_low = st.checkbox("Ocultar eventos de baja calidad", value=True,
+                       help="Sin fechas, sin título o con enlace roto (data/quality_index.json)")
 
-filtered = df[df["categoria"].isin(sel_cats)]
-filtered = filtered[filtered.apply(overlaps, axis=1)]
+# presets: listas precalculadas por el colector; si no valen, SQLite o filtro en vivo
+filtered = data.select(df, preset, sel_cats, cats, start, end, today, index=quickranges.load(),
+                       hide=set(quality.load_low()) if hide_low else None)
 
 st.caption(f"{len(filtered)} eventos")
 
 # Render cards
-for _, r in filtered.sort_values("fecha_inicio").iterrows():
+for _, r in filtered.iterrows():
     with st.container(border=True):
         cols = st.columns([1,2])
         with cols[0]:
-            if r.get("imagen_url"):
-                st.image(r.get("imagen_url"))
+            img = r.get("imagen_local")
+            if not (isinstance(img, str) and os.path.exists(img)):
+                img = r.get("imagen_url")
+            if isinstance(img, str) and img:
+                st.image(img)
         with cols[1]:
             st.markdown(f"### {r.get('titulo','(sin título)')}")
             fi = r.get("fecha_inicio"); ff = r.get("fecha_fin")
@@ -9,3 +9,10 @@ def make_id(fields: Dict[str, Any])->str:
 
 def now_iso():
     return datetime.utcnow().isoformat()+"Z"
+
+# campos que añade el colector tras el scraping (miniaturas, calidad); no
+# cuentan como cambio del contenido de un evento
+DERIVED_FIELDS = ("imagen_local", "quality", "quality_issues")
+
+def scraped_fields(it: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in it.items() if k not in DERIVED_FIELDS}
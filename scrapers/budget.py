@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Plazo de toda una ejecución del colector.
+
+`collector.collect` crea un `Budget` y lo pasa a cada feed y, desde ahí, a
+cada petición HTTP (`utils.fetch_*(url, budget=...)`):
+
+- `timeout(cap)` da el timeout de la siguiente petición: `cap` mientras
+  sobre tiempo y lo que quede cuando no. Si ya no queda, lanza
+  `BudgetExceeded` en vez de empezar una petición que no va a terminar.
+- `low()` indica que queda poco: el trabajo prescindible (páginas de
+  detalle, fallbacks, miniaturas) se salta.
+- `reserve` segundos quedan siempre apartados para publicar el catálogo,
+  así que la ejecución completa cabe en `seconds`.
+
+Sin plazo (`Budget(None)`) nunca se agota y `timeout` devuelve `cap`.
+"""
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+# por debajo de esto no merece la pena lanzar una petición
+MIN_TIMEOUT = 2.0
+
+class BudgetExceeded(TimeoutError):
+    pass
+
+class Budget:
+    def __init__(self, seconds: Optional[float], reserve: float = 0.0, low_water: float = 0.2):
+        self.seconds = seconds
+        self.reserve = reserve
+        self.low_water = low_water
+        self.started = time.monotonic()
+        self.deadline = None if seconds is None else self.started + seconds
+
+    def __repr__(self) -> str:
+        if self.deadline is None:
+            return "Budget(unlimited)"
+        return f"Budget({self.remaining():.0f}s of {self.seconds:.0f}s left, reserve {self.reserve:.0f}s)"
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        """Segundos disponibles para recolectar (sin contar la reserva de publicación)."""
+        if self.deadline is None:
+            return float("inf")
+        return max(0.0, self.deadline - self.reserve - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() < MIN_TIMEOUT
+
+    def low(self) -> bool:
+        """Queda menos del `low_water` del plazo: sólo lo imprescindible."""
+        if self.deadline is None:
+            return False
+        return self.remaining() < max(MIN_TIMEOUT, (self.seconds - self.reserve) * self.low_water)
+
+    def timeout(self, cap: float = 30.0) -> float:
+        rem = self.remaining()
+        if rem < MIN_TIMEOUT:
+            raise BudgetExceeded(f"sin tiempo ({self!r})")
+        return min(cap, rem)
+
+UNLIMITED = Budget(None)
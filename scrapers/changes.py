@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Registro de cambios entre ejecuciones del colector (data/changes.jsonl).
+
+Cada publicación del catálogo añade una línea con el delta respecto al
+catálogo anterior, indexado por `id`:
+
+    {"run": 7, "at": "...Z", "added": [{...evento...}],
+     "removed": ["<id>", ...],
+     "changed": [{"id": "<id>", "fields": {"titulo": ["antes", "después"]}}]}
+
+Los campos derivados (`base.DERIVED_FIELDS`: miniatura, calidad) no cuentan
+como cambio.
+
+`compute_delta_files` calcula el mismo delta entre dos catálogos en disco sin
+cargarlos: del anterior sólo guarda {id: hash} y relee las filas de los ids
+que cambiaron.
+
+`run` es un cursor creciente: un consumidor guarda el último que procesó y
+lee sólo lo posterior con `iter_changes(since=cursor)`.
+
+Uso: python -m scrapers.changes --since 5
+"""
+from __future__ import annotations
+
+import os
+import json
+import hashlib
+import argparse
+from typing import Any, Dict, Iterator, List, Optional
+
+from scrapers.base import now_iso, scraped_fields
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+CHANGES = os.path.join(DATA_DIR, "changes.jsonl")
+
+def _by_id(items: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    return {it["id"]: it for it in items if it.get("id")}
+
+def _fields(prev: Dict[str, Any], cur: Dict[str, Any]) -> Dict[str, List[Any]]:
+    return {f: [prev.get(f), cur.get(f)] for f in sorted(set(prev) | set(cur))
+            if prev.get(f) != cur.get(f)}
+
+def compute_delta(old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Dict[str, Any]:
+    before = _by_id(old)
+    after = _by_id(new)
+    added = [after[k] for k in after if k not in before]
+    removed = [k for k in before if k not in after]
+    changed = []
+    for k, cur in after.items():
+        prev = before.get(k)
+        if prev is None:
+            continue
+        # miniatura y calidad no son cambios del evento (base.DERIVED_FIELDS)
+        prev, cur = scraped_fields(prev), scraped_fields(cur)
+        if prev != cur:
+            changed.append({"id": k, "fields": _fields(prev, cur)})
+    return {"added": added, "removed": removed, "changed": changed}
+
+def _iter_rows(path: str) -> Iterator[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def _row_hash(it: Dict[str, Any]) -> bytes:
+    data = json.dumps(scraped_fields(it), ensure_ascii=False, sort_keys=True)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).digest()
+
+def compute_delta_files(old_path: str, new_path: str) -> Dict[str, Any]:
+    """
+    compute_delta entre dos catálogos JSONL, en streaming: en memoria sólo
+    {id: hash} del anterior, las filas añadidas y las de los ids cambiados.
+    """
+    before: Dict[str, bytes] = {}
+    for it in _iter_rows(old_path):
+        if it.get("id"):
+            before[it["id"]] = _row_hash(it)
+    added: Dict[str, Dict[str, Any]] = {}
+    current: Dict[str, Dict[str, Any]] = {}    # ids cambiados -> fila nueva
+    seen = set()
+    for it in _iter_rows(new_path):
+        k = it.get("id")
+        if not k:
+            continue
+        seen.add(k)
+        h = before.get(k)
+        if h is None:
+            added[k] = it
+        elif h != _row_hash(it):
+            current[k] = scraped_fields(it)
+        else:
+            current.pop(k, None)    # id repetido: cuenta la última fila
+    removed = [k for k in before if k not in seen]
+    del before, seen
+    previous: Dict[str, Dict[str, Any]] = {}
+    if current:
+        for it in _iter_rows(old_path):
+            if it.get("id") in current:
+                previous[it["id"]] = scraped_fields(it)
+    changed = [{"id": k, "fields": _fields(previous[k], cur)} for k, cur in current.items()]
+    return {"added": list(added.values()), "removed": removed, "changed": changed}
+
+def is_empty(delta: Dict[str, Any]) -> bool:
+    return not (delta["added"] or delta["removed"] or delta["changed"])
+
+def last_cursor(path: str = CHANGES) -> int:
+    """Cursor de la última línea, leyendo sólo el final del fichero."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        chunk = b""
+        while pos > 0:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step) + chunk
+            lines = chunk.rstrip(b"\n").split(b"\n")
+            if len(lines) > 1 or pos == 0:
+                last = lines[-1]
+                return int(json.loads(last)["run"]) if last.strip() else 0
+    return 0
+
+def append_delta(delta: Dict[str, Any], path: str = CHANGES) -> Optional[int]:
+    """Añade el delta al log. Devuelve el cursor asignado, o None si no hay cambios."""
+    if is_empty(delta):
+        return None
+    run = last_cursor(path) + 1
+    rec = {"run": run, "at": now_iso()}
+    rec.update(delta)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    return run
+
+def iter_changes(since: int = 0, path: str = CHANGES) -> Iterator[Dict[str, Any]]:
+    """Deltas con cursor > `since`, en orden."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            # evita decodificar deltas antiguos completos
+            head = line[:40]
+            if head.startswith('{"run": '):
+                run = int(head[8:].split(",", 1)[0])
+                if run <= since:
+                    continue
+            rec = json.loads(line)
+            if rec.get("run", 0) > since:
+                yield rec
+
+def main():
+    ap = argparse.ArgumentParser(description="Lee el log de cambios del catálogo")
+    ap.add_argument("--since", type=int, default=0, help="Último cursor ya procesado")
+    args = ap.parse_args()
+    for rec in iter_changes(args.since):
+        print(json.dumps(rec, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,21 @@ from __future__ import annotations
 import os
 import sys
 import json
+import hashlib
 import logging
-from importlib import import_module
-from typing import Any, Dict, List
+import argparse
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
 
 import yaml
 
+if not __package__:  # `python scrapers/collector.py`
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# las etapas de publicación (calidad, ics, shards, sqlite...) se importan al
+# usarlas: arrancar el colector o `--only` no las paga
+from scrapers import registry
+from scrapers.budget import UNLIMITED, Budget, BudgetExceeded
+
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(
     level=getattr(logging, LOG_LEVEL, logging.INFO),
@@ -26,69 +35,314 @@ MANUAL = os.path.join(DATA_DIR, "manual_events.csv")
 SOURCES_DIR = os.path.join(DATA_DIR, "sources")
 FEEDS = os.path.join(os.path.dirname(__file__), "..", "config", "feeds.yaml")
 FEEDS = os.path.abspath(FEEDS)
+# origen de los eventos de collect_local(): siempre se leen de nuevo
+LOCAL_ORIGINS = ("manual", "curated")
+# segundos que se guardan del plazo para miniaturas/ics/índices y publicar
+PUBLISH_RESERVE = 60
 
 def ensure_dirs():
     os.makedirs(DATA_DIR, exist_ok=True)
     os.makedirs(SOURCES_DIR, exist_ok=True)
 
-def load_feeds() -> List[Dict[str, Any]]:
+def load_config() -> Dict[str, Any]:
     with open(FEEDS, "r", encoding="utf-8") as f:
-        doc = yaml.safe_load(f)
-    return doc.get("feeds", [])
+        return yaml.safe_load(f) or {}
+
+def load_feeds() -> List[Dict[str, Any]]:
+    return load_config().get("feeds", [])
 
-def write_jsonl(path: str, items: List[Dict[str, Any]]):
+def write_jsonl(path: str, items: Iterable[Dict[str, Any]]):
     with open(path, "w", encoding="utf-8") as f:
         for it in items:
             f.write(json.dumps(it, ensure_ascii=False) + "\n")
 
-def collect():
-    ensure_dirs()
-    log.info("=== Collector start ===")
-    feeds = load_feeds()
-    all_items: List[Dict[str, Any]] = []
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
 
-    for feed in feeds:
-        iid = feed.get("id")
-        active = feed.get("active", True)
-        if not active:
-            continue
+def read_jsonl(path: str) -> List[Dict[str, Any]]:
+    return list(iter_jsonl(path))
 
-        log.info("[%s] import module", iid)
-        try:
-            mod = import_module(f"scrapers.institutions.{iid}")
-        except Exception as e:
-            log.exception("[%s] import failed: %s", iid, e)
-            continue
+def iter_feed(feed: Dict[str, Any], budget: Budget = UNLIMITED,
+              failed: Optional[List[str]] = None,
+              cut: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Eventos de un feed, en streaming. Usa `iter_collect(cfg, budget)` si el
+    módulo lo tiene; si no, adapta su `collect(cfg, budget)` (lista). Los
+    errores se registran y, si se pasa `failed`, se apunta ahí el id del feed;
+    si se quedó a medias por el plazo (BudgetExceeded), también en `cut`.
+    """
+    iid = feed.get("id")
+    log.info("[%s] import module", iid)
+    n = 0
+    try:
+        mod = registry.get(iid)
+        it_collect = getattr(mod, "iter_collect", None)
+        events = it_collect(feed, budget=budget) if it_collect else iter(mod.collect(feed, budget=budget))
+        for ev in events:
+            n += 1
+            yield ev
+        log.info("[%s] total -> %d (written)", iid, n)
+        return
+    except BudgetExceeded as e:
+        log.warning("[%s] sin tiempo tras %d items: %s", iid, n, e)
+        if cut is not None:
+            cut.append(iid)
+    except Exception as e:
+        log.exception("[%s] collect failed after %d items: %s", iid, n, e)
+    if failed is not None:
+        failed.append(iid)
+
+def collect_feed(feed: Dict[str, Any], budget: Budget = UNLIMITED) -> Optional[List[Dict[str, Any]]]:
+    """Ejecuta el scraper de un feed. Devuelve None si falla."""
+    failed: List[str] = []
+    got = list(iter_feed(feed, budget, failed))
+    return None if failed else got
 
+def collect_local() -> List[Dict[str, Any]]:
+    """Eventos manuales (CSV) y curados (JSON); prevalecen sobre los de los feeds."""
+    from scrapers import manual
+    items: List[Dict[str, Any]] = []
+    # cada fuente por separado: un curated.json roto no se lleva los manuales
+    for name, load, path in (("manual", manual.collect_manual, MANUAL),
+                             ("curated", manual.collect_curated, CURATED)):
         try:
-            got = mod.collect(feed)
-            log.info("[%s] total -> %d (written)", iid, len(got))
-            all_items.extend(got)
+            items.extend(load(path))
         except Exception as e:
-            log.exception("[%s] collect failed: %s", iid, e)
+            log.exception("%s failed: %s", name, e)
+    return items
 
-    # dedupe by source_url
+def _is_local(it: Dict[str, Any]) -> bool:
+    """Evento de collect_local() (catálogos antiguos: sin `origen`, por source_id)."""
+    return (it.get("origen") or it.get("source_id")) in LOCAL_ORIGINS
+
+def _dedupe_key(it: Dict[str, Any]) -> str:
+    return it.get("source_url") or it.get("id") or json.dumps(it, sort_keys=True)
+
+def dedupe(all_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # dedupe by source_url (gana el último)
     dedup: Dict[str, Dict[str, Any]] = {}
     for it in all_items:
-        k = it.get("source_url") or it.get("id") or json.dumps(it, sort_keys=True)
-        dedup[k] = it
-    items = list(dedup.values())
-    log.info("Collected items (dedup): %d", len(items))
+        dedup[_dedupe_key(it)] = it
+    return list(dedup.values())
+
+class CatalogWriter:
+    """
+    Escribe eventos en `path + ".tmp"` según llegan, sin acumularlos: el
+    dedupe usa un set de digests de 8 bytes de la clave (gana el primero).
+    `commit()` deja el temporal listo para `publish_file`; `abort()` lo borra.
+    """
+
+    def __init__(self, path: str):
+        self.path = path + ".tmp"
+        self._f = open(self.path, "w", encoding="utf-8")
+        self._seen: Set[bytes] = set()
+        self.written = 0
+        self.duplicates = 0
+        self.image_urls: Set[str] = set()
+
+    def add(self, it: Dict[str, Any]) -> bool:
+        key = hashlib.blake2b(_dedupe_key(it).encode("utf-8"), digest_size=8).digest()
+        if key in self._seen:
+            self.duplicates += 1
+            return False
+        self._seen.add(key)
+        self._f.write(json.dumps(it, ensure_ascii=False) + "\n")
+        if it.get("imagen_url"):
+            self.image_urls.add(it["imagen_url"])
+        self.written += 1
+        return True
 
-    if items:
-        # backup previous ok
+    def commit(self) -> str:
+        self._f.close()
+        return self.path
+
+    def abort(self):
+        self._f.close()
         try:
-            if os.path.exists(CATALOG):
-                with open(CATALOG, "rb") as src, open(CATALOG_LAST_OK, "wb") as dst:
-                    dst.write(src.read())
-        except Exception:
+            os.remove(self.path)
+        except OSError:
             pass
-        write_jsonl(CATALOG, items)
-        log.info("[OK] catalog -> %d items", len(items))
-    else:
+
+def finalize(items: List[Dict[str, Any]], budget: Budget = UNLIMITED) -> List[Dict[str, Any]]:
+    """Etapas de enriquecimiento antes de publicar (miniaturas)."""
+    from scrapers import images
+    try:
+        images.attach_thumbnails(items, budget=budget)
+    except Exception as e:
+        log.exception("thumbnails failed: %s", e)
+    return items
+
+def finalize_file(path: str, image_urls: Iterable[str], budget: Budget = UNLIMITED):
+    """`finalize` sobre un catálogo en disco: reescribe `path` en streaming con `imagen_local`."""
+    from scrapers import images
+    try:
+        thumbs = images.thumbnails_for(image_urls, budget=budget)
+    except Exception as e:
+        log.exception("thumbnails failed: %s", e)
+        return
+    if thumbs is None:
+        return
+    tmp = path + ".thumbs"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for it in iter_jsonl(path):
+            it["imagen_local"] = thumbs.get(it.get("imagen_url") or "")
+            f.write(json.dumps(it, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+def publish_catalog(items: List[Dict[str, Any]]):
+    """Publica una lista de eventos (modo daemon); ver `publish_file`."""
+    tmp = CATALOG + ".tmp"
+    write_jsonl(tmp, items)
+    publish_file(tmp)
+
+def publish_file(tmp: str):
+    """
+    Publica el catálogo ya escrito en `tmp` de forma atómica (rename), tras
+    puntuar su calidad y copiar el anterior a catalog.jsonl.last_ok, y añade
+    el delta respecto al anterior a data/changes.jsonl (en streaming, sin
+    cargar ninguno de los dos catálogos). Los índices se
+    regeneran leyendo el fichero publicado.
+    """
+    import shutil
+    from scrapers import changes, ics, quality, quickranges, shards, store
+    min_score = float((load_config().get("quality") or {}).get("min_score", quality.MIN_SCORE))
+    try:
+        for sid, st in quality.annotate_file(tmp, min_score).items():
+            log.info("[quality] %s: %d rows, mean %.2f, %d low (min %.2f), dates %.0f%%, title %.0f%%, image %.0f%%",
+                     sid, st["rows"], st["quality_mean"], st["low_confidence"], min_score,
+                     100 * st["checks"]["dates"], 100 * st["checks"]["title"], 100 * st["checks"]["image"])
+    except Exception as e:
+        log.exception("quality stage failed: %s", e)
+
+    # delta en streaming, antes de sustituir el anterior
+    delta = changes.compute_delta_files(CATALOG, tmp)
+    # backup previous ok
+    try:
+        if os.path.exists(CATALOG):
+            shutil.copyfile(CATALOG, CATALOG_LAST_OK)
+    except Exception:
+        pass
+    os.replace(tmp, CATALOG)
+
+    run = changes.append_delta(delta)
+    log.info("[OK] catalog published")
+    if run is not None:
+        log.info("[OK] changes run=%d: +%d -%d ~%d", run, len(delta["added"]),
+                 len(delta["removed"]), len(delta["changed"]))
+    del delta
+
+    try:
+        ics.export(CATALOG)
+    except Exception as e:
+        log.exception("ics export failed: %s", e)
+
+    try:
+        # sólo los campos que usa el índice
+        quickranges.write({k: it.get(k) for k in ("id", "categoria", "fecha_inicio", "fecha_fin")}
+                          for it in iter_jsonl(CATALOG))
+    except Exception as e:
+        log.exception("quick ranges index failed: %s", e)
+
+    try:
+        stats = shards.write_from(CATALOG)
+        log.info("[OK] shards: %d (%d rewritten, %d unchanged, %d removed)",
+                 stats["shards"], stats["written"], stats["unchanged"], stats["removed"])
+    except Exception as e:
+        log.exception("shards failed: %s", e)
+
+    if (load_config().get("store") or {}).get("sqlite"):
+        try:
+            stats = store.upsert(iter_jsonl(CATALOG))
+            log.info("[OK] sqlite store: %d upserted, %d deactivated",
+                     stats["upserted"], stats["deactivated"])
+        except Exception as e:
+            log.exception("sqlite store failed: %s", e)
+
+def make_budget(cfg: Dict[str, Any], minutes: Optional[float] = None) -> Budget:
+    """Plazo de la ejecución: `--budget-minutes` o `collector.budget_minutes` en feeds.yaml."""
+    opts = cfg.get("collector") or {}
+    if minutes is None:
+        minutes = opts.get("budget_minutes")
+    if not minutes:
+        return UNLIMITED
+    return Budget(float(minutes) * 60, reserve=float(opts.get("publish_reserve_seconds", PUBLISH_RESERVE)))
+
+def collect(only: Optional[str] = None, budget_minutes: Optional[float] = None):
+    """
+    Recolecta los feeds activos y escribe el catálogo en streaming. Con
+    `only` se ejecuta un único feed (aunque esté inactivo) y se conservan
+    del catálogo previo los items del resto. Los feeds que no caben en el
+    plazo, o que se cortan por él, conservan sus items del catálogo previo.
+    """
+    ensure_dirs()
+    log.info("=== Collector start ===")
+    cfg = load_config()
+    budget = make_budget(cfg, budget_minutes)
+    log.info("budget: %r", budget)
+    feeds = cfg.get("feeds", [])
+    if only:
+        feeds = [f for f in feeds if f.get("id") == only]
+        if not feeds:
+            log.error("Feed desconocido: %s", only)
+            return
+
+    writer = CatalogWriter(CATALOG)
+    try:
+        # primero los manuales (también con --only): en el dedupe gana el primero
+        for it in collect_local():
+            writer.add(it)
+        local = writer.written
+        out_of_time: List[str] = []
+        for feed in feeds:
+            if not feed.get("active", True) and not only:
+                continue
+            if budget.expired():
+                out_of_time.append(feed.get("id"))
+                continue
+            # cortado por el plazo: lo nuevo va primero y lo anterior completa
+            for it in iter_feed(feed, budget, cut=out_of_time):
+                writer.add(it)
+        fresh = writer.written - local
+
+        if out_of_time:
+            log.warning("sin tiempo para %s: se mantienen sus items anteriores", ", ".join(out_of_time))
+        if out_of_time or (only and fresh):
+            for it in iter_jsonl(CATALOG):
+                sid = it.get("source_id")
+                if _is_local(it):
+                    continue  # ya vienen de collect_local(): los borrados no vuelven
+                # fast path de un solo feed: el resto del catálogo se mantiene tal cual
+                if sid in out_of_time or (only and fresh and sid != only):
+                    writer.add(it)
+    except BaseException:
+        writer.abort()
+        raise
+
+    log.info("Collected items (dedup): %d (%d duplicates)", writer.written, writer.duplicates)
+    if not writer.written or (only and not fresh):
+        writer.abort()
         log.warning("No items collected. Keeping previous catalog.jsonl (if any).")
+    else:
+        tmp = writer.commit()
+        finalize_file(tmp, writer.image_urls, budget)
+        publish_file(tmp)
+        log.info("[OK] catalog -> %d items", writer.written)
+
+    log.info("=== Collector end (%.0f s) ===", budget.elapsed())
 
-    log.info("=== Collector end ===")
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Colector de eventos culturales")
+    ap.add_argument("--only", metavar="FEED", default=None,
+                    help="Ejecuta sólo este feed (id de config/feeds.yaml)")
+    ap.add_argument("--budget-minutes", type=float, default=None,
+                    help="Plazo total de la ejecución (por defecto collector.budget_minutes)")
+    args = ap.parse_args(argv)
+    collect(only=args.only, budget_minutes=args.budget_minutes)
 
 if __name__ == "__main__":
-    collect()
+    main()
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Modo daemon del colector: proceso de larga duración que refresca cada feed
+de config/feeds.yaml con su propio intervalo.
+
+- El estado (items por feed) vive en memoria y las sesiones HTTP se
+  reutilizan por hilo (`utils._session`), así que no se reabren conexiones.
+- El intervalo de cada feed se adapta a su ritmo de cambios: si el
+  contenido cambió se reduce a la mitad, si no cambió crece x1.5, siempre
+  dentro de [min_interval, max_interval].
+- A cada espera se le aplica un jitter aleatorio (±jitter) para no
+  sincronizar peticiones a los mismos hosts.
+- Tras cada actualización de un feed se publica el catálogo completo de
+  forma atómica (`collector.publish_catalog`).
+
+Uso: python -m scrapers.daemon
+"""
+from __future__ import annotations
+
+import heapq
+import hashlib
+import json
+import random
+import signal
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from scrapers import collector
+from scrapers.base import scraped_fields
+
+log = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "max_concurrency": 2,
+    "jitter": 0.1,
+    "min_interval_minutes": 30,
+    "max_interval_minutes": 24 * 60,
+    "refresh_minutes": 6 * 60,
+}
+
+def _fingerprint(items: List[Dict[str, Any]]) -> str:
+    """Huella de lo que produce el scraper (sin miniaturas ni calidad del catálogo publicado)."""
+    h = hashlib.sha1()
+    for line in sorted(json.dumps(scraped_fields(it), sort_keys=True, ensure_ascii=False) for it in items):
+        h.update(line.encode("utf-8"))
+    return h.hexdigest()
+
+class FeedState:
+    def __init__(self, feed: Dict[str, Any], interval: float):
+        self.feed = feed
+        self.id: str = feed.get("id")
+        self.interval = interval          # segundos
+        self.items: List[Dict[str, Any]] = []
+        self.fingerprint: Optional[str] = None
+        self.runs = 0
+        self.changes = 0
+        self.running = False
+
+class Daemon:
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config if config is not None else collector.load_config()
+        opts = dict(DEFAULTS)
+        opts.update(config.get("daemon") or {})
+        self.max_concurrency = int(opts["max_concurrency"])
+        self.jitter = float(opts["jitter"])
+        self.min_interval = float(opts["min_interval_minutes"]) * 60
+        self.max_interval = float(opts["max_interval_minutes"]) * 60
+        default_refresh = float(opts["refresh_minutes"]) * 60
+
+        self.feeds: Dict[str, FeedState] = {}
+        for feed in config.get("feeds", []):
+            if not feed.get("active", True):
+                continue
+            iv = float(feed.get("refresh_minutes", default_refresh / 60)) * 60
+            st = FeedState(feed, self._clamp(iv))
+            self.feeds[st.id] = st
+
+        # arranca con lo último publicado para no vaciar fuentes aún no refrescadas
+        for it in collector.read_jsonl(collector.CATALOG):
+            if collector._is_local(it):
+                continue  # los manuales se leen de nuevo en cada publicación
+            st = self.feeds.get(it.get("source_id"))
+            if st is not None:
+                st.items.append(it)
+        for st in self.feeds.values():
+            if st.items:
+                st.fingerprint = _fingerprint(st.items)
+
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._queue: List[tuple] = []
+
+    def _clamp(self, seconds: float) -> float:
+        return max(self.min_interval, min(self.max_interval, seconds))
+
+    def _jittered(self, seconds: float) -> float:
+        return seconds * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _schedule(self, st: FeedState, delay: float):
+        heapq.heappush(self._queue, (time.monotonic() + self._jittered(delay), st.id))
+
+    def _run_feed(self, st: FeedState):
+        try:
+            got = collector.collect_feed(st.feed)
+            with self._lock:
+                st.runs += 1
+                if got is None:
+                    # error: se mantiene el intervalo y lo último bueno
+                    return
+                fp = _fingerprint(got)
+                changed = fp != st.fingerprint
+                if changed:
+                    st.changes += 1
+                    st.interval = self._clamp(st.interval / 2)
+                else:
+                    st.interval = self._clamp(st.interval * 1.5)
+                st.items = got
+                st.fingerprint = fp
+            log.info("[%s] changed=%s next in %.0f min (%d/%d runs with changes)",
+                     st.id, changed, st.interval / 60, st.changes, st.runs)
+            if changed:
+                self.publish()
+        finally:
+            with self._lock:
+                st.running = False
+                self._schedule(st, st.interval)
+
+    def publish(self):
+        with self._publish_lock:
+            # la foto se toma dentro del lock de publicación: la última en
+            # publicarse es siempre la más reciente
+            with self._lock:
+                all_items = [it for st in self.feeds.values() for it in st.items]
+            # copias: finalize añade imagen_local y no debe tocar st.items
+            items = [dict(it) for it in collector.dedupe(all_items + collector.collect_local())]
+            if not items:
+                return
+            collector.publish_catalog(collector.finalize(items))
+
+    def stop(self, *_):
+        log.info("Daemon stopping...")
+        self._stop.set()
+
+    def run(self):
+        collector.ensure_dirs()
+        log.info("=== Daemon start: %d feeds, max_concurrency=%d ===",
+                 len(self.feeds), self.max_concurrency)
+        for st in self.feeds.values():
+            # primer refresco escalonado dentro del jitter
+            heapq.heappush(self._queue, (time.monotonic() + random.uniform(0, 5), st.id))
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            while not self._stop.is_set():
+                with self._lock:
+                    due = None
+                    if self._queue and self._queue[0][0] <= time.monotonic():
+                        _, fid = heapq.heappop(self._queue)
+                        st = self.feeds[fid]
+                        if not st.running:
+                            st.running = True
+                            due = st
+                    wait = (self._queue[0][0] - time.monotonic()) if self._queue else 1.0
+                if due is not None:
+                    pool.submit(self._run_feed, due)
+                    continue
+                self._stop.wait(max(0.1, min(wait, 60.0)))
+        log.info("=== Daemon end ===")
+
+def main():
+    d = Daemon()
+    signal.signal(signal.SIGTERM, d.stop)
+    signal.signal(signal.SIGINT, d.stop)
+    d.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+Exportación iCalendar (RFC 5545) del catálogo para suscribirse desde apps
+de calendario.
+
+Lee data/catalog.jsonl en streaming y escribe en data/ics/:
+- all.ics
+- source-<source_id>.ics
+- categoria-<categoria>.ics
+
+Cada `ocurrencias` se expande en un VEVENT; sin ocurrencias se emite un
+VEVENT de día completo fecha_inicio..fecha_fin. Los VEVENT serializados se
+guardan en data/ics/.vevents.json por `id` + hash del contenido (sin los
+campos derivados: miniatura, calidad), de modo que en cada ejecución sólo
+se re-serializan los eventos que cambiaron (la caché no va a git; en CI
+se conserva con actions/cache). Las horas van con
+TZID=Europe/Madrid y cada calendario incluye su VTIMEZONE; otras zonas se
+emiten como hora local flotante.
+
+Uso: python -m scrapers.ics
+"""
+from __future__ import annotations
+
+import os
+import re
+import json
+import hashlib
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, IO, List, Optional
+
+from scrapers.base import scraped_fields
+
+log = logging.getLogger(__name__)
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+CATALOG = os.path.join(DATA_DIR, "catalog.jsonl")
+ICS_DIR = os.path.join(DATA_DIR, "ics")
+CACHE = os.path.join(ICS_DIR, ".vevents.json")
+
+PRODID = "-//Malaga Cultural//Agenda//ES"
+UID_DOMAIN = "malaga-cultural"
+TZID = "Europe/Madrid"
+# reglas vigentes de la UE (último domingo de marzo / octubre)
+VTIMEZONE = [
+    "BEGIN:VTIMEZONE",
+    f"TZID:{TZID}",
+    "BEGIN:DAYLIGHT",
+    "TZOFFSETFROM:+0100",
+    "TZOFFSETTO:+0200",
+    "TZNAME:CEST",
+    "DTSTART:19700329T020000",
+    "RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU",
+    "END:DAYLIGHT",
+    "BEGIN:STANDARD",
+    "TZOFFSETFROM:+0200",
+    "TZOFFSETTO:+0100",
+    "TZNAME:CET",
+    "DTSTART:19701025T030000",
+    "RRULE:FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU",
+    "END:STANDARD",
+    "END:VTIMEZONE",
+]
+
+def _escape(s: Any) -> str:
+    s = str(s or "")
+    return (s.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+             .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+def _fold(line: str) -> str:
+    """Pliega a 75 octetos (UTF-8) sin partir caracteres multibyte."""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line + "\r\n"
+    out, cur, size = [], [], 0
+    limit = 75
+    for ch in line:
+        n = len(ch.encode("utf-8"))
+        if size + n > limit:
+            out.append("".join(cur))
+            cur, size, limit = [], 0, 74  # las continuaciones empiezan por espacio
+        cur.append(ch)
+        size += n
+    out.append("".join(cur))
+    return "\r\n ".join(out) + "\r\n"
+
+def _slug(s: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", str(s).lower()).strip("-") or "otros"
+
+def _to_date(s: Optional[str]) -> Optional[date]:
+    if not s:
+        return None
+    try:
+        return date.fromisoformat(str(s)[:10])
+    except ValueError:
+        return None
+
+def content_hash(ev: Dict[str, Any]) -> str:
+    data = json.dumps(scraped_fields(ev), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+def _occurrences(ev: Dict[str, Any]) -> List[tuple]:
+    """Lista de (uid_suffix, DTSTART prop, DTEND prop)."""
+    out = []
+    seen = set()
+    # sólo hay VTIMEZONE de Madrid; el resto, hora local flotante
+    tzparam = f";TZID={TZID}" if (ev.get("timezone") or TZID) == TZID else ""
+    for raw in ev.get("ocurrencias") or []:
+        raw = str(raw).strip()
+        if not raw:
+            continue
+        if "T" in raw or " " in raw:
+            try:
+                dt = datetime.fromisoformat(raw.replace(" ", "T"))
+            except ValueError:
+                continue
+            stamp = dt.strftime("%Y%m%dT%H%M%S")
+            end = (dt + timedelta(hours=1)).strftime("%Y%m%dT%H%M%S")
+            occ = (stamp, f"DTSTART{tzparam}:{stamp}", f"DTEND{tzparam}:{end}")
+        else:
+            d = _to_date(raw)
+            if not d:
+                continue
+            occ = (d.strftime("%Y%m%d"), f"DTSTART;VALUE=DATE:{d:%Y%m%d}",
+                   f"DTEND;VALUE=DATE:{d + timedelta(days=1):%Y%m%d}")
+        if occ[0] not in seen:  # ocurrencias repetidas darían UIDs duplicados
+            seen.add(occ[0])
+            out.append(occ)
+    if out:
+        return out
+    fi = _to_date(ev.get("fecha_inicio"))
+    if not fi:
+        return []
+    ff = _to_date(ev.get("fecha_fin")) or fi
+    if ff < fi:
+        ff = fi
+    return [("", f"DTSTART;VALUE=DATE:{fi:%Y%m%d}",
+             f"DTEND;VALUE=DATE:{ff + timedelta(days=1):%Y%m%d}")]
+
+def serialize_event(ev: Dict[str, Any], dtstamp: str) -> str:
+    """VEVENT(s) de un evento; cadena vacía si no tiene fechas."""
+    parts = []
+    for suffix, dtstart, dtend in _occurrences(ev):
+        uid = f"{ev.get('id')}{'-' + suffix if suffix else ''}@{UID_DOMAIN}"
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{uid}",
+            f"DTSTAMP:{dtstamp}",
+            dtstart,
+            dtend,
+            f"SUMMARY:{_escape(ev.get('titulo') or '(sin título)')}",
+        ]
+        if ev.get("descripcion"):
+            lines.append(f"DESCRIPTION:{_escape(ev.get('descripcion'))}")
+        if ev.get("lugar"):
+            lines.append(f"LOCATION:{_escape(ev.get('lugar'))}")
+        if ev.get("source_url"):
+            lines.append(f"URL:{ev.get('source_url')}")
+        if ev.get("categoria"):
+            lines.append(f"CATEGORIES:{_escape(ev.get('categoria'))}")
+        if ev.get("status") == "cancelado":
+            lines.append("STATUS:CANCELLED")
+        lines.append("END:VEVENT")
+        parts.append("".join(_fold(l) for l in lines))
+    return "".join(parts)
+
+def _load_cache(path: str) -> Dict[str, List[str]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _header(name: str) -> str:
+    return "".join(_fold(l) for l in [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(name)}",
+        f"X-WR-TIMEZONE:{TZID}",
+    ] + VTIMEZONE)
+
+def export(catalog: str = CATALOG, out_dir: str = ICS_DIR) -> Dict[str, int]:
+    """
+    Genera los .ics en streaming. Devuelve {"events", "reused", "serialized"}.
+    Los ficheros se escriben como .tmp y se renombran al terminar.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    cache_path = os.path.join(out_dir, os.path.basename(CACHE))
+    cache = _load_cache(cache_path)
+    new_cache: Dict[str, List[str]] = {}
+    dtstamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    files: Dict[str, IO[str]] = {}
+    stats = {"events": 0, "reused": 0, "serialized": 0}
+
+    def out(fname: str, title: str) -> IO[str]:
+        f = files.get(fname)
+        if f is None:
+            f = open(os.path.join(out_dir, fname + ".tmp"), "w", encoding="utf-8", newline="")
+            f.write(_header(title))
+            files[fname] = f
+        return f
+
+    try:
+        out("all.ics", "Agenda cultural · Málaga")
+        if os.path.exists(catalog):
+            with open(catalog, "r", encoding="utf-8") as src:
+                for line in src:
+                    if not line.strip():
+                        continue
+                    ev = json.loads(line)
+                    eid = ev.get("id")
+                    if not eid:
+                        continue
+                    h = content_hash(ev)
+                    hit = cache.get(eid)
+                    if hit and hit[0] == h:
+                        text = hit[1]
+                        stats["reused"] += 1
+                    else:
+                        text = serialize_event(ev, dtstamp)
+                        stats["serialized"] += 1
+                    new_cache[eid] = [h, text]
+                    if not text:
+                        continue
+                    stats["events"] += 1
+                    out("all.ics", "").write(text)
+                    if ev.get("source_id"):
+                        out(f"source-{_slug(ev['source_id'])}.ics",
+                            f"Málaga · {ev['source_id']}").write(text)
+                    if ev.get("categoria"):
+                        out(f"categoria-{_slug(ev['categoria'])}.ics",
+                            f"Málaga · {ev['categoria']}").write(text)
+        for f in files.values():
+            f.write("END:VCALENDAR\r\n")
+    except BaseException:
+        for fname, f in files.items():
+            f.close()
+            os.remove(os.path.join(out_dir, fname + ".tmp"))
+        raise
+    finally:
+        for f in files.values():
+            f.close()
+
+    for fname in files:
+        os.replace(os.path.join(out_dir, fname + ".tmp"), os.path.join(out_dir, fname))
+    # feeds que ya no tienen eventos
+    for fname in os.listdir(out_dir):
+        if fname.endswith(".ics") and fname not in files:
+            os.remove(os.path.join(out_dir, fname))
+
+    tmp = cache_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(new_cache, f, ensure_ascii=False)
+    os.replace(tmp, cache_path)
+    log.info("[OK] ics -> %d events (%d reused, %d serialized), %d files",
+             stats["events"], stats["reused"], stats["serialized"], len(files))
+    return stats
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    export()
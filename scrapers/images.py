@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Miniaturas locales de `imagen_url` (data/thumbs/).
+
+Cada URL distinta se descarga una vez (en paralelo, con GET condicional
+If-None-Match / If-Modified-Since contra data/thumbs/index.json), el
+contenido se deduplica por hash y se genera una miniatura de tamaño fijo
+(WebP, o JPEG si Pillow no soporta WebP). Los eventos reciben
+`imagen_local` con la ruta relativa a la raíz del repo.
+
+Requiere Pillow; si no está instalado la etapa se omite y el catálogo
+sigue apuntando a las URLs remotas.
+"""
+from __future__ import annotations
+
+import os
+import io
+import json
+import hashlib
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from .budget import UNLIMITED, Budget
+from .utils import _session
+
+log = logging.getLogger(__name__)
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+THUMBS_DIR = os.path.join(ROOT, "data", "thumbs")
+INDEX = os.path.join(THUMBS_DIR, "index.json")
+
+SIZE = (480, 320)
+QUALITY = 80
+WORKERS = 8
+MAX_BYTES = 15 * 1024 * 1024
+
+def _load_index() -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(INDEX, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_index(index: Dict[str, Dict[str, Any]]):
+    tmp = INDEX + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, INDEX)
+
+def _render(raw: bytes, sha: str) -> Optional[str]:
+    """Genera la miniatura de `raw`; devuelve el nombre del fichero."""
+    from PIL import Image, ImageOps, features
+
+    ext = "webp" if features.check("webp") else "jpg"
+    name = f"{sha[:20]}.{ext}"
+    path = os.path.join(THUMBS_DIR, name)
+    if os.path.exists(path):
+        return name
+    with Image.open(io.BytesIO(raw)) as im:
+        im = ImageOps.exif_transpose(im).convert("RGB")
+        im = ImageOps.fit(im, SIZE, method=Image.LANCZOS)
+        # temporal único: dos URLs con el mismo contenido pueden renderizar a la vez
+        fd, tmp = tempfile.mkstemp(dir=THUMBS_DIR, prefix=f".{sha[:20]}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                im.save(f, format="WEBP" if ext == "webp" else "JPEG", quality=QUALITY)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+    return name
+
+def _fetch_one(url: str, prev: Dict[str, Any], budget: Budget = UNLIMITED) -> Dict[str, Any]:
+    headers = {"Accept": "image/avif,image/webp,image/*,*/*;q=0.8"}
+    thumb = prev.get("thumb")
+    if thumb and os.path.exists(os.path.join(THUMBS_DIR, thumb)):
+        if prev.get("etag"):
+            headers["If-None-Match"] = prev["etag"]
+        if prev.get("last_modified"):
+            headers["If-Modified-Since"] = prev["last_modified"]
+    r = _session().get(url, headers=headers, timeout=budget.timeout(30))
+    if r.status_code == 304:
+        return prev
+    r.raise_for_status()
+    raw = r.content
+    if len(raw) > MAX_BYTES:
+        raise ValueError(f"image too large ({len(raw)} bytes)")
+    sha = hashlib.sha1(raw).hexdigest()
+    entry = {
+        "sha1": sha,
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+        "thumb": prev.get("thumb") if prev.get("sha1") == sha else None,
+    }
+    if not entry["thumb"] or not os.path.exists(os.path.join(THUMBS_DIR, entry["thumb"])):
+        entry["thumb"] = _render(raw, sha)
+    return entry
+
+def thumbnails_for(urls: Iterable[str], workers: int = WORKERS,
+                   budget: Budget = UNLIMITED) -> Optional[Dict[str, str]]:
+    """
+    {imagen_url: "data/thumbs/<fichero>"} para las URLs dadas, o None sin
+    Pillow. Borra las miniaturas que ya no usa ninguna URL.
+    Si el plazo va justo no se descarga nada: se reutilizan las miniaturas que ya hay.
+    """
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        log.warning("Pillow no instalado: se omiten las miniaturas")
+        return None
+
+    os.makedirs(THUMBS_DIR, exist_ok=True)
+    index = _load_index()
+    urls = sorted(set(urls))
+
+    def job(url: str):
+        if budget.low():
+            return url, index.get(url)
+        try:
+            return url, _fetch_one(url, index.get(url) or {}, budget)
+        except Exception as e:
+            log.warning("thumb %s: %s", url, e)
+            return url, index.get(url)
+
+    new_index: Dict[str, Dict[str, Any]] = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for url, entry in pool.map(job, urls):
+            if entry and entry.get("thumb"):
+                new_index[url] = entry
+
+    # miniaturas que ya no usa ningún evento
+    used = {e["thumb"] for e in new_index.values()}
+    for name in os.listdir(THUMBS_DIR):
+        if name.endswith((".webp", ".jpg")) and name not in used:
+            os.remove(os.path.join(THUMBS_DIR, name))
+    _save_index(new_index)
+    log.info("[OK] thumbs -> %d urls, %d files", len(new_index), len(used))
+    return {url: f"data/thumbs/{e['thumb']}" for url, e in new_index.items()}
+
+def attach_thumbnails(items: List[Dict[str, Any]], workers: int = WORKERS,
+                      budget: Budget = UNLIMITED) -> List[Dict[str, Any]]:
+    """Rellena `imagen_local` en los items con imagen. Modifica y devuelve `items`."""
+    thumbs = thumbnails_for((it["imagen_url"] for it in items if it.get("imagen_url")), workers, budget)
+    if thumbs is None:
+        return items
+    for it in items:
+        it["imagen_local"] = thumbs.get(it.get("imagen_url") or "")
+    return items
@@ -1,35 +1,25 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
-import os
-import json
-import re
-from typing import Any, Dict, List, Optional
+import logging
+from typing import Any, Dict, List
 from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
-
-from ..utils import fetch_html, fetch_json, clean_text, epoch_ms_to_iso
+from .. import snapshots
+from ..budget import UNLIMITED, Budget, BudgetExceeded
+from ..utils import fetch_html, fetch_json, clean_text, epoch_ms_to_iso, make_soup, extract_dates
 
 SOURCE_ID = "latermica"
 DEFAULT_BASE = "https://www.latermicamalaga.com/"
 TZ = "Europe/Madrid"
 PLACE = "La Térmica (Málaga)"
 
-# === util de trazas a data/sources ===
-DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
-SRC_DIR = os.path.join(DATA_DIR, "sources")
-os.makedirs(SRC_DIR, exist_ok=True)
+log = logging.getLogger(__name__)
 
-def _dump(name: str, content: str | dict):
-    path = os.path.join(SRC_DIR, name)
+# === trazas de las respuestas crudas (data/snapshots) ===
+def _dump(url: str, content: str | dict):
     try:
-        if isinstance(content, (dict, list)):
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(content, f, ensure_ascii=False, indent=2)
-        else:
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(content)
+        snapshots.put(url, content)
     except Exception:
         pass
 
@@ -60,10 +50,10 @@ def _mk_id(url: str) -> str:
 # 1) The Events Calendar API
 # --------------------------
 
-def _collect_tribe_v1(base: str) -> List[Dict[str, Any]]:
+def _collect_tribe_v1(base: str, budget: Budget = UNLIMITED) -> List[Dict[str, Any]]:
     api = base.rstrip("/") + "/wp-json/tribe/events/v1/events?per_page=100"
-    data = fetch_json(api)
-    _dump("latermica_tribe_v1.json", data)
+    data = fetch_json(api, budget)
+    _dump(api, data)
     events = data.get("events", []) or []
     out: List[Dict[str, Any]] = []
     for ev in events:
@@ -90,7 +80,7 @@ def _collect_tribe_v1(base: str) -> List[Dict[str, Any]]:
         out.append(it)
     return out
 
-def _collect_tribe_v1_alt(base: str) -> List[Dict[str, Any]]:
+def _collect_tribe_v1_alt(base: str, budget: Budget = UNLIMITED) -> List[Dict[str, Any]]:
     """
     Algunas instalaciones requieren /events/?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD
     o usan paginación/page. Probamos dos variantes simples.
@@ -102,8 +92,8 @@ def _collect_tribe_v1_alt(base: str) -> List[Dict[str, Any]]:
     ]
     for api in urls:
         try:
-            data = fetch_json(api)
-            _dump("latermica_tribe_v1_alt.json", data)
+            data = fetch_json(api, budget)
+            _dump(api, data)
             evs = data.get("events", []) or []
             for ev in evs:
                 title = clean_text(ev.get("title"))
@@ -129,6 +119,8 @@ def _collect_tribe_v1_alt(base: str) -> List[Dict[str, Any]]:
                 out.append(it)
             if out:
                 break
+        except BudgetExceeded:
+            raise
         except Exception:
             continue
     return out
@@ -137,13 +129,13 @@ def _collect_tribe_v1_alt(base: str) -> List[Dict[str, Any]]:
 # 2) Modern Events Calendar
 # --------------------------
 
-def _collect_mec(base: str) -> List[Dict[str, Any]]:
+def _collect_mec(base: str, budget: Budget = UNLIMITED) -> List[Dict[str, Any]]:
     """
     MEC suele exponer algo como /wp-json/mec/v1/events
     """
     api = base.rstrip("/") + "/wp-json/mec/v1/events"
-    data = fetch_json(api)
-    _dump("latermica_mec.json", data)
+    data = fetch_json(api, budget)
+    _dump(api, data)
     if not isinstance(data, list):
         return []
     out: List[Dict[str, Any]] = []
@@ -172,14 +164,16 @@ def _collect_mec(base: str) -> List[Dict[str, Any]]:
 # 3) WP REST genérico (CPT)
 # --------------------------
 
-def _collect_wp_v2(base: str) -> List[Dict[str, Any]]:
+def _collect_wp_v2(base: str, budget: Budget = UNLIMITED) -> List[Dict[str, Any]]:
     """
     Fallback genérico al CPT típico de Events Calendar
     """
     api = base.rstrip("/") + "/wp-json/wp/v2/tribe_events?per_page=100"
     try:
-        arr = fetch_json(api)
-        _dump("latermica_wp_v2.json", arr)
+        arr = fetch_json(api, budget)
+        _dump(api, arr)
+    except BudgetExceeded:
+        raise
     except Exception:
         return []
     if not isinstance(arr, list):
@@ -202,27 +196,8 @@ def _collect_wp_v2(base: str) -> List[Dict[str, Any]]:
 # 4) Fallback HTML (agenda)
 # --------------------------
 
-DATE_PAT = re.compile(
-    r"(\d{1,2})\s+(enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|"
-    r"setiembre|octubre|noviembre|diciembre)\s+(\d{4})",
-    re.IGNORECASE
-)
-
-MONTH_ES = {
-    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6,
-    "julio": 7, "agosto": 8, "septiembre": 9, "setiembre": 9, "octubre": 10,
-    "noviembre": 11, "diciembre": 12
-}
-
-def _to_iso(day: int, mon_name: str, year: int) -> Optional[str]:
-    m = MONTH_ES.get(mon_name.lower())
-    if not m:
-        return None
-    return f"{year:04d}-{m:02d}-{day:02d}"
-
 def _html_cards(html: str, base: str) -> List[Dict[str, Any]]:
-    _dump("latermica_agenda.html", html)
-    soup = BeautifulSoup(html, "lxml")
+    soup = make_soup(html)
     # heurística: tarjetas con título/enlace
     cards = []
     for a in soup.select("a[href]"):
@@ -240,40 +215,34 @@ def _html_cards(html: str, base: str) -> List[Dict[str, Any]]:
         # filtra navegación, rrss, etc.
         if any(s in url for s in ("/categoria/", "facebook.com", "instagram.com", "twitter.com", "tienda", "/wp-json/")):
             continue
+        # fecha de la propia tarjeta (contenedor del enlace), no de la página
+        card = a.find_parent(["article", "li"]) or a.parent
+        card_text = card.get_text(" ", strip=True)[:500] if card is not None else text
         # Guardamos posibles tarjetas (dedupe por URL luego)
-        cards.append((text, url))
+        cards.append((text, url, card_text))
 
     # dedupe por url
     seen = set()
     out: List[Dict[str, Any]] = []
-    for title, url in cards:
+    for title, url, card_text in cards:
         if url in seen:
             continue
         seen.add(url)
+        dates = extract_dates(card_text)
         it = _item_proto()
         it.update({
             "id": _mk_id(url),
             "source_url": url,
             "titulo": title,
+            "fecha_inicio": dates["fecha_inicio"],
+            "fecha_fin": dates["fecha_fin"],
+            "ocurrencias": dates["ocurrencias"],
             "parse_confidence": 0.5,
         })
         out.append(it)
-
-    # intenta sacar una fecha aproximada del HTML global (muy aproximado)
-    txt = soup.get_text(" ", strip=True)
-    m = DATE_PAT.search(txt)
-    if m:
-        d = int(m.group(1))
-        mon = m.group(2)
-        y = int(m.group(3))
-        iso = _to_iso(d, mon, y)
-        for it in out:
-            if not it["fecha_inicio"]:
-                it["fecha_inicio"] = iso
-                it["fecha_fin"] = iso
     return out
 
-def _collect_html(base: str) -> List[Dict[str, Any]]:
+def _collect_html(base: str, budget: Budget = UNLIMITED) -> List[Dict[str, Any]]:
     urls = [
         urljoin(base, "/agenda/"),
         base,
@@ -281,10 +250,13 @@ def _collect_html(base: str) -> List[Dict[str, Any]]:
     bag: List[Dict[str, Any]] = []
     for u in urls:
         try:
-            html = fetch_html(u)
+            html = fetch_html(u, budget)
+            _dump(u, html)
             bag.extend(_html_cards(html, base))
             if bag:
                 break
+        except BudgetExceeded:
+            raise
         except Exception:
             continue
     return bag
@@ -293,45 +265,23 @@ def _collect_html(base: str) -> List[Dict[str, Any]]:
 # entrypoint
 # --------------------------
 
-def collect(cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
+def collect(cfg: Dict[str, Any], budget: Budget = UNLIMITED) -> List[Dict[str, Any]]:
     urls = (cfg.get("urls") or {})
     base = urls.get("base") or DEFAULT_BASE
 
-    # 1) Tribe v1
-    try:
-        items = _collect_tribe_v1(base)
-        if items:
-            return items
-    except Exception:
-        pass
-
-    # 1b) Tribe variantes
-    try:
-        items = _collect_tribe_v1_alt(base)
-        if items:
-            return items
-    except Exception:
-        pass
-
-    # 2) MEC
-    try:
-        items = _collect_mec(base)
-        if items:
-            return items
-    except Exception:
-        pass
-
-    # 3) WP v2 CPT
-    try:
-        items = _collect_wp_v2(base)
-        if items:
-            return items
-    except Exception:
-        pass
-
-    # 4) HTML fallback (agenda / home)
-    try:
-        items = _collect_html(base)
-        return items
-    except Exception:
-        return []
+    # 1) Tribe v1, 1b) Tribe variantes, 2) MEC, 3) WP v2 CPT, 4) HTML (agenda / home).
+    # Todo lo que va detrás de Tribe v1 es fallback: si el plazo va justo no se
+    # prueba y se lanza BudgetExceeded (el colector conserva los items anteriores).
+    strategies = [_collect_tribe_v1, _collect_tribe_v1_alt, _collect_mec, _collect_wp_v2, _collect_html]
+    for i, strategy in enumerate(strategies):
+        if i and budget.low():
+            raise BudgetExceeded(f"plazo justo: se omiten los fallbacks desde {strategy.__name__}")
+        try:
+            items = strategy(base, budget)
+            if items:
+                return items
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            log.debug("[%s] %s: %s", SOURCE_ID, strategy.__name__, e)
+    return []
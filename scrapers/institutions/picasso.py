@@ -3,12 +3,13 @@ from __future__ import annotations
 
 import json
 import re
-from typing import Any, Dict, List, Optional
-
-from bs4 import BeautifulSoup
+from typing import Any, Dict, Iterator, List, Optional
 
+from .. import sitemaps
+from ..budget import UNLIMITED, Budget
+from ..pipeline import fetch_parse
 from ..utils import (
-    fetch_html, clean_text, parse_dd_mm_yyyy_range, epoch_ms_to_iso
+    fetch_html, clean_text, epoch_ms_to_iso, make_soup, extract_dates, page_dates
 )
 
 SOURCE_ID = "picasso"
@@ -16,9 +17,9 @@ BASE = "https://www.museopicassomalaga.org"
 TZ = "Europe/Madrid"
 PLACE = "Museo Picasso Málaga"
 
-def _parse_next_data(html: str) -> Optional[dict]:
+def _parse_next_data(html: str, soup: Any = None) -> Optional[dict]:
     """Extrae el objeto JSON de <script id="__NEXT_DATA__">...</script>."""
-    soup = BeautifulSoup(html, "lxml")
+    soup = soup if soup is not None else make_soup(html)
     tag = soup.find("script", id="__NEXT_DATA__")
     if not tag or not tag.string:
         return None
@@ -51,34 +52,55 @@ def _mk_id(url: str) -> str:
     import hashlib
     return hashlib.md5(url.encode("utf-8")).hexdigest()[:16]
 
-def _collect_expos(list_url: str) -> List[Dict[str, Any]]:
-    html = fetch_html(list_url)
-    soup = BeautifulSoup(html, "lxml")
+def _parse_expo(url: str, raw: bytes) -> tuple:
+    """Detalle de exposición -> (titulo, fecha_inicio, fecha_fin, ocurrencias). Corre en el pool de procesos."""
+    dsoup = make_soup(raw)
+    title = clean_text(dsoup.find("h1").get_text()) if dsoup.find("h1") else None
+
+    # 1) Fechas de la cabecera/bloques de fecha ("dd/mm/yyyy — dd/mm/yyyy", "3 de octubre..."),
+    #    sin escanear toda la página
+    dates = page_dates(dsoup)
+    fi, ff = dates["fecha_inicio"], dates["fecha_fin"]
+    # 2) Si falla, intenta __NEXT_DATA__ (cuando esté)
+    if not (fi and ff):
+        nd = _parse_next_data("", dsoup)
+        if nd:
+            # Algunos detalles podrían ir aquí en el futuro si los exponen en Next
+            pass
+    return title, fi, ff, tuple(dates["ocurrencias"])
+
+def _is_expo(url: str) -> bool:
+    return url.startswith("/exposiciones/") or url.startswith(BASE + "/exposiciones/")
+
+def _expo_links(list_url: str, budget: Budget) -> List[str]:
+    html = fetch_html(list_url, budget)
+    soup = make_soup(html)
     # recoge enlaces a /exposiciones/...
     links = []
     for a in soup.select("a[href]"):
         href = a.get("href", "")
-        if href.startswith("/exposiciones/"):
-            links.append(BASE + href)
-        elif href.startswith(BASE + "/exposiciones/"):
-            links.append(href)
-    links = sorted(set(links))
-
-    items: List[Dict[str, Any]] = []
+        if _is_expo(href):
+            links.append(href if href.startswith("http") else BASE + href)
+    return sorted(set(links))
+
+def _collect_expos(list_url: str, discovery: str = "listing",
+                   budget: Budget = UNLIMITED) -> Iterator[Dict[str, Any]]:
+    planned = None
+    if discovery == "sitemap":
+        planned = sitemaps.plan(BASE, _is_expo, f"{SOURCE_ID}:expos", SOURCE_ID, budget)
+    if planned is None:
+        links, reused = _expo_links(list_url, budget), []
+    else:
+        links, reused = planned.urls, planned.reused
+
+    parsed = fetch_parse(links, _parse_expo, budget=budget)
+    if planned is not None:
+        sitemaps.mark_seen(planned, parsed)
+    yield from reused
     for url in links:
-        dh = fetch_html(url)
-        dsoup = BeautifulSoup(dh, "lxml")
-        title = clean_text(dsoup.find("h1").get_text()) if dsoup.find("h1") else None
-
-        # 1) Intenta rango por patrón "dd/mm/yyyy — dd/mm/yyyy" en la página
-        text = dsoup.get_text(" ", strip=True)
-        fi, ff = parse_dd_mm_yyyy_range(text)
-        # 2) Si falla, intenta __NEXT_DATA__ (cuando esté)
-        if not (fi and ff):
-            nd = _parse_next_data(dh)
-            if nd:
-                # Algunos detalles podrían ir aquí en el futuro si los exponen en Next
-                pass
+        if url not in parsed:
+            continue
+        title, fi, ff, ocurrencias = parsed[url]
 
         item = _item_proto()
         item.update({
@@ -88,13 +110,12 @@ def _collect_expos(list_url: str) -> List[Dict[str, Any]]:
             "titulo": title or "",
             "fecha_inicio": fi,
             "fecha_fin": ff,
+            "ocurrencias": list(ocurrencias),
             "imagen_url": None,
         })
-        items.append(item)
-
-    return items
+        yield item
 
-def _collect_activities(list_url: str) -> List[Dict[str, Any]]:
+def _collect_activities(list_url: str, budget: Budget = UNLIMITED) -> List[Dict[str, Any]]:
     """
     La página /actividades es Next.js y expone todo en __NEXT_DATA__:
     - pageProps.featuredActivities -> lista de dicts
@@ -102,7 +123,7 @@ def _collect_activities(list_url: str) -> List[Dict[str, Any]]:
     Campos que nos interesan: title, slug (para URL), start_date/end_date (epoch ms), dates_literal,
     main_type.title (categoría humana), thumbnail.url (imagen).
     """
-    html = fetch_html(list_url)
+    html = fetch_html(list_url, budget)
     nd = _parse_next_data(html)
     items: List[Dict[str, Any]] = []
     if not nd:
@@ -129,6 +150,11 @@ def _collect_activities(list_url: str) -> List[Dict[str, Any]]:
 
         fi = epoch_ms_to_iso(obj.get("start_date"))
         ff = epoch_ms_to_iso(obj.get("end_date"))
+        # dates_literal ("3, 4 y 5 de octubre, 19:00h") aporta ocurrencias y
+        # cubre las actividades sin start_date
+        lit = extract_dates(clean_text(obj.get("dates_literal")))
+        fi = fi or lit["fecha_inicio"]
+        ff = ff or lit["fecha_fin"] or fi
         img = (obj.get("thumbnail", {}) or {}).get("url") or None
 
         item = _item_proto()
@@ -139,6 +165,7 @@ def _collect_activities(list_url: str) -> List[Dict[str, Any]]:
             "titulo": t or "",
             "fecha_inicio": fi,
             "fecha_fin": ff,
+            "ocurrencias": lit["ocurrencias"],
             "imagen_url": img,
         })
         items.append(item)
@@ -156,13 +183,14 @@ def _collect_activities(list_url: str) -> List[Dict[str, Any]]:
 
     return items
 
-def collect(cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
+def iter_collect(cfg: Dict[str, Any], budget: Budget = UNLIMITED) -> Iterator[Dict[str, Any]]:
     sections = (cfg.get("sections") or {})
     urls = (cfg.get("urls") or {})
 
-    out: List[Dict[str, Any]] = []
     if sections.get("expos"):
-        out.extend(_collect_expos(urls.get("expos_list")))
+        yield from _collect_expos(urls.get("expos_list"), cfg.get("discovery") or "listing", budget)
     if sections.get("activities"):
-        out.extend(_collect_activities(urls.get("activities_list")))
-    return out
+        yield from _collect_activities(urls.get("activities_list"), budget)
+
+def collect(cfg: Dict[str, Any], budget: Budget = UNLIMITED) -> List[Dict[str, Any]]:
+    return list(iter_collect(cfg, budget))
@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
-from typing import Any, Dict, List
-from bs4 import BeautifulSoup
-
-from ..utils import fetch_html, clean_text
+from typing import Any, Dict, Iterator, List
+from .. import sitemaps
+from ..budget import UNLIMITED, Budget
+from ..pipeline import fetch_parse
+from ..utils import fetch_html, clean_text, make_soup, page_dates
 
 SOURCE_ID = "pompidou"
 BASE = "https://centrepompidou-malaga.eu"
@@ -34,16 +35,26 @@ def _mk_id(url: str) -> str:
     import hashlib
     return hashlib.md5(url.encode("utf-8")).hexdigest()[:16]
 
-def _collect_list(list_url: str, cat: str) -> List[Dict[str, Any]]:
-    html = fetch_html(list_url)
-    soup = BeautifulSoup(html, "lxml")
-    links = []
-    for a in soup.select("a[href]"):
-        href = a.get("href", "")
-        if cat == "exposicion" and "/exposicion/" in href:
-            links.append(href)
-        if cat == "actividad" and "/event/" in href:
-            links.append(href)
+def _parse_detail(url: str, raw: bytes) -> tuple:
+    """Página de detalle -> (titulo, imagen, fecha_inicio, fecha_fin, ocurrencias). Corre en el pool de procesos."""
+    dsoup = make_soup(raw)
+    title = clean_text(dsoup.find("h1").get_text()) if dsoup.find("h1") else ""
+    img = None
+    og = dsoup.find("meta", attrs={"property": "og:image"})
+    if og:
+        img = og.get("content")
+    dates = page_dates(dsoup)
+    return title, img, dates["fecha_inicio"], dates["fecha_fin"], tuple(dates["ocurrencias"])
+
+MATCH = {
+    "exposicion": lambda href: "/exposicion/" in href,
+    "actividad": lambda href: "/event/" in href,
+}
+
+def _list_links(list_url: str, cat: str, budget: Budget) -> List[str]:
+    html = fetch_html(list_url, budget)
+    soup = make_soup(html)
+    links = [a.get("href", "") for a in soup.select("a[href]") if MATCH[cat](a.get("href", ""))]
     # absolutiza y dedupe
     full = []
     for href in links:
@@ -51,17 +62,26 @@ def _collect_list(list_url: str, cat: str) -> List[Dict[str, Any]]:
             full.append(href)
         else:
             full.append(BASE + ("" if href.startswith("/") else "/") + href)
-    full = sorted(set(full))
+    return sorted(set(full))
 
-    items: List[Dict[str, Any]] = []
+def _collect_list(list_url: str, cat: str, discovery: str = "listing",
+                  budget: Budget = UNLIMITED) -> Iterator[Dict[str, Any]]:
+    planned = None
+    if discovery == "sitemap":
+        planned = sitemaps.plan(BASE, MATCH[cat], f"{SOURCE_ID}:{cat}", SOURCE_ID, budget)
+    if planned is None:
+        full, reused = _list_links(list_url, cat, budget), []
+    else:
+        full, reused = planned.urls, planned.reused
+
+    parsed = fetch_parse(full, _parse_detail, budget=budget)
+    if planned is not None:
+        sitemaps.mark_seen(planned, parsed)
+    yield from reused
     for url in full:
-        dh = fetch_html(url)
-        dsoup = BeautifulSoup(dh, "lxml")
-        title = clean_text(dsoup.find("h1").get_text()) if dsoup.find("h1") else ""
-        img = None
-        og = dsoup.find("meta", attrs={"property": "og:image"})
-        if og:
-            img = og.get("content")
+        if url not in parsed:
+            continue
+        title, img, fi, ff, ocurrencias = parsed[url]
 
         it = _item_proto()
         it.update({
@@ -69,17 +89,21 @@ def _collect_list(list_url: str, cat: str) -> List[Dict[str, Any]]:
             "source_url": url,
             "categoria": "exposicion" if "/exposicion/" in url else "actividad",
             "titulo": title,
+            "fecha_inicio": fi,
+            "fecha_fin": ff,
+            "ocurrencias": list(ocurrencias),
             "imagen_url": img,
         })
-        items.append(it)
-    return items
+        yield it
 
-def collect(cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
+def iter_collect(cfg: Dict[str, Any], budget: Budget = UNLIMITED) -> Iterator[Dict[str, Any]]:
     sections = (cfg.get("sections") or {})
     urls = (cfg.get("urls") or {})
-    out: List[Dict[str, Any]] = []
+    discovery = cfg.get("discovery") or "listing"
     if sections.get("expos"):
-        out.extend(_collect_list(urls.get("expos_list"), "exposicion"))
+        yield from _collect_list(urls.get("expos_list"), "exposicion", discovery, budget)
     if sections.get("activities"):
-        out.extend(_collect_list(urls.get("activities_list"), "actividad"))
-    return out
+        yield from _collect_list(urls.get("activities_list"), "actividad", discovery, budget)
+
+def collect(cfg: Dict[str, Any], budget: Budget = UNLIMITED) -> List[Dict[str, Any]]:
+    return list(iter_collect(cfg, budget))
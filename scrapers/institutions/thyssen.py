@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
-from typing import Any, Dict, List
-from bs4 import BeautifulSoup
-
-from ..utils import fetch_html, clean_text
+from typing import Any, Dict, Iterator, List
+from .. import sitemaps
+from ..budget import UNLIMITED, Budget
+from ..pipeline import fetch_parse
+from ..utils import fetch_html, clean_text, make_soup, page_dates
 
 SOURCE_ID = "thyssen"
 BASE = "https://www.carmenthyssenmalaga.org"
@@ -34,33 +35,52 @@ def _mk_id(url: str) -> str:
     import hashlib
     return hashlib.md5(url.encode("utf-8")).hexdigest()[:16]
 
-def _collect_cards(list_url: str, kind: str) -> List[Dict[str, Any]]:
-    html = fetch_html(list_url)
-    soup = BeautifulSoup(html, "lxml")
-    links = []
-    for a in soup.select("a[href]"):
-        href = a.get("href", "")
-        if kind == "expos" and "/exposicion/" in href:
-            links.append(href)
-        if kind == "acts" and ("/actividad/" in href or "/actividades/" in href):
-            links.append(href)
+def _parse_detail(url: str, raw: bytes) -> tuple:
+    """Página de detalle -> (titulo, imagen, fecha_inicio, fecha_fin, ocurrencias). Corre en el pool de procesos."""
+    dsoup = make_soup(raw)
+    title = clean_text(dsoup.find("h1").get_text()) if dsoup.find("h1") else ""
+    img = None
+    og = dsoup.find("meta", attrs={"property": "og:image"})
+    if og:
+        img = og.get("content")
+    dates = page_dates(dsoup)
+    return title, img, dates["fecha_inicio"], dates["fecha_fin"], tuple(dates["ocurrencias"])
+
+MATCH = {
+    "expos": lambda href: "/exposicion/" in href,
+    "acts": lambda href: "/actividad/" in href or "/actividades/" in href,
+}
+
+def _list_links(list_url: str, kind: str, budget: Budget) -> List[str]:
+    html = fetch_html(list_url, budget)
+    soup = make_soup(html)
+    links = [a.get("href", "") for a in soup.select("a[href]") if MATCH[kind](a.get("href", ""))]
     full = []
     for href in links:
         if href.startswith("http"):
             full.append(href)
         else:
             full.append(BASE + ("" if href.startswith("/") else "/") + href)
-    full = sorted(set(full))
+    return sorted(set(full))
 
-    out: List[Dict[str, Any]] = []
+def _collect_cards(list_url: str, kind: str, discovery: str = "listing",
+                   budget: Budget = UNLIMITED) -> Iterator[Dict[str, Any]]:
+    planned = None
+    if discovery == "sitemap":
+        planned = sitemaps.plan(BASE, MATCH[kind], f"{SOURCE_ID}:{kind}", SOURCE_ID, budget)
+    if planned is None:
+        full, reused = _list_links(list_url, kind, budget), []
+    else:
+        full, reused = planned.urls, planned.reused
+
+    parsed = fetch_parse(full, _parse_detail, budget=budget)
+    if planned is not None:
+        sitemaps.mark_seen(planned, parsed)
+    yield from reused
     for url in full:
-        dh = fetch_html(url)
-        dsoup = BeautifulSoup(dh, "lxml")
-        title = clean_text(dsoup.find("h1").get_text()) if dsoup.find("h1") else ""
-        img = None
-        og = dsoup.find("meta", attrs={"property": "og:image"})
-        if og:
-            img = og.get("content")
+        if url not in parsed:
+            continue
+        title, img, fi, ff, ocurrencias = parsed[url]
 
         it = _item_proto()
         it.update({
@@ -68,17 +88,21 @@ def _collect_cards(list_url: str, kind: str) -> List[Dict[str, Any]]:
             "source_url": url,
             "categoria": "exposicion" if "/exposicion/" in url else "actividad",
             "titulo": title,
+            "fecha_inicio": fi,
+            "fecha_fin": ff,
+            "ocurrencias": list(ocurrencias),
             "imagen_url": img,
         })
-        out.append(it)
-    return out
+        yield it
 
-def collect(cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
+def iter_collect(cfg: Dict[str, Any], budget: Budget = UNLIMITED) -> Iterator[Dict[str, Any]]:
     sections = (cfg.get("sections") or {})
     urls = (cfg.get("urls") or {})
-    out: List[Dict[str, Any]] = []
+    discovery = cfg.get("discovery") or "listing"
     if sections.get("expos"):
-        out.extend(_collect_cards(urls.get("expos_list"), "expos"))
+        yield from _collect_cards(urls.get("expos_list"), "expos", discovery, budget)
     if sections.get("activities"):
-        out.extend(_collect_cards(urls.get("activities_list"), "acts"))
-    return out
+        yield from _collect_cards(urls.get("activities_list"), "acts", discovery, budget)
+
+def collect(cfg: Dict[str, Any], budget: Budget = UNLIMITED) -> List[Dict[str, Any]]:
+    return list(iter_collect(cfg, budget))
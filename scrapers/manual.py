@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Fuentes locales del colector: data/manual_events.csv y data/curated.json.
+
+Se normalizan al mismo esquema que los scrapers, con validación e `id`
+estable (`base.make_id`), y se mezclan en el catálogo antes del dedupe:
+un evento manual con la misma `source_url` que uno recolectado lo sustituye.
+Cada evento lleva `origen` ("manual" | "curated") aunque su `source_id` sea
+el de una institución.
+
+curated.json acepta una lista de eventos o {"events": [...]}, con las
+mismas columnas que el CSV.
+"""
+from __future__ import annotations
+
+import os
+import csv
+import json
+import logging
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+from .base import make_id
+from .utils import clean_text
+
+log = logging.getLogger(__name__)
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+MANUAL = os.path.join(DATA_DIR, "manual_events.csv")
+CURATED = os.path.join(DATA_DIR, "curated.json")
+
+TZ = "Europe/Madrid"
+CATEGORIES = ("exposicion", "actividad")
+# columnas opcionales que se conservan tal cual si vienen rellenas
+EXTRA = ("hora_texto", "direccion", "venta_entradas_url", "precio_min",
+         "precio_max", "moneda", "rrule_ical")
+
+# columnas de texto: en JSON tienen que venir como cadena (o vacías)
+TEXT = ("titulo", "descripcion", "lugar", "source_id", "source_url", "categoria",
+        "imagen_url", "fecha_inicio", "fecha_fin")
+
+def _bad_types(row: Dict[str, Any]) -> List[str]:
+    bad = [k for k in TEXT if row.get(k) is not None and not isinstance(row[k], str)]
+    bad += [k for k in EXTRA if row.get(k) is not None and not isinstance(row[k], (str, int, float))]
+    bad += [k for k in ("ocurrencias", "tags")
+            if row.get(k) is not None and not isinstance(row[k], (str, list))]
+    return bad
+
+def _date(v: Any) -> Optional[str]:
+    v = clean_text(str(v)) if v is not None else ""
+    if not v:
+        return None
+    try:
+        return date.fromisoformat(v[:10]).isoformat()
+    except ValueError:
+        return None
+
+def _list(v: Any) -> List[str]:
+    if isinstance(v, list):
+        return [clean_text(str(x)) for x in v if clean_text(str(x))]
+    return [clean_text(x) for x in str(v or "").split(";") if clean_text(x)]
+
+def normalize(row: Dict[str, Any], default_source: str, where: str) -> Optional[Dict[str, Any]]:
+    """Fila CSV/JSON -> evento del catálogo; None si no es válida."""
+    bad = _bad_types(row)
+    if bad:
+        log.warning("[%s] %s: tipo no válido en %s, se descarta", default_source, where, ", ".join(bad))
+        return None
+    titulo = clean_text(row.get("titulo"))
+    if not titulo:
+        log.warning("[%s] %s: sin titulo, se descarta", default_source, where)
+        return None
+
+    fi = _date(row.get("fecha_inicio"))
+    ff = _date(row.get("fecha_fin")) or fi
+    if row.get("fecha_inicio") and not fi:
+        log.warning("[%s] %s: fecha_inicio no válida %r", default_source, where, row.get("fecha_inicio"))
+    if fi and ff and ff < fi:
+        log.warning("[%s] %s: fecha_fin anterior a fecha_inicio", default_source, where)
+        ff = fi
+
+    categoria = clean_text(row.get("categoria")).lower() or "actividad"
+    if categoria not in CATEGORIES:
+        log.warning("[%s] %s: categoria desconocida %r", default_source, where, categoria)
+
+    ocurrencias = [d for d in _list(row.get("ocurrencias")) if d]
+    it: Dict[str, Any] = {
+        "id": None,
+        "source_id": clean_text(row.get("source_id")) or default_source,
+        "source_url": clean_text(row.get("source_url")) or None,
+        "categoria": categoria,
+        "titulo": titulo,
+        "descripcion": clean_text(row.get("descripcion")),
+        "fecha_inicio": fi,
+        "fecha_fin": ff,
+        "ocurrencias": ocurrencias,
+        "all_day": not any("T" in d for d in ocurrencias),
+        "lugar": clean_text(row.get("lugar")),
+        "imagen_url": clean_text(row.get("imagen_url")) or None,
+        "timezone": TZ,
+        "status": "activo",
+        "parse_confidence": 1.0,
+        "origen": default_source,  # el colector no los arrastra del catálogo previo
+    }
+    for k in EXTRA:
+        v = clean_text(str(row.get(k) or ""))
+        if v:
+            it[k] = v
+    tags = _list(row.get("tags"))
+    if tags:
+        it["tags"] = tags
+    it["id"] = make_id(it)
+    return it
+
+def _normalize_all(rows: Iterable[Dict[str, Any]], source: str, label: str,
+                   start: int = 0) -> List[Dict[str, Any]]:
+    out = []
+    for n, row in enumerate(rows, start):
+        it = normalize(row, source, f"{label}:{n}")
+        if it:
+            out.append(it)
+    return out
+
+def collect_manual(path: str = MANUAL) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    # fila a fila a propósito: son decenas de filas editadas a mano, cada una
+    # se valida y avisa con su número de línea, y el colector no depende de pandas
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        # línea 1 = cabecera
+        items = _normalize_all(csv.DictReader(f), "manual", os.path.basename(path), start=2)
+    log.info("[manual] total -> %d", len(items))
+    return items
+
+def collect_curated(path: str = CURATED) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+    except ValueError as e:
+        log.error("[curated] JSON no válido: %s", e)
+        return []
+    rows = doc.get("events", []) if isinstance(doc, dict) else doc
+    items = _normalize_all([r for r in rows or [] if isinstance(r, dict)], "curated",
+                           os.path.basename(path))
+    log.info("[curated] total -> %d", len(items))
+    return items
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Pipeline de dos etapas para páginas de detalle:
+
+    urls -> [hilos: fetch] -> cola acotada -> [procesos: parse] -> resultados
+
+El parseo con BeautifulSoup es CPU y retiene el GIL, así que sólo con hilos
+se atasca en cuanto hay muchas páginas. Aquí la descarga va en hilos (I/O)
+y el parseo en un pool de procesos que recibe los bytes crudos y devuelve
+tuplas compactas. Las colas acotadas dan backpressure: si el parseo va
+lento, los hilos de descarga se bloquean en vez de acumular páginas.
+
+`parse(url, raw)` debe ser una función de módulo (picklable) que devuelva
+algo pequeño (tupla/None). Con `parse_workers=0` se parsea en el propio
+proceso (útil para depurar o para lotes pequeños). Si el pool se rompe o
+ya está cerrado, lo pendiente (incluido lo ya enviado) se parsea aquí.
+
+Con `budget` las descargas usan su timeout y, cuando el plazo va justo
+(`budget.low()`), no se empiezan más: se termina lo que está en vuelo y se
+lanza `BudgetExceeded`, para que el colector conserve los items anteriores
+del feed en vez de publicarlo a medias.
+"""
+from __future__ import annotations
+
+import os
+import queue
+import atexit
+import logging
+import threading
+import functools
+# BrokenExecutor (base de BrokenProcessPool) no arrastra multiprocessing: el
+# pool se importa al crearlo, no al importar un scraper
+from concurrent.futures import BrokenExecutor, CancelledError
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+from .budget import UNLIMITED, Budget, BudgetExceeded
+from .utils import fetch_bytes
+
+log = logging.getLogger(__name__)
+
+FETCH_WORKERS = int(os.environ.get("FETCH_WORKERS", "8"))
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", str(os.cpu_count() or 1)))
+QUEUE_SIZE = 16
+# por debajo de esto no compensa mandar el parseo a otro proceso
+MIN_BATCH_FOR_PROCESSES = 3
+
+_DONE = object()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    """
+    Pool de procesos compartido (se reutiliza entre feeds y en el daemon).
+    Se dimensiona una vez con PARSE_WORKERS; cada llamada limita cuántas
+    páginas tiene en vuelo, no el tamaño del pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # forkserver/spawn: no se hace fork con hilos de descarga vivos
+            methods = multiprocessing.get_all_start_methods()
+            ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool = ProcessPoolExecutor(max_workers=max(1, PARSE_WORKERS), mp_context=ctx)
+        return _pool
+
+def _drop_pool(broken: ProcessPoolExecutor):
+    """Descarta el pool roto (si otro hilo no lo ha sustituido ya)."""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+def fetch_parse(
+    urls: Iterable[str],
+    parse: Callable[[str, bytes], Any],
+    fetch: Optional[Callable[[str], bytes]] = None,
+    fetch_workers: int = FETCH_WORKERS,
+    parse_workers: Optional[int] = None,
+    queue_size: int = QUEUE_SIZE,
+    budget: Budget = UNLIMITED,
+) -> Dict[str, Any]:
+    """
+    Descarga y parsea `urls`. Devuelve {url: resultado de parse}; las URLs
+    que fallan (descarga o parseo) se registran en el log y se omiten. Si
+    alguna no cabe en `budget`, lanza BudgetExceeded. `fetch` es
+    `utils.fetch_bytes` con `budget`.
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+    fetch = fetch or functools.partial(fetch_bytes, budget=budget)
+    if parse_workers is None:
+        parse_workers = PARSE_WORKERS if len(urls) >= MIN_BATCH_FOR_PROCESSES else 0
+    parse_workers = min(parse_workers, PARSE_WORKERS, len(urls))
+    fetch_workers = max(1, min(fetch_workers, len(urls)))
+
+    todo: "queue.Queue[Any]" = queue.Queue()
+    for u in urls:
+        todo.put(u)
+    fetched: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+    skipped = []
+
+    def fetcher():
+        while True:
+            try:
+                u = todo.get_nowait()
+            except queue.Empty:
+                break
+            if budget.low():
+                skipped.append(u)
+                continue
+            try:
+                raw = fetch(u)
+            except BudgetExceeded:
+                skipped.append(u)
+                continue
+            except Exception as e:
+                log.warning("fetch %s: %s", u, e)
+                continue
+            fetched.put((u, raw))  # bloquea si el parseo va por detrás
+        fetched.put(_DONE)
+
+    threads = [threading.Thread(target=fetcher, daemon=True) for _ in range(fetch_workers)]
+    pool = _get_pool() if parse_workers > 0 else None
+    for t in threads:
+        t.start()
+
+    results: Dict[str, Any] = {}
+    inflight: List[Tuple[str, bytes, Any]] = []
+    # como mucho `parse_workers` páginas en el pool a la vez
+    slots = threading.BoundedSemaphore(max(1, parse_workers))
+
+    def parse_here(u: str, raw: bytes):
+        try:
+            results[u] = parse(u, raw)
+        except Exception as e:
+            log.warning("parse %s: %s", u, e)
+
+    def pool_failed(e: BaseException):
+        # el pool se rompió o lo cerró otro hilo: lo que quede se parsea aquí
+        nonlocal pool
+        if pool is not None:
+            log.error("process pool no disponible, parseo en proceso: %s", e)
+            if isinstance(e, BrokenExecutor):
+                _drop_pool(pool)
+            pool = None
+
+    def collect_one(u: str, raw: bytes, fut: Any):
+        try:
+            results[u] = fut.result()
+        except (BrokenExecutor, CancelledError) as e:
+            pool_failed(e)
+            parse_here(u, raw)
+        except Exception as e:
+            log.warning("parse %s: %s", u, e)
+
+    def collect_done():
+        pending = []
+        for entry in inflight:
+            if entry[2].done():
+                collect_one(*entry)
+            else:
+                pending.append(entry)
+        inflight[:] = pending
+
+    finished = 0
+    while finished < len(threads):
+        item = fetched.get()
+        if item is _DONE:
+            finished += 1
+            continue
+        u, raw = item
+        if pool is None:
+            parse_here(u, raw)
+            continue
+        slots.acquire()
+        try:
+            fut = pool.submit(parse, u, raw)
+        except (BrokenExecutor, RuntimeError) as e:
+            # RuntimeError: "cannot schedule new futures after shutdown"
+            slots.release()
+            pool_failed(e)
+            parse_here(u, raw)
+            continue
+        fut.add_done_callback(lambda _f: slots.release())
+        inflight.append((u, raw, fut))
+        collect_done()  # libera los bytes de lo ya parseado
+
+    for entry in inflight:
+        collect_one(*entry)
+    for t in threads:
+        t.join()
+    if skipped:
+        raise BudgetExceeded(f"plazo justo: {len(skipped)} de {len(urls)} páginas de detalle sin descargar")
+    return results
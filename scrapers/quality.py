@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+Validación y puntuación de calidad del catálogo antes de publicarlo.
+
+Comprobaciones por evento (peso en la puntuación):
+
+    dates    fecha_inicio presente             0.35
+    ordered  fecha_fin >= fecha_inicio          0.15
+    url      source_url con forma http(s)://    0.15
+    title    título no vacío                    0.25
+    image    imagen_url / imagen_local          0.10
+
+`dates` y `title` son obligatorias: un evento que falla cualquiera de las
+dos queda por debajo de `min_score` sea cual sea su puntuación.
+
+Las comprobaciones recorren el lote por columnas (se extraen una vez y cada
+comprobación es una pasada en Python sobre la suya; no hay numpy) y, con
+lotes grandes, por trozos en un pool de procesos (forkserver/spawn, como
+`pipeline`). Cada evento recibe `quality` (0–1) y `quality_issues`
+(comprobaciones que falla).
+
+No se usa pandas: no está en requirements.txt del colector, importarlo cuesta
+~0,3 s y con 200k filas las comprobaciones vectorizadas sólo ganan ~0,2 s
+(0,37 frente a 0,59 s, sin contar construir el DataFrame). No compensa hasta
+varios cientos de miles de filas y el catálogo tiene unos miles.
+
+Además:
+
+- data/metrics.json: por fuente, filas, puntuación media, % que pasa cada
+  comprobación y cuántos son de baja calidad.
+- data/quality_index.json: ids de baja calidad; la app los quita
+  de golpe (`isin`) en lugar de mirar la puntuación fila a fila.
+
+`quality.min_score` en config/feeds.yaml (por defecto 0.5).
+"""
+from __future__ import annotations
+
+import os
+import re
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional
+
+from scrapers.base import now_iso
+
+log = logging.getLogger(__name__)
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+METRICS = os.path.join(DATA_DIR, "metrics.json")
+INDEX = os.path.join(DATA_DIR, "quality_index.json")
+
+MIN_SCORE = 0.5
+WEIGHTS = {"dates": 0.35, "ordered": 0.15, "url": 0.15, "title": 0.25, "image": 0.10}
+# sin fecha o sin título el evento no se muestra, aunque sume lo suficiente
+REQUIRED = ("dates", "title")
+COLUMNS = ("id", "source_id", "titulo", "source_url", "fecha_inicio", "fecha_fin",
+           "imagen_url", "imagen_local")
+# filas por trozo cuando se reparte en procesos; por debajo de dos trozos no compensa
+CHUNK = 50000
+WORKERS = int(os.environ.get("PARSE_WORKERS", str(os.cpu_count() or 1)))
+
+_URL_RE = re.compile(r"https?://[^\s/?#]+\.[^\s/?#]+(?:[/?#]\S*)?", re.I)
+
+def _day(v: Any) -> Optional[str]:
+    if not isinstance(v, str) or not v:
+        return None
+    try:
+        return date.fromisoformat(v[:10]).isoformat()
+    except ValueError:
+        return None
+
+def columns(items) -> Dict[str, List[Any]]:
+    """Las columnas que miran las comprobaciones, en una pasada."""
+    cols: Dict[str, List[Any]] = {c: [] for c in COLUMNS}
+    appends = [(c, cols[c].append) for c in COLUMNS]
+    for it in items:
+        for c, append in appends:
+            append(it.get(c))
+    return cols
+
+def check(cols: Dict[str, List[Any]]) -> Dict[str, List[bool]]:
+    """Resultado de cada comprobación, columna a columna."""
+    fi = list(map(_day, cols["fecha_inicio"]))
+    ff = list(map(_day, cols["fecha_fin"]))
+    url_ok = _URL_RE.fullmatch
+    return {
+        "dates": [d is not None for d in fi],
+        "ordered": [a is not None and (b is None or b >= a) for a, b in zip(fi, ff)],
+        "url": [isinstance(u, str) and url_ok(u.strip()) is not None for u in cols["source_url"]],
+        "title": [isinstance(t, str) and bool(t.strip()) for t in cols["titulo"]],
+        "image": [bool(a) or bool(b) for a, b in zip(cols["imagen_url"], cols["imagen_local"])],
+    }
+
+def score(checks: Dict[str, List[bool]]) -> List[float]:
+    names = list(checks)
+    weights = [WEIGHTS[name] for name in names]
+    return [round(sum(w for w, p in zip(weights, row) if p), 2)
+            for row in zip(*(checks[name] for name in names))]
+
+def low(checks: Dict[str, List[bool]], scores: List[float], min_score: float) -> List[bool]:
+    """Eventos de baja calidad: bajo `min_score` o sin alguna comprobación de REQUIRED."""
+    required = [checks[name] for name in REQUIRED if name in checks]
+    return [s < min_score or not all(req) for s, *req in zip(scores, *required)]
+
+def _slice(cols: Dict[str, List[Any]], a: int, b: int) -> Dict[str, List[Any]]:
+    return {c: v[a:b] for c, v in cols.items() if c != "id" and c != "source_id"}
+
+def evaluate(cols: Dict[str, List[Any]], workers: int = WORKERS) -> Dict[str, List[bool]]:
+    """`check` sobre todo el lote; por trozos en procesos si es grande."""
+    n = len(cols["id"])
+    if workers <= 1 or n < 2 * CHUNK:
+        return check(cols)
+    parts = [_slice(cols, a, a + CHUNK) for a in range(0, n, CHUNK)]
+    out: Dict[str, List[bool]] = {name: [] for name in WEIGHTS}
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(parts)), mp_context=ctx) as pool:
+        for res in pool.map(check, parts):  # map conserva el orden de los trozos
+            for name, vals in res.items():
+                out[name].extend(vals)
+    return out
+
+def source_stats(sources: List[Any], checks: Dict[str, List[bool]], scores: List[float],
+                 is_low: List[bool]) -> Dict[str, Dict[str, Any]]:
+    acc: Dict[str, Dict[str, Any]] = {}
+    names = list(checks)
+    for i, sid in enumerate(sources):
+        s = acc.setdefault(sid or "otros", {"rows": 0, "score_sum": 0.0, "low": 0,
+                                             "passed": dict.fromkeys(names, 0)})
+        s["rows"] += 1
+        s["score_sum"] += scores[i]
+        s["low"] += is_low[i]
+        for name in names:
+            s["passed"][name] += checks[name][i]
+    out = {}
+    for sid, s in sorted(acc.items()):
+        n = s["rows"]
+        out[sid] = {
+            "rows": n,
+            "quality_mean": round(s["score_sum"] / n, 3),
+            "low_confidence": s["low"],
+            "checks": {name: round(s["passed"][name] / n, 3) for name in names},
+        }
+    return out
+
+def _write_json(path: str, doc: Dict[str, Any]):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+def _iter_lines(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def annotate_file(path: str, min_score: float = MIN_SCORE, workers: int = WORKERS,
+                  metrics: str = METRICS, index: str = INDEX) -> Dict[str, Dict[str, Any]]:
+    """
+    Puntúa el catálogo en `path` y lo reescribe en streaming con `quality` y
+    `quality_issues`; escribe metrics.json y quality_index.json. Devuelve
+    las estadísticas por fuente.
+    """
+    cols = columns(_iter_lines(path))
+    checks = evaluate(cols, workers)
+    scores = score(checks)
+    is_low = low(checks, scores, min_score)
+    names = list(checks)
+
+    tmp = path + ".quality"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for i, it in enumerate(_iter_lines(path)):
+            it["quality"] = scores[i]
+            it["quality_issues"] = [name for name in names if not checks[name][i]]
+            f.write(json.dumps(it, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+    stats = source_stats(cols["source_id"], checks, scores, is_low)
+    _write_json(metrics, {"run_at": now_iso(), "rows": len(scores), "min_score": min_score,
+                          "sources": stats})
+    _write_json(index, {"min_score": min_score,
+                        "low": sorted(i for i, bad in zip(cols["id"], is_low) if i and bad)})
+    return stats
+
+def load_low(path: str = INDEX) -> List[str]:
+    """Ids de baja calidad en la última publicación ([] si no hay índice)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("low", [])
+    except (OSError, ValueError):
+        return []
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Calidad del catálogo por fuente")
+    ap.add_argument("--metrics", default=METRICS)
+    args = ap.parse_args()
+    try:
+        with open(args.metrics, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+    except (OSError, ValueError):
+        raise SystemExit(f"sin métricas en {args.metrics}; ejecuta el colector")
+    print(f"{doc['rows']} eventos, min_score {doc['min_score']} ({doc['run_at']})")
+    names = list(WEIGHTS)
+    print(f"{'fuente':<12} {'filas':>6} {'media':>6} {'bajas':>6} " + " ".join(f"{n:>8}" for n in names))
+    for sid, s in doc["sources"].items():
+        print(f"{sid:<12} {s['rows']:>6} {s['quality_mean']:>6.2f} {s['low_confidence']:>6} "
+              + " ".join(f"{s['checks'].get(n, 0):>8.0%}" for n in names))
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Rangos rápidos de la app precalculados en el colector (data/quick_ranges.json).
+
+Para cada preset ("Hoy", "Mañana", "Próximos 7 días", "Este mes", "Todo") y
+cada categoría (más "*" = todas) se guarda la lista de ids ordenada por
+fecha_inicio, relativa a la fecha de la ejecución:
+
+    {"run_date": "2025-09-07", "presets": {"Hoy": {"*": [...], "actividad": [...]}}}
+
+La app sirve esas listas directamente si `run_date` es hoy; para rangos
+personalizados (o un índice de otro día) filtra en vivo con `overlaps`.
+"""
+from __future__ import annotations
+
+import os
+import json
+import calendar
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+INDEX = os.path.join(DATA_DIR, "quick_ranges.json")
+
+PRESETS = ["Hoy", "Mañana", "Próximos 7 días", "Este mes", "Todo"]
+ALL = "*"
+
+def preset_range(name: str, today: date) -> Optional[Tuple[date, date]]:
+    """(desde, hasta) del preset; None para "Todo" (sin filtro de fechas)."""
+    if name == "Hoy":
+        return today, today
+    if name == "Mañana":
+        d = today + timedelta(days=1)
+        return d, d
+    if name == "Próximos 7 días":
+        return today, today + timedelta(days=7)
+    if name == "Este mes":
+        last = calendar.monthrange(today.year, today.month)[1]
+        return date(today.year, today.month, 1), date(today.year, today.month, last)
+    if name == "Todo":
+        return None
+    raise ValueError(f"preset desconocido: {name}")
+
+def _to_date(v: Any) -> Optional[date]:
+    if not isinstance(v, str) or not v:
+        return None
+    try:
+        return date.fromisoformat(v[:10])
+    except ValueError:
+        return None
+
+def overlaps(fi: Any, ff: Any, start: date, end: date) -> bool:
+    """El evento [fi, ff] (ff = fi si falta) solapa con [start, end]."""
+    a = _to_date(fi)
+    if a is None:
+        return False
+    b = _to_date(ff) or a
+    return not (b < start or a > end)
+
+def _sort_key(it: Dict[str, Any]):
+    fi = it.get("fecha_inicio")
+    # sin fecha al final
+    return (0, fi, it.get("id") or "") if isinstance(fi, str) and fi else (1, "", it.get("id") or "")
+
+def build(items: List[Dict[str, Any]], today: Optional[date] = None) -> Dict[str, Any]:
+    today = today or date.today()
+    ordered = sorted((it for it in items if it.get("id")), key=_sort_key)
+    presets: Dict[str, Dict[str, List[str]]] = {}
+    for name in PRESETS:
+        rng = preset_range(name, today)
+        lists: Dict[str, List[str]] = {ALL: []}
+        for it in ordered:
+            cat = it.get("categoria")
+            if not cat:
+                # la app sólo muestra eventos con categoría
+                continue
+            if rng and not overlaps(it.get("fecha_inicio"), it.get("fecha_fin"), *rng):
+                continue
+            lists[ALL].append(it["id"])
+            lists.setdefault(cat, []).append(it["id"])
+        presets[name] = lists
+    return {"run_date": today.isoformat(), "presets": presets}
+
+def write(items: List[Dict[str, Any]], path: str = INDEX, today: Optional[date] = None):
+    doc = build(items, today)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    return doc
+
+def load(path: str = INDEX) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def lookup(index: Optional[Dict[str, Any]], preset: str, cats: List[str],
+           all_cats: List[str], today: date) -> Optional[List[str]]:
+    """
+    Ids precalculados para `preset` y las categorías elegidas, en orden.
+    None si el índice no sirve (no existe, es de otro día o falta el preset).
+    """
+    if not index or index.get("run_date") != today.isoformat():
+        return None
+    lists = (index.get("presets") or {}).get(preset)
+    if lists is None:
+        return None
+    if set(cats) >= set(all_cats):
+        return list(lists.get(ALL, []))
+    wanted = set()
+    for c in cats:
+        wanted.update(lists.get(c, []))
+    return [i for i in lists.get(ALL, []) if i in wanted]
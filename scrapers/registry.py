@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Registro de scrapers por id de feed.
+
+Los módulos de institución se importan la primera vez que se piden, y
+sus dependencias pesadas (bs4/lxml, requests) sólo cuando parsean o
+descargan algo (ver `utils.make_soup` / `utils._session`). Así una
+ejecución con `--only <feed>` no carga el resto de scrapers.
+"""
+from __future__ import annotations
+
+import logging
+from importlib import import_module
+from types import ModuleType
+from typing import Dict, List
+
+log = logging.getLogger(__name__)
+
+# id de feed (config/feeds.yaml) -> módulo con `iter_collect(cfg, budget)`
+# (generador) o `collect(cfg, budget)` (lista)
+SCRAPERS: Dict[str, str] = {
+    "picasso": "scrapers.institutions.picasso",
+    "pompidou": "scrapers.institutions.pompidou",
+    "thyssen": "scrapers.institutions.thyssen",
+    "latermica": "scrapers.institutions.latermica",
+}
+
+_loaded: Dict[str, ModuleType] = {}
+
+def register(feed_id: str, module_path: str):
+    SCRAPERS[feed_id] = module_path
+    _loaded.pop(feed_id, None)
+
+def available() -> List[str]:
+    return sorted(SCRAPERS)
+
+def is_loaded(feed_id: str) -> bool:
+    return feed_id in _loaded
+
+def get(feed_id: str) -> ModuleType:
+    """
+    Devuelve el módulo scraper de `feed_id`, importándolo sólo la primera vez.
+    Ids no registrados se buscan en `scrapers.institutions.<id>` (compatibilidad).
+    """
+    mod = _loaded.get(feed_id)
+    if mod is not None:
+        return mod
+    path = SCRAPERS.get(feed_id) or f"scrapers.institutions.{feed_id}"
+    log.debug("[%s] import %s", feed_id, path)
+    mod = import_module(path)
+    _loaded[feed_id] = mod
+    return mod
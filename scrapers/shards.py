@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Catálogo troceado por fuente y mes (data/shards/), además de catalog.jsonl.
+
+Cada evento va al shard de su `source_id` y del mes de su `fecha_inicio`
+(los que no tienen fecha, a `<fuente>/undated`):
+
+    data/shards/picasso/2025-10.jsonl
+    data/shards/manifest.json
+        {"shards": {"picasso/2025-10": {
+            "path": "picasso/2025-10.jsonl", "hash": sha256, "rows": 12,
+            "min_fecha_inicio": "2025-10-01", "max_fecha_fin": "2026-01-18"}}}
+
+`write` sólo reescribe los shards cuyo contenido cambió (el resto queda
+intacto en disco y en git) y borra los que ya no existen. Como un evento
+largo vive en el shard de su mes de inicio, el rango de cada shard lo da
+el manifiesto (`max_fecha_fin`), y `select` / `iter_events` leen sólo los
+shards que solapan con [desde, hasta].
+
+Los shards son lo que se versiona en git; catalog.jsonl se regenera a partir
+de ellos con `rebuild` (`python -m scrapers.shards --rebuild data/catalog.jsonl`).
+"""
+from __future__ import annotations
+
+import os
+import re
+import json
+import hashlib
+import logging
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+log = logging.getLogger(__name__)
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+ROOT = os.path.join(DATA_DIR, "shards")
+UNDATED = "undated"
+
+def _manifest_path(root: str) -> str:
+    return os.path.join(root, "manifest.json")
+
+def _day(v: Any) -> Optional[str]:
+    if not isinstance(v, str) or not v:
+        return None
+    try:
+        return date.fromisoformat(v[:10]).isoformat()
+    except ValueError:
+        return None
+
+def shard_key(it: Dict[str, Any]) -> str:
+    sid = re.sub(r"[^\w.-]", "_", it.get("source_id") or "otros")
+    fi = _day(it.get("fecha_inicio"))
+    return f"{sid}/{fi[:7] if fi else UNDATED}"
+
+def load_manifest(root: str = ROOT) -> Dict[str, Any]:
+    try:
+        with open(_manifest_path(root), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"shards": {}}
+
+class _Shard:
+    def __init__(self, root: str, key: str):
+        self.path = os.path.join(root, key + ".jsonl")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.tmp = self.path + ".tmp"
+        self.f = open(self.tmp, "w", encoding="utf-8")
+        self.sha = hashlib.sha256()
+        self.rows = 0
+        self.min_fi: Optional[str] = None
+        self.max_ff: Optional[str] = None
+
+    def add(self, line: str, it: Dict[str, Any]):
+        self.f.write(line)
+        self.sha.update(line.encode("utf-8"))
+        self.rows += 1
+        fi = _day(it.get("fecha_inicio"))
+        ff = _day(it.get("fecha_fin")) or fi
+        if fi and (self.min_fi is None or fi < self.min_fi):
+            self.min_fi = fi
+        if ff and (self.max_ff is None or ff > self.max_ff):
+            self.max_ff = ff
+
+def write(lines: Iterable[str], root: str = ROOT) -> Dict[str, int]:
+    """
+    Reparte las líneas JSONL del catálogo (en su orden) en shards y actualiza
+    el manifiesto. Devuelve {"shards", "written", "unchanged", "removed"}.
+    """
+    old = load_manifest(root).get("shards", {})
+    open_shards: Dict[str, _Shard] = {}
+    try:
+        for line in lines:
+            if not line.strip():
+                continue
+            if not line.endswith("\n"):
+                line += "\n"
+            it = json.loads(line)
+            key = shard_key(it)
+            sh = open_shards.get(key)
+            if sh is None:
+                sh = open_shards[key] = _Shard(root, key)
+            sh.add(line, it)
+    except BaseException:
+        for sh in open_shards.values():
+            sh.f.close()
+            os.remove(sh.tmp)
+        raise
+
+    shards: Dict[str, Dict[str, Any]] = {}
+    written = unchanged = 0
+    for key, sh in sorted(open_shards.items()):
+        sh.f.close()
+        h = sh.sha.hexdigest()
+        prev = old.get(key)
+        if prev and prev.get("hash") == h and os.path.exists(sh.path):
+            os.remove(sh.tmp)
+            unchanged += 1
+        else:
+            os.replace(sh.tmp, sh.path)
+            written += 1
+        shards[key] = {"path": key + ".jsonl", "hash": h, "rows": sh.rows,
+                       "min_fecha_inicio": sh.min_fi, "max_fecha_fin": sh.max_ff}
+
+    removed = 0
+    for key, prev in old.items():
+        if key not in shards:
+            path = os.path.join(root, prev.get("path") or key + ".jsonl")
+            try:
+                os.remove(path)
+                removed += 1
+                os.rmdir(os.path.dirname(path))  # sólo si la fuente se quedó sin shards
+            except OSError:
+                pass
+    if shards != old or not os.path.exists(_manifest_path(root)):
+        os.makedirs(root, exist_ok=True)
+        tmp = _manifest_path(root) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"shards": shards}, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, _manifest_path(root))
+    return {"shards": len(shards), "written": written, "unchanged": unchanged, "removed": removed}
+
+def write_from(catalog: str, root: str = ROOT) -> Dict[str, int]:
+    with open(catalog, "r", encoding="utf-8") as f:
+        return write(f, root)
+
+def select(desde: Optional[date] = None, hasta: Optional[date] = None,
+           sources: Optional[List[str]] = None, include_undated: bool = False,
+           root: str = ROOT, manifest: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Rutas de los shards que pueden tener eventos que solapan [desde, hasta],
+    según el manifiesto (sin abrirlos). Sin fechas, todos los fechados.
+    """
+    manifest = manifest if manifest is not None else load_manifest(root)
+    lo = desde.isoformat() if desde else None
+    hi = hasta.isoformat() if hasta else None
+    out = []
+    for key, sh in sorted(manifest.get("shards", {}).items()):
+        if sources is not None and key.split("/", 1)[0] not in sources:
+            continue
+        if sh.get("min_fecha_inicio") is None:
+            if not include_undated:
+                continue
+        elif (hi and sh["min_fecha_inicio"] > hi) or (lo and (sh.get("max_fecha_fin") or "") < lo):
+            continue
+        out.append(os.path.join(root, sh["path"]))
+    return out
+
+def iter_events(desde: Optional[date] = None, hasta: Optional[date] = None,
+                sources: Optional[List[str]] = None, include_undated: bool = False,
+                root: str = ROOT) -> Iterator[Dict[str, Any]]:
+    """Eventos de los shards seleccionados (el filtro fino por fecha es del que lee)."""
+    for path in select(desde, hasta, sources, include_undated, root):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        except OSError as e:
+            log.warning("shard %s: %s", path, e)
+
+def rebuild(catalog: str, root: str = ROOT) -> int:
+    """
+    Reescribe `catalog` (de forma atómica) con todos los eventos de los
+    shards, fechados y no fechados, en el orden del manifiesto. Devuelve las
+    filas escritas.
+    """
+    rows = 0
+    tmp = catalog + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as out:
+        for path in select(include_undated=True, root=root):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        out.write(line if line.endswith("\n") else line + "\n")
+                        rows += 1
+    os.replace(tmp, catalog)
+    return rows
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Catálogo troceado por fuente y mes")
+    ap.add_argument("--build", metavar="JSONL", help="trocea un catalog.jsonl")
+    ap.add_argument("--rebuild", metavar="JSONL", help="regenera un catalog.jsonl desde los shards")
+    ap.add_argument("--desde", type=date.fromisoformat)
+    ap.add_argument("--hasta", type=date.fromisoformat)
+    args = ap.parse_args()
+    if args.build:
+        print(write_from(args.build))
+    elif args.rebuild:
+        print(rebuild(args.rebuild))
+    else:
+        for p in select(args.desde, args.hasta):
+            print(os.path.relpath(p, ROOT))
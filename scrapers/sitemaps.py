@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+Descubrimiento de páginas de detalle por sitemap.xml + lastmod.
+
+En vez de escanear los listados y descargar todos los detalles, se leen los
+sitemaps del sitio (robots.txt, /sitemap.xml, /sitemap_index.xml,
+/wp-sitemap.xml), incluidos índices de sitemaps y ficheros .gz, y sólo se
+programan los detalles cuyo `lastmod` es más reciente que el visto en la
+ejecución anterior (data/sitemaps_state.json). Lo que no cambió se
+reutiliza del catálogo anterior.
+
+Los sitemaps se parsean en streaming (XMLPullParser sobre los trozos de la
+respuesta), sin cargar el documento entero. Si el sitio no publica sitemap,
+`plan` devuelve None y el scraper vuelve a escanear el listado.
+
+El lastmod visto de cada URL se guarda con `mark_seen` cuando la descarga de
+detalles termina, y sólo para las URLs descargadas o reutilizadas: si la
+ejecución se corta a medias, la siguiente vuelve a programar lo que faltó.
+
+Se activa por feed con `discovery: sitemap` en config/feeds.yaml.
+"""
+from __future__ import annotations
+
+import os
+import json
+import zlib
+import logging
+import threading
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin
+from xml.etree.ElementTree import XMLPullParser
+
+from .budget import UNLIMITED, Budget, BudgetExceeded
+from .utils import _session
+
+log = logging.getLogger(__name__)
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+STATE = os.path.join(DATA_DIR, "sitemaps_state.json")
+CATALOG = os.path.join(DATA_DIR, "catalog.jsonl")
+
+CANDIDATES = ("/sitemap.xml", "/sitemap_index.xml", "/wp-sitemap.xml")
+MAX_SITEMAPS = 200
+MAX_AGE_DAYS = 365
+CHUNK = 64 * 1024
+
+_state_lock = threading.Lock()
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+def _entries(parser: XMLPullParser) -> Iterator[Tuple[str, str, Optional[str]]]:
+    for _, el in parser.read_events():
+        name = _local(el.tag)
+        if name not in ("url", "sitemap"):
+            continue
+        loc = lastmod = None
+        for child in el:
+            cname = _local(child.tag)
+            if cname == "loc":
+                loc = (child.text or "").strip()
+            elif cname == "lastmod":
+                lastmod = (child.text or "").strip() or None
+        el.clear()  # libera el subárbol ya leído
+        if loc:
+            yield name, loc, lastmod
+
+def iter_sitemap(url: str, budget: Budget = UNLIMITED) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """
+    Recorre un sitemap en streaming: ("url" | "sitemap", loc, lastmod).
+    Descomprime gzip al vuelo si el cuerpo lo es (.xml.gz). Lanza ValueError
+    si la respuesta no es 200 o no es XML.
+    """
+    r = _session().get(url, timeout=budget.timeout(30), stream=True)
+    try:
+        if r.status_code != 200:
+            raise ValueError(f"HTTP {r.status_code}")
+        parser = XMLPullParser(events=("end",))
+        gunzip = None
+        first = True
+        for chunk in r.iter_content(CHUNK):
+            if first:
+                first = False
+                if chunk[:2] == b"\x1f\x8b":
+                    gunzip = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                elif b"<" not in chunk[:512]:
+                    # p.ej. una página 200 de "no encontrado"
+                    raise ValueError("not XML")
+            parser.feed(gunzip.decompress(chunk) if gunzip else chunk)
+            yield from _entries(parser)
+        if gunzip:
+            parser.feed(gunzip.flush())
+        parser.close()
+        yield from _entries(parser)
+    finally:
+        r.close()
+
+def find_sitemaps(base: str, budget: Budget = UNLIMITED) -> List[str]:
+    """Sitemaps declarados en robots.txt o, si no hay, los nombres habituales."""
+    found: List[str] = []
+    try:
+        r = _session().get(urljoin(base, "/robots.txt"), timeout=budget.timeout(15))
+        if r.status_code == 200:
+            for line in r.text.splitlines():
+                if line.lower().startswith("sitemap:"):
+                    found.append(line.split(":", 1)[1].strip())
+    except BudgetExceeded:
+        raise
+    except Exception as e:
+        log.debug("robots.txt %s: %s", base, e)
+    return found or [urljoin(base, c) for c in CANDIDATES]
+
+def _load_state() -> Dict[str, Any]:
+    try:
+        with open(STATE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_state(key: str, value: Dict[str, Any]):
+    """Actualiza los campos de `value` en la entrada `key` del estado."""
+    with _state_lock:
+        state = _load_state()
+        state.setdefault(key, {}).update(value)
+        tmp = STATE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, STATE)
+
+def discover(base: str, match: Callable[[str], bool], key: str,
+             budget: Budget = UNLIMITED) -> Optional[Dict[str, Optional[str]]]:
+    """
+    {url: lastmod} de las URLs del sitio que cumplen `match`, o None si no hay sitemap.
+    Los sub-sitemaps cuyo lastmod no cambió no se descargan: se reutilizan sus
+    URLs guardadas en el estado. Si uno falla se conserva lo que había de él
+    (y de sus sub-sitemaps); lo que nunca se leyó bien no se guarda.
+    """
+    prev = _load_state().get(key, {}).get("sitemaps", {})
+    maps: Dict[str, Dict[str, Any]] = {}
+    urls: Dict[str, Optional[str]] = {}
+    pending: List[Tuple[str, Optional[str]]] = [(sm, None) for sm in find_sitemaps(base, budget)]
+    tried = set()
+    any_ok = False
+    while pending and len(tried) < MAX_SITEMAPS:
+        sm, sm_lastmod = pending.pop(0)
+        if sm in tried:
+            continue
+        tried.add(sm)
+        old = prev.get(sm)
+        if old and sm_lastmod and old.get("lastmod") == sm_lastmod:
+            # el índice dice que no cambió: no se descarga
+            maps[sm] = old
+            urls.update(old.get("urls", {}))
+            pending.extend((c, prev.get(c, {}).get("lastmod")) for c in old.get("sitemaps", []))
+            any_ok = True
+            continue
+        entry: Dict[str, Any] = {"lastmod": sm_lastmod, "urls": {}, "sitemaps": []}
+        children: List[Tuple[str, Optional[str]]] = []
+        got = False
+        try:
+            for kind, loc, lastmod in iter_sitemap(sm, budget):
+                got = True
+                if kind == "sitemap":
+                    entry["sitemaps"].append(loc)
+                    children.append((loc, lastmod))
+                elif match(loc):
+                    entry["urls"][loc] = lastmod
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            log.warning("sitemap %s: %s", sm, e)
+            if old:
+                # se queda lo de la ejecución anterior; sus hijos, tal cual estaban
+                maps[sm] = old
+                urls.update(old.get("urls", {}))
+                pending.extend((c, prev.get(c, {}).get("lastmod")) for c in old.get("sitemaps", []))
+                any_ok = True
+            continue
+        maps[sm] = entry
+        urls.update(entry["urls"])
+        pending.extend(children)
+        any_ok = any_ok or got
+    if not any_ok:
+        return None
+    # "seen" no se toca aquí: lo actualiza mark_seen tras descargar los detalles
+    _save_state(key, {"sitemaps": maps})
+    return urls
+
+def _previous_items(source_id: str) -> Dict[str, Dict[str, Any]]:
+    out: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(CATALOG):
+        return out
+    with open(CATALOG, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                it = json.loads(line)
+                if it.get("source_id") == source_id and it.get("source_url"):
+                    out[it["source_url"]] = it
+    return out
+
+class Plan(NamedTuple):
+    urls: List[str]                       # a descargar
+    reused: List[Dict[str, Any]]          # items del catálogo anterior
+    key: str
+    lastmods: Dict[str, Optional[str]]    # de urls y reused, para mark_seen
+
+def plan(base: str, match: Callable[[str], bool], key: str, source_id: str,
+         budget: Budget = UNLIMITED) -> Optional[Plan]:
+    """
+    Plan con las URLs a descargar y los items reutilizados del catálogo
+    anterior, o None si el sitio no tiene sitemap. Se descargan las URLs nuevas, las de lastmod más
+    reciente que la ejecución anterior y las que no estaban en el catálogo.
+    Se ignoran las de lastmod más antiguo que MAX_AGE_DAYS que tampoco lo estaban.
+    """
+    prev_seen = _load_state().get(key, {}).get("seen", {})
+    found = discover(base, match, key, budget)
+    if found is None:
+        return None
+    previous = _previous_items(source_id)
+    cutoff = (date.today() - timedelta(days=MAX_AGE_DAYS)).isoformat()
+    to_fetch: List[str] = []
+    reused: List[Dict[str, Any]] = []
+    for url in sorted(found):
+        lastmod = found[url]
+        old = previous.get(url)
+        if old is not None and lastmod and prev_seen.get(url) == lastmod:
+            reused.append(old)
+        elif old is None and lastmod and lastmod[:10] < cutoff:
+            continue
+        else:
+            to_fetch.append(url)
+    log.info("[%s] sitemap: %d urls, %d a descargar, %d reutilizadas",
+             key, len(found), len(to_fetch), len(reused))
+    lastmods = {url: found[url] for url in to_fetch}
+    lastmods.update((it["source_url"], found[it["source_url"]]) for it in reused)
+    return Plan(to_fetch, reused, key, lastmods)
+
+def mark_seen(planned: Plan, fetched: Iterable[str]):
+    """
+    Guarda como vistos los lastmod de las URLs reutilizadas y de las de
+    `fetched` (las que se descargaron y parsearon). Se llama cuando termina la
+    descarga de detalles; lo que falló o no llegó a descargarse no se marca.
+    """
+    done = set(fetched)
+    seen = {it["source_url"]: planned.lastmods[it["source_url"]] for it in planned.reused}
+    seen.update((url, planned.lastmods[url]) for url in planned.urls if url in done)
+    _save_state(planned.key, {"seen": seen})
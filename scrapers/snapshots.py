@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Almacén direccionado por contenido de las páginas crudas descargadas
+(data/snapshots/).
+
+Cada cuerpo se guarda una sola vez, comprimido, con su sha256 como nombre:
+
+    data/snapshots/blobs/ab/abcdef....zst
+    data/snapshots/manifest.jsonl   {"url", "fetched_at", "hash", "size", "type"}
+
+El manifiesto (append-only) mapea cada captura (url, fetched_at) a su blob;
+capturas idénticas sólo añaden una línea. `gc` aplica la retención (las
+últimas N capturas por URL y todo lo reciente) y borra los blobs que ya
+nadie referencia. Con `zstandard` instalado se comprime con zstd; si no,
+con zlib (.gz), y la lectura acepta ambos.
+
+    python -m scrapers.snapshots ls [--url URL]
+    python -m scrapers.snapshots cat URL|HASH
+    python -m scrapers.snapshots gc [--days 30] [--keep 5]
+    python -m scrapers.snapshots import data/debug data/sources
+"""
+from __future__ import annotations
+
+import os
+import re
+import sys
+import json
+import zlib
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+log = logging.getLogger(__name__)
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+ROOT = os.path.join(DATA_DIR, "snapshots")
+KEEP_DAYS = 30
+KEEP_LAST = 5
+ZSTD_LEVEL = 10
+
+_lock = threading.Lock()
+
+def _zstd():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _manifest(root: str) -> str:
+    return os.path.join(root, "manifest.jsonl")
+
+def _blob_path(root: str, h: str, ext: str) -> str:
+    return os.path.join(root, "blobs", h[:2], h + ext)
+
+def _find_blob(root: str, h: str) -> Optional[str]:
+    for ext in (".zst", ".gz"):
+        p = _blob_path(root, h, ext)
+        if os.path.exists(p):
+            return p
+    return None
+
+def _guess_type(content: bytes) -> str:
+    head = content[:256].lstrip().lower()
+    if head[:1] in (b"{", b"["):
+        return "json"
+    if head.startswith(b"<?xml") and b"<html" not in content[:1024].lower():
+        return "xml"
+    return "html"
+
+def put(url: str, content: Union[bytes, str, dict, list], fetched_at: Optional[str] = None,
+        type: Optional[str] = None, root: str = ROOT) -> str:
+    """Guarda una captura de `url` y devuelve el hash de su contenido."""
+    if isinstance(content, (dict, list)):
+        content = json.dumps(content, ensure_ascii=False, indent=2)
+        type = type or "json"
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    h = hashlib.sha256(content).hexdigest()
+    data = ext = None
+    if _find_blob(root, h) is None:
+        zstd = _zstd()
+        if zstd is not None:
+            data, ext = zstd.ZstdCompressor(level=ZSTD_LEVEL).compress(content), ".zst"
+        else:
+            data, ext = zlib.compress(content, 9), ".gz"
+    entry = {"url": url, "fetched_at": fetched_at or _now(), "hash": h,
+             "size": len(content), "type": type or _guess_type(content)}
+    with _lock:  # blob + manifiesto juntos: gc no puede borrar el blob entre medias
+        if data is not None and _find_blob(root, h) is None:
+            path = _blob_path(root, h, ext)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        os.makedirs(root, exist_ok=True)
+        with open(_manifest(root), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return h
+
+def get(h: str, root: str = ROOT) -> bytes:
+    path = _find_blob(root, h)
+    if path is None:
+        raise KeyError(h)
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".gz"):
+        return zlib.decompress(data)
+    zstd = _zstd()
+    if zstd is None:
+        raise RuntimeError("zstandard no está instalado (pip install zstandard)")
+    return zstd.ZstdDecompressor().decompress(data)
+
+def entries(root: str = ROOT, url: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Capturas del manifiesto, en orden de escritura."""
+    path = _manifest(root)
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                e = json.loads(line)
+                if url is None or e["url"] == url:
+                    yield e
+
+def latest(url: str, root: str = ROOT) -> Optional[bytes]:
+    """Última captura de `url`, o None."""
+    last = None
+    for e in entries(root, url):
+        if last is None or e["fetched_at"] >= last["fetched_at"]:
+            last = e
+    return get(last["hash"], root) if last else None
+
+def iter_pages(types=("html",), root: str = ROOT) -> Iterator[bytes]:
+    """Contenido de cada blob distinto de los tipos dados (réplica y benchmarks)."""
+    seen = set()
+    for e in entries(root):
+        if e["hash"] in seen or (types and e.get("type") not in types):
+            continue
+        seen.add(e["hash"])
+        try:
+            yield get(e["hash"], root)
+        except (KeyError, RuntimeError) as ex:
+            log.warning("snapshot %s: %s", e["hash"][:12], ex)
+
+def gc(days: int = KEEP_DAYS, keep: int = KEEP_LAST, root: str = ROOT) -> Dict[str, int]:
+    """
+    Conserva, por URL, las `keep` capturas más recientes y las de los últimos
+    `days` días; reescribe el manifiesto y borra los blobs sin referencias.
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    with _lock:
+        by_url: Dict[str, List[Dict[str, Any]]] = {}
+        for e in entries(root):
+            by_url.setdefault(e["url"], []).append(e)
+        kept: List[Dict[str, Any]] = []
+        total = 0
+        for es in by_url.values():
+            total += len(es)
+            es.sort(key=lambda e: e["fetched_at"], reverse=True)
+            kept.extend(e for i, e in enumerate(es) if i < keep or e["fetched_at"] >= cutoff)
+        kept.sort(key=lambda e: e["fetched_at"])
+        if os.path.exists(_manifest(root)):
+            tmp = _manifest(root) + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for e in kept:
+                    f.write(json.dumps(e, ensure_ascii=False) + "\n")
+            os.replace(tmp, _manifest(root))
+
+        live = {e["hash"] for e in kept}
+        removed_blobs = 0
+        blobs = os.path.join(root, "blobs")
+        for dirpath, _, files in os.walk(blobs):
+            for name in files:
+                h = name.split(".", 1)[0]
+                if h not in live:
+                    os.remove(os.path.join(dirpath, name))
+                    removed_blobs += 1
+    return {"entries": len(kept), "dropped": total - len(kept), "blobs_removed": removed_blobs}
+
+_TS_RE = re.compile(r"_(\d{8}T\d{6}Z)$")
+
+def import_files(paths: List[str], root: str = ROOT) -> int:
+    """
+    Importa capturas sueltas (data/debug, data/sources). La URL es la del
+    .json de debug_fetch si existe; si no, `file:<nombre sin timestamp>`.
+    """
+    n = 0
+    for base in paths:
+        files = [base] if os.path.isfile(base) else sorted(
+            os.path.join(base, f) for f in os.listdir(base))
+        for path in files:
+            stem, ext = os.path.splitext(os.path.basename(path))
+            if ext not in (".html", ".json", ".xml"):
+                continue
+            if ext == ".json" and os.path.exists(os.path.join(os.path.dirname(path), stem + ".html")):
+                continue  # metadatos de debug_fetch, no una página
+            url = "file:" + _TS_RE.sub("", stem) + ext
+            m = _TS_RE.search(stem)
+            ts = m.group(1) if m else None
+            info = os.path.join(os.path.dirname(path), stem + ".json")
+            if ext == ".html" and os.path.exists(info):
+                try:
+                    with open(info, "r", encoding="utf-8") as f:
+                        meta = json.load(f)
+                    url = meta.get("url") or url
+                    ts = meta.get("fetched_at") or ts
+                except ValueError:
+                    pass
+            if ts:
+                fetched_at = datetime.strptime(ts, "%Y%m%dT%H%M%SZ").strftime("%Y-%m-%dT%H:%M:%SZ")
+            else:
+                mtime = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc)
+                fetched_at = mtime.strftime("%Y-%m-%dT%H:%M:%SZ")
+            with open(path, "rb") as f:
+                put(url, f.read(), fetched_at=fetched_at, type=ext[1:], root=root)
+            n += 1
+    return n
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+    ap = argparse.ArgumentParser(description="Almacén de páginas crudas")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("ls")
+    p.add_argument("--url")
+    p = sub.add_parser("cat")
+    p.add_argument("ref", help="URL (última captura) o hash")
+    p = sub.add_parser("gc")
+    p.add_argument("--days", type=int, default=KEEP_DAYS)
+    p.add_argument("--keep", type=int, default=KEEP_LAST)
+    p = sub.add_parser("import")
+    p.add_argument("paths", nargs="+")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "ls":
+        for e in entries(url=args.url):
+            print(f"{e['fetched_at']}  {e['hash'][:12]}  {e['size']:>9}  {e['type']:<5} {e['url']}")
+    elif args.cmd == "cat":
+        data = get(args.ref) if re.fullmatch(r"[0-9a-f]{64}", args.ref) else latest(args.ref)
+        if data is None:
+            sys.exit(f"sin capturas de {args.ref}")
+        sys.stdout.buffer.write(data)
+    elif args.cmd == "gc":
+        print(gc(args.days, args.keep))
+    elif args.cmd == "import":
+        print(f"{import_files(args.paths)} ficheros importados")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Almacén opcional del catálogo en SQLite (data/catalog.sqlite).
+
+Cada publicación hace upsert de los eventos por `id` en una única
+transacción (modo WAL: los lectores no se bloquean mientras el colector
+escribe). Se guarda cuándo se vio cada evento por primera y última vez,
+su posición en el catálogo y la publicación (`generation`) en la que
+apareció por última vez; los que no vienen en la última quedan con
+`active = 0`. Las lecturas abren la base en sólo lectura. El evento
+completo va en la columna `data` (JSON) y las columnas de filtro están
+indexadas:
+
+    (fecha_inicio, fecha_fin), source_id, categoria
+
+catalog.jsonl se sigue escribiendo; esto es para consultas indexadas
+(`query`) sin cargar el fichero entero. Se activa con `store.sqlite: true`
+en config/feeds.yaml.
+"""
+from __future__ import annotations
+
+import os
+import json
+import sqlite3
+import hashlib
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from urllib.request import pathname2url
+
+from scrapers.base import scraped_fields
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+DB = os.path.join(DATA_DIR, "catalog.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id            TEXT PRIMARY KEY,
+    source_id     TEXT,
+    categoria     TEXT,
+    fecha_inicio  TEXT,
+    fecha_fin     TEXT,
+    data          TEXT NOT NULL,
+    content_hash  TEXT NOT NULL,
+    first_seen    TEXT NOT NULL,
+    last_seen     TEXT NOT NULL,
+    updated_at    TEXT NOT NULL,
+    active        INTEGER NOT NULL DEFAULT 1,
+    generation    INTEGER NOT NULL DEFAULT 0,
+    position      INTEGER
+);
+CREATE INDEX IF NOT EXISTS events_fechas ON events (fecha_inicio, fecha_fin);
+CREATE INDEX IF NOT EXISTS events_source ON events (source_id);
+CREATE INDEX IF NOT EXISTS events_categoria ON events (categoria);
+"""
+# columnas añadidas después de la primera versión del esquema
+MIGRATIONS = {
+    "generation": "ALTER TABLE events ADD COLUMN generation INTEGER NOT NULL DEFAULT 0",
+    "position": "ALTER TABLE events ADD COLUMN position INTEGER",
+}
+
+UPSERT = """
+INSERT INTO events (id, source_id, categoria, fecha_inicio, fecha_fin, data,
+                    content_hash, first_seen, last_seen, updated_at, active,
+                    generation, position)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    last_seen = excluded.last_seen,
+    active = 1,
+    generation = excluded.generation,
+    position = excluded.position,
+    source_id = excluded.source_id,
+    categoria = excluded.categoria,
+    fecha_inicio = excluded.fecha_inicio,
+    fecha_fin = excluded.fecha_fin,
+    data = excluded.data,
+    content_hash = excluded.content_hash,
+    updated_at = CASE WHEN events.content_hash = excluded.content_hash
+                      THEN events.updated_at ELSE excluded.updated_at END
+"""
+
+def connect(path: str = DB) -> sqlite3.Connection:
+    """Conexión de escritura: crea o actualiza el esquema."""
+    conn = sqlite3.connect(path, isolation_level=None)  # transacciones explícitas
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(events)")}
+    for col, ddl in MIGRATIONS.items():
+        if col not in cols:
+            conn.execute(ddl)
+    conn.execute("CREATE INDEX IF NOT EXISTS events_generation ON events (generation)")
+    return conn
+
+def connect_ro(path: str = DB) -> sqlite3.Connection:
+    """Conexión de sólo lectura (sin pragmas ni DDL) para las consultas."""
+    return sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True)
+
+def _now() -> str:
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+
+def _rows(items: Iterable[Dict[str, Any]], seen_at: str, generation: int, counter: List[int]):
+    for it in items:
+        if not it.get("id"):
+            continue
+        data = json.dumps(it, ensure_ascii=False, sort_keys=True)
+        # miniatura y calidad no cuentan como cambio para updated_at
+        scraped = json.dumps(scraped_fields(it), ensure_ascii=False, sort_keys=True)
+        counter[0] += 1
+        yield (
+            it["id"], it.get("source_id"), it.get("categoria"),
+            it.get("fecha_inicio"), it.get("fecha_fin"), data,
+            hashlib.sha1(scraped.encode("utf-8")).hexdigest(),
+            seen_at, seen_at, seen_at, generation, counter[0],
+        )
+
+def upsert(items: Iterable[Dict[str, Any]], path: str = DB, seen_at: Optional[str] = None) -> Dict[str, int]:
+    """
+    Publica `items` (el catálogo completo; vale un iterador) en una
+    transacción. Los eventos que no vienen (los que no llevan la generación
+    de esta publicación) se marcan inactivos. Devuelve {"upserted", "deactivated"}.
+    """
+    seen_at = seen_at or _now()
+    counter = [0]
+    conn = connect(path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            (gen,) = conn.execute("SELECT COALESCE(MAX(generation), 0) + 1 FROM events").fetchone()
+            conn.executemany(UPSERT, _rows(items, seen_at, gen, counter))
+            cur = conn.execute("UPDATE events SET active = 0 WHERE active = 1 AND generation < ?", (gen,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return {"upserted": counter[0], "deactivated": cur.rowcount}
+    finally:
+        conn.close()
+
+def query(desde: Optional[date] = None, hasta: Optional[date] = None,
+          categorias: Optional[List[str]] = None, source_id: Optional[str] = None,
+          path: str = DB, include_inactive: bool = False) -> List[Dict[str, Any]]:
+    """
+    Eventos que solapan [desde, hasta] (fecha_fin = fecha_inicio si falta),
+    ordenados por fecha_inicio. Cada evento lleva first_seen/last_seen.
+    """
+    where, args = [], []  # type: List[str], List[Any]
+    if not include_inactive:
+        where.append("active = 1")
+    if desde is not None:
+        where.append("COALESCE(fecha_fin, fecha_inicio) >= ?")
+        args.append(desde.isoformat())
+    if hasta is not None:
+        # las fechas pueden llevar hora: todo el día `hasta` entra
+        where.append("fecha_inicio < ?")
+        args.append(hasta.isoformat() + "~")
+    if categorias is not None:
+        where.append("categoria IN (%s)" % ",".join("?" * len(categorias)) if categorias else "0")
+        args.extend(categorias)
+    if source_id:
+        where.append("source_id = ?")
+        args.append(source_id)
+    sql = "SELECT data, first_seen, last_seen FROM events"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY fecha_inicio IS NULL, fecha_inicio, id"
+    conn = connect_ro(path)
+    try:
+        out = []
+        for data, first_seen, last_seen in conn.execute(sql, args):
+            it = json.loads(data)
+            it["first_seen"], it["last_seen"] = first_seen, last_seen
+            out.append(it)
+        return out
+    finally:
+        conn.close()
+
+def iter_events(path: str = DB) -> Iterator[Dict[str, Any]]:
+    """Eventos activos en el orden del catálogo (para exportar a JSONL)."""
+    conn = connect_ro(path)
+    try:
+        for (data,) in conn.execute("SELECT data FROM events WHERE active = 1 ORDER BY position"):
+            yield json.loads(data)
+    finally:
+        conn.close()
+
+def export_jsonl(out: str, path: str = DB) -> int:
+    n = 0
+    tmp = out + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for it in iter_events(path):
+            f.write(json.dumps(it, ensure_ascii=False) + "\n")
+            n += 1
+    os.replace(tmp, out)
+    return n
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Catálogo en SQLite")
+    ap.add_argument("--export", metavar="JSONL", help="exporta los eventos activos a JSONL")
+    ap.add_argument("--import", dest="imp", metavar="JSONL", help="carga un catalog.jsonl")
+    args = ap.parse_args()
+    if args.imp:
+        with open(args.imp, "r", encoding="utf-8") as f:
+            print(upsert([json.loads(l) for l in f if l.strip()]))
+    if args.export:
+        print(export_jsonl(args.export))
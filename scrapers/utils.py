@@ -4,11 +4,17 @@ from __future__ import annotations
 import os
 import json
 import re
-from datetime import datetime, date
-from typing import Any, Dict, Optional
+import threading
+from datetime import datetime, date, timedelta
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple
 from urllib.parse import urljoin
 
-import requests
+from .budget import UNLIMITED, Budget
+
+if TYPE_CHECKING:  # requests/bs4 se importan bajo demanda (arranque rápido)
+    import requests
+    from bs4 import BeautifulSoup
 
 # Meses EN/ES abreviados más varias variantes
 MONTHS_MAP = {
@@ -25,7 +31,17 @@ DEFAULT_UA = (
     "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
 )
 
-def _session() -> requests.Session:
+_local = threading.local()
+
+def _session() -> "requests.Session":
+    """
+    Una sesión por hilo, reutilizada entre llamadas: mantiene las conexiones
+    keep-alive abiertas (importante en el modo daemon).
+    """
+    s = getattr(_local, "session", None)
+    if s is not None:
+        return s
+    import requests
     s = requests.Session()
     s.headers.update({
         "User-Agent": DEFAULT_UA,
@@ -33,20 +49,36 @@ def _session() -> requests.Session:
         "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
     })
     s.timeout = 30
+    _local.session = s
     return s
 
-def fetch_html(url: str) -> str:
+def fetch_html(url: str, budget: Budget = UNLIMITED) -> str:
     s = _session()
-    r = s.get(url, timeout=30)
+    r = s.get(url, timeout=budget.timeout(30))
     r.raise_for_status()
     return r.text
 
-def fetch_json(url: str) -> Dict[str, Any]:
+def fetch_bytes(url: str, budget: Budget = UNLIMITED) -> bytes:
+    """Cuerpo crudo (sin decodificar), para parsear en otro proceso."""
+    s = _session()
+    r = s.get(url, timeout=budget.timeout(30))
+    r.raise_for_status()
+    return r.content
+
+def fetch_json(url: str, budget: Budget = UNLIMITED) -> Dict[str, Any]:
     s = _session()
-    r = s.get(url, timeout=30)
+    r = s.get(url, timeout=budget.timeout(30))
     r.raise_for_status()
     return r.json()
 
+def make_soup(html: str | bytes) -> "BeautifulSoup":
+    """
+    BeautifulSoup+lxml importados en el primer uso: los módulos de
+    institución se pueden cargar sin pagar el coste de bs4/lxml.
+    """
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, "lxml")
+
 def absolutize(base: str, href: str) -> str:
     return urljoin(base, href)
 
@@ -64,34 +96,276 @@ def parse_iso(d: Optional[str]) -> Optional[str]:
     except Exception:
         return None
 
+# ---------------------------------------------------------------------------
+# Motor de extracción de fechas (ES/EN)
+# ---------------------------------------------------------------------------
+# Una sola pasada con una expresión precompilada que alterna todos los
+# formatos; los rangos ("del 3 al 15 de octubre", "19/03/2024 — 30/01/2028",
+# "March 5 – April 2, 2025") y listas ("3, 4 y 5 de octubre") se resuelven
+# después sobre los tokens encontrados. Un día suelto sólo abre una lista o
+# rango al principio del texto o tras "del", "los días", un día de la semana...
+# (no tras "Sala 2" o "Planta 1"), y entre los días de una lista puede ir el
+# día de la semana ("sábado 4 y domingo 5 de octubre"). Los resultados se
+# memorizan por (texto, fecha de referencia).
+
+MONTH_NAMES = {
+    # Español
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6,
+    "julio": 7, "agosto": 8, "septiembre": 9, "setiembre": 9, "octubre": 10,
+    "noviembre": 11, "diciembre": 12,
+    "ene": 1, "abr": 4, "ago": 8, "sept": 9, "set": 9, "dic": 12,
+    # Inglés
+    "january": 1, "february": 2, "march": 3, "april": 4, "june": 6, "july": 7,
+    "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6, "jul": 7,
+    "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+def _trie_regex(words: List[str]) -> str:
+    """Alternancia en forma de trie: el motor descarta por el primer carácter."""
+    trie: Dict[str, Any] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def walk(node: Dict[str, Any]) -> str:
+        alts = [re.escape(ch) + walk(sub) for ch, sub in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return walk(trie)
+
+_MON = _trie_regex(list(MONTH_NAMES))
+WEEKDAYS = ("lunes", "martes", "miércoles", "miercoles", "jueves", "viernes", "sábado", "sabado",
+            "domingo", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+_WD = rf"(?:(?:el|the)\s+)?(?:{_trie_regex(list(WEEKDAYS))})\s+"
+# palabras tras las que puede empezar una lista/rango de días sueltos
+# ("del 3 al 15", "los días 3, 4 y 5", "sábado 4 y domingo 5"); tras
+# cualquier otra ("Sala 2, 3 de octubre", "Planta 1") el número no es un día
+_BARE_AFTER = frozenset(("del", "de", "el", "los", "las", "día", "días", "dia", "dias",
+                         "desde", "entre", "from", "on", "between") + WEEKDAYS)
+_ORD = r"(?:º|er|st|nd|rd|th)?"
+
+def _time(n: int) -> str:
+    return (r"(?:\s*(?:,|-|–|·|\|)?\s*(?:a\s+las\s+|at\s+)?"
+            rf"(?P<hh{n}>\d{{1,2}})(?::(?P<mi{n}>\d{{2}})|h(?P<mh{n}>\d{{2}})?\b))?")
+
+DATE_RE = re.compile(rf"""
+  \b(?=[0-9a-zA-Z])  # \b común: se evalúa una vez por posición, no una por alternativa
+  (?:
+    (?P<iso>(?P<y1>\d{{4}})-(?P<m1>\d{{2}})-(?P<d1>\d{{2}})(?:T(?=\d)|\b)){_time(1)}
+  | (?P<num>(?P<d2>\d{{1,2}})[/.-](?P<m2>\d{{1,2}})[/.-](?P<y2>\d{{4}})\b){_time(2)}
+  | (?P<bare>(?P<d0>\d{{1,2}}){_ORD})\s*
+        (?:(?P<c0>[-–—]|al|a|hasta|to|until)\s*  # rango: el fin es el día con mes
+            (?=(?:{_WD})?\d{{1,2}}{_ORD}\s+(?:de\s+)?(?:{_MON})\b)
+         | (?P<c5>,|y|e|and|&)\s*                # lista: sólo días sueltos hasta el mes
+            (?=(?:(?:{_WD})?\d{{1,2}}{_ORD}\s*(?:,|y|e|and|&)\s*)*(?:{_WD})?\d{{1,2}}{_ORD}\s+(?:de\s+)?(?:{_MON})\b))
+  | (?P<dmy>(?P<d3>\d{{1,2}}){_ORD}\s+(?:de\s+)?(?P<m3>{_MON})\b\.?
+        (?:,?\s+(?:de\s+|del\s+)?(?P<y3>\d{{4}})\b)?){_time(3)}
+  | (?P<mdy>(?P<m4>{_MON})\b\.?\s+(?P<d4>\d{{1,2}}){_ORD}\b
+        (?:,?\s+(?P<y4>\d{{4}})\b)?){_time(4)}
+  )
+""", re.IGNORECASE | re.VERBOSE)
+
+_RANGE_GAP = re.compile(r"\s*(?:[-–—]|al|a|hasta(?:\s+el)?|to|until|till|through)\s*(?:el\s+)?", re.I)
+_LIST_GAP = re.compile(r"\s*(?:,|;|y|e|and|&|/)\s*", re.I)
+
+class DateSpan(NamedTuple):
+    start: str                 # YYYY-MM-DD
+    end: str                   # == start para fechas sueltas
+    time: Optional[str] = None # HH:MM si la fecha la lleva
+
+def _infer_year(m: int, d: int, ref: date) -> Optional[int]:
+    """Año más probable para una fecha sin año: la próxima, salvo que pasara hace < 90 días."""
+    for y in (ref.year, ref.year + 1):
+        try:
+            if date(y, m, d) >= ref - timedelta(days=90):
+                return y
+        except ValueError:
+            continue
+    return None
+
+def _bare_starts_here(text: str, s: int) -> bool:
+    """Un día suelto abre una lista/rango al principio o tras _BARE_AFTER, no tras otra palabra o número."""
+    before = text[max(0, s - 40):s].rstrip()  # basta la palabra anterior
+    if before.endswith((",", ";")):
+        before = before[:-1].rstrip()
+    if not before:
+        return True
+    if before[-1].isdigit():
+        return False
+    if not before[-1].isalpha():
+        return True
+    word = re.search(r"\w+$", before)
+    return word is not None and word.group(0).lower() in _BARE_AFTER
+
+def _tokens(text: str) -> List[Dict[str, Any]]:
+    toks: List[Dict[str, Any]] = []
+    rejected = -1  # fin del último número descartado ("Sala 2, 3 y 4 de octubre")
+    for mt in DATE_RE.finditer(text):
+        g = mt.group
+        if g("bare") is not None:
+            # continuación de la lista/rango anterior, o inicio en un sitio válido
+            if not (toks and toks[-1]["bare"] and toks[-1]["e"] == mt.start()) \
+                    and mt.start() != rejected and not _bare_starts_here(text, mt.start()):
+                rejected = mt.end()
+                continue
+            toks.append({"d": int(g("d0")), "m": None, "y": None, "hm": None,
+                         "conn": "range" if g("c0") else "list",
+                         "s": mt.start(), "e": mt.end(), "bare": True})
+            continue
+        for n, (kd, km, ky) in enumerate((("d1", "m1", "y1"), ("d2", "m2", "y2"),
+                                          ("d3", "m3", "y3"), ("d4", "m4", "y4")), 1):
+            if g(kd) is None:
+                continue
+            mon = g(km)
+            m = int(mon) if mon.isdigit() else MONTH_NAMES.get(mon.lower())
+            hh = g(f"hh{n}")
+            hm = None
+            if hh is not None and int(hh) < 24:
+                mi = g(f"mi{n}") or g(f"mh{n}") or "00"
+                hm = f"{int(hh):02d}:{mi}"
+            toks.append({"d": int(g(kd)), "m": m, "y": int(g(ky)) if g(ky) else None,
+                         "hm": hm, "conn": None, "s": mt.start(), "e": mt.end(), "bare": False})
+            break
+    # conector entre dos fechas completas consecutivas
+    for a, b in zip(toks, toks[1:]):
+        if a["bare"]:
+            continue
+        gap = text[a["e"]:b["s"]]
+        if len(gap) <= 12:
+            if _RANGE_GAP.fullmatch(gap):
+                a["conn"] = "range"
+            elif _LIST_GAP.fullmatch(gap):
+                a["conn"] = "list"
+    # los días sueltos heredan mes/año de la siguiente fecha completa
+    nxt = None
+    for t in reversed(toks):
+        if t["bare"]:
+            if nxt is not None:
+                t["m"], t["y"] = nxt["m"], nxt["y"]
+                if t["conn"] == "list":
+                    t["hm"] = nxt["hm"]
+        else:
+            nxt = t
+    # sin año: lo toma de su pareja en el rango/lista ("3 de octubre al 5 de noviembre de 2025")
+    for i in range(len(toks) - 2, -1, -1):
+        t, u = toks[i], toks[i + 1]
+        if t["y"] is None and t["conn"] and u["y"] is not None and t["m"] and u["m"]:
+            t["y"] = u["y"] - 1 if t["conn"] == "range" and t["m"] > u["m"] else u["y"]
+    return toks
+
+@lru_cache(maxsize=4096)
+def _find_dates(text: str, ref_iso: str) -> Tuple[DateSpan, ...]:
+    ref = date.fromisoformat(ref_iso)
+    toks = _tokens(text)
+    years = [t["y"] for t in toks]
+    # rango sin año: primero el año del fin y el inicio en ese año, o en el
+    # anterior si su mes/día va después ("del 20 de marzo al 30 de octubre")
+    for i in range(len(toks) - 1):
+        t, u = toks[i], toks[i + 1]
+        if t["conn"] == "range" and t["m"] and u["m"] and years[i] is None and years[i + 1] is None:
+            ye = _infer_year(u["m"], u["d"], ref)
+            if ye is not None:
+                years[i + 1] = ye
+                years[i] = ye - 1 if (t["m"], t["d"]) > (u["m"], u["d"]) else ye
+    days: List[Optional[date]] = []
+    for t, y in zip(toks, years):
+        if not t["m"]:
+            days.append(None)
+            continue
+        y = y or _infer_year(t["m"], t["d"], ref)
+        try:
+            days.append(date(y, t["m"], t["d"]) if y else None)
+        except ValueError:
+            days.append(None)
+
+    out: List[DateSpan] = []
+    i = 0
+    while i < len(toks):
+        t, d = toks[i], days[i]
+        if d is None:
+            i += 1
+            continue
+        if t["conn"] == "range" and i + 1 < len(toks) and days[i + 1] and days[i + 1] >= d:
+            out.append(DateSpan(d.isoformat(), days[i + 1].isoformat()))
+            i += 2
+            continue
+        out.append(DateSpan(d.isoformat(), d.isoformat(), t["hm"]))
+        i += 1
+    return tuple(out)
+
+def find_dates(text: Optional[str], ref: Optional[date] = None) -> Tuple[DateSpan, ...]:
+    """Fechas y rangos de `text` en orden de aparición (memorizado)."""
+    if not text or not any(c.isdigit() for c in text):
+        return ()
+    return _find_dates(text, (ref or date.today()).isoformat())
+
+def extract_dates(text: Optional[str], ref: Optional[date] = None,
+                  first_range: bool = False) -> Dict[str, Any]:
+    """
+    Resumen para un evento: {"fecha_inicio", "fecha_fin", "ocurrencias"}.
+    - inicio/fin = mín/máx de todas las fechas y rangos; con `first_range`
+      manda el primer rango del texto (periodo principal de una página).
+    - `ocurrencias` lista las fechas sueltas ("YYYY-MM-DD" o
+      "YYYY-MM-DDTHH:MM") cuando hay varias o llevan hora.
+    """
+    spans = find_dates(text, ref)
+    out: Dict[str, Any] = {"fecha_inicio": None, "fecha_fin": None, "ocurrencias": []}
+    if not spans:
+        return out
+    ranges = [s for s in spans if s.end != s.start]
+    if first_range and ranges:
+        out["fecha_inicio"], out["fecha_fin"] = ranges[0].start, ranges[0].end
+        return out
+    out["fecha_inicio"] = min(s.start for s in spans)
+    out["fecha_fin"] = max(s.end for s in spans)
+    singles = sorted({s.start + (f"T{s.time}" if s.time else "") for s in spans if s.end == s.start})
+    if len(singles) > 1 or any(s.time for s in spans):
+        out["ocurrencias"] = singles
+    return out
+
+def page_dates(soup: Any, ref: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Fechas de una página de detalle, mirando primero donde suelen estar
+    (<time datetime>, elementos con clase *date*/*fecha*, el bloque del h1)
+    antes que el texto de <main>, para no escanear la página entera.
+    """
+    times = [t.get("datetime") for t in soup.select("time[datetime]") if t.get("datetime")]
+    candidates = [" – ".join(times[:2])] if times else []
+    candidates.append(" ".join(el.get_text(" ", strip=True) for el in
+                               soup.select('[class*="date"], [class*="fecha"]')[:8]))
+    h1 = soup.find("h1")
+    if h1 is not None and h1.parent is not None:
+        candidates.append(h1.parent.get_text(" ", strip=True)[:2000])
+    main = soup.find("main") or soup.body
+    if main is not None:
+        candidates.append(main.get_text(" ", strip=True)[:20000])
+    for txt in candidates:
+        res = extract_dates(txt, ref, first_range=True)
+        if res["fecha_inicio"]:
+            return res
+    return {"fecha_inicio": None, "fecha_fin": None, "ocurrencias": []}
+
 def parse_dd_mm_yyyy_range(text: str) -> tuple[Optional[str], Optional[str]]:
     """
-    Soporta "19/03/2024 — 30/01/2028" (distintos guiones).
+    Soporta "19/03/2024 — 30/01/2028" (distintos guiones). Primer rango del texto.
     """
-    t = re.sub(r"\s+", " ", text).strip()
-    m = re.search(r"(\d{2}/\d{2}/\d{4})\s*[–—-]\s*(\d{2}/\d{2}/\d{4})", t)
-    if not m:
-        return None, None
-    def to_iso(ddmmyyyy: str) -> str:
-        d, mth, y = ddmmyyyy.split("/")
-        return f"{y}-{int(mth):02d}-{int(d):02d}"
-    return to_iso(m.group(1)), to_iso(m.group(2))
+    for s in find_dates(text):
+        if s.end != s.start:
+            return s.start, s.end
+    return None, None
 
 def parse_spanish_date_text_short(txt: str) -> Optional[str]:
     """
-    Convierte '26 SEP' a 'YYYY-09-26' (con año actual).
+    Convierte '26 SEP' a 'YYYY-09-26' (año inferido respecto a hoy).
     """
-    if not txt:
-        return None
-    txt = clean_text(txt).upper()
-    parts = txt.split()
-    if len(parts) == 2 and parts[0].isdigit():
-        day = int(parts[0])
-        mon = MONTHS_MAP.get(parts[1][:3])
-        if mon:
-            y = date.today().year
-            return f"{y}-{mon:02d}-{day:02d}"
-    return None
+    spans = find_dates(clean_text(txt))
+    return spans[0].start if spans else None
 
 def epoch_ms_to_iso(ms: Optional[int]) -> Optional[str]:
     if not ms and ms != 0:
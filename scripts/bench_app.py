@@ -0,0 +1,112 @@
+# scripts/bench_app.py
+# Benchmark sin interfaz del camino de datos de la app (app/data.py) sobre
+# catálogos sintéticos (scripts/synth_catalog.py) de distintos tamaños:
+# tiempo de carga, latencia de filtro+orden por preset (con las listas de
+# quick_ranges.json y en vivo) y memoria pico. Cada tamaño corre en un
+# proceso nuevo para que el pico de memoria sea el suyo.
+#
+#   python scripts/bench_app.py --sizes 1000,10000,100000,1000000
+import os, sys, json, time, argparse, statistics, subprocess, tempfile
+from datetime import date
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synth_catalog import synth_catalog, load_profile
+
+def _rss_mb():
+    import resource
+    # Linux: KiB; macOS: bytes
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def _median_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+def child(path, repeat):
+    """Mide un catálogo en este proceso e imprime el resultado en JSON."""
+    from app import data
+    from scrapers import quickranges
+    from scrapers.quickranges import PRESETS
+    base_rss = _rss_mb()
+    today = date.today()
+    out = {"presets": {}}
+
+    t0 = time.perf_counter()
+    df = data.load_catalog(path)
+    out["load_ms"] = (time.perf_counter() - t0) * 1000
+    out["rows"] = len(df)
+    cats = data.categories(df)
+
+    # lo que el colector deja en quick_ranges.json para este catálogo
+    t0 = time.perf_counter()
+    slim = df[["id", "categoria", "fecha_inicio", "fecha_fin"]].astype(object)
+    index = quickranges.build(slim.where(slim.notna(), None).to_dict("records"), today)
+    out["index_build_ms"] = (time.perf_counter() - t0) * 1000
+
+    for preset in PRESETS + ["Personalizado"]:
+        start, end = today, date.fromordinal(today.toordinal() + 30)
+        res = {}
+        for mode, idx in (("index", index), ("live", None)):
+            if mode == "index" and preset == "Personalizado":
+                continue
+            n = len(data.select(df, preset, cats, cats, start, end, today, index=idx, db=None))
+            res[mode + "_ms"] = _median_ms(
+                lambda: data.select(df, preset, cats, cats, start, end, today, index=idx, db=None), repeat)
+            res["rows"] = n
+        out["presets"][preset] = res
+    out["peak_rss_mb"] = _rss_mb()
+    out["base_rss_mb"] = base_rss
+    print(json.dumps(out))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000,10000,100000", help="tamaños separados por comas")
+    ap.add_argument("--repeat", type=int, default=5, help="repeticiones por medida (mediana)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", help="guarda los resultados en este fichero")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        child(args.child, args.repeat)
+        return
+
+    profile = load_profile()
+    tmp = tempfile.mkdtemp(prefix="bench_app_")
+    results = {}
+    for n in (int(s) for s in args.sizes.split(",") if s.strip()):
+        path = os.path.join(tmp, f"catalog_{n}.jsonl")
+        t0 = time.perf_counter()
+        synth_catalog(path, n, args.seed, profile)
+        gen_s = time.perf_counter() - t0
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", path,
+                               "--repeat", str(args.repeat)],
+                              cwd=ROOT, capture_output=True, text=True)
+        os.remove(path)
+        if proc.returncode != 0:
+            print(f"{n}: error\n{proc.stderr.strip()}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        r["gen_s"] = gen_s
+        results[n] = r
+        print(f"\n== {n} eventos (generado en {gen_s:.1f}s) ==")
+        print(f"load {r['load_ms']:.0f} ms   index build {r['index_build_ms']:.0f} ms   "
+              f"peak RSS {r['peak_rss_mb']:.0f} MB (tras imports {r['base_rss_mb']:.0f} MB)")
+        print(f"{'preset':<18} {'rows':>8} {'index ms':>10} {'live ms':>10}")
+        for name, p in r["presets"].items():
+            idx = f"{p['index_ms']:.2f}" if "index_ms" in p else "-"
+            print(f"{name:<18} {p['rows']:>8} {idx:>10} {p['live_ms']:>10.2f}")
+    os.rmdir(tmp)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# scripts/bench_dates.py
+# Throughput del motor de fechas (scrapers.utils.find_dates) sobre las
+# páginas del almacén de capturas (scrapers.snapshots; si está vacío, las
+# sueltas de data/sources y data/debug), frente al regex anterior (un único
+# patrón dd/mm/yyyy sobre el texto completo).
+import os, re, sys, glob, html, time, argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from scrapers import snapshots, utils
+
+TAG_RE = re.compile(r"<script[^>]*>.*?</script>|<style[^>]*>.*?</style>|<[^>]+>", re.S | re.I)
+
+def stored_pages():
+    """(tipo, contenido) de cada captura distinta."""
+    pages = [("html", raw) for raw in snapshots.iter_pages(("html",))]
+    pages += [("json", raw) for raw in snapshots.iter_pages(("json",))]
+    if pages:
+        return pages
+    for pat in ("data/sources/*.html", "data/debug/*.html", "data/sources/*.json", "data/debug/*.json"):
+        for path in sorted(glob.glob(os.path.join(ROOT, pat))):
+            with open(path, "rb") as f:
+                pages.append((path.rsplit(".", 1)[1], f.read()))
+    return pages
+
+def load_texts():
+    texts = []
+    for kind, data in stored_pages():
+        raw = data.decode("utf-8", errors="replace")
+        if kind == "html":
+            # texto visible + __NEXT_DATA__ (donde van dates_literal)
+            texts.append(html.unescape(TAG_RE.sub(" ", raw)))
+            m = re.search(r'<script id="__NEXT_DATA__"[^>]*>(.*?)</script>', raw, re.S)
+            if m:
+                texts.append(m.group(1))
+        else:
+            texts.append(raw)
+    return texts
+
+def legacy(text):
+    t = re.sub(r"\s+", " ", text).strip()
+    return re.search(r"(\d{2}/\d{2}/\d{4})\s*[–—-]\s*(\d{2}/\d{2}/\d{4})", t)
+
+def bench(name, fn, texts, rounds):
+    total = sum(len(t) for t in texts) * rounds
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for t in texts:
+            fn(t)
+    dt = time.perf_counter() - t0
+    print(f"{name:<18} {dt * 1000:>9.1f} ms  {total / dt / 1e6:>8.1f} MB/s")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=20)
+    args = ap.parse_args()
+    texts = load_texts()
+    if not texts:
+        print("no hay páginas guardadas")
+        return
+    size = sum(len(t) for t in texts)
+    spans = sum(len(utils.find_dates(t)) for t in texts)
+    print(f"{len(texts)} textos, {size / 1024:.0f} KiB, {spans} fechas/rangos encontrados")
+
+    bench("legacy regex", legacy, texts, args.rounds)
+
+    def cold(t):
+        utils._find_dates.cache_clear()
+        return utils.find_dates(t)
+    bench("engine (cold)", cold, texts, args.rounds)
+    bench("engine (memo)", utils.find_dates, texts, args.rounds)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# scripts/bench_pipeline.py
+# Escalado del pipeline fetch (hilos) / parse (procesos) de scrapers.pipeline
+# sobre páginas guardadas (scrapers.snapshots, o las sueltas de data/sources y
+# data/debug): la descarga se simula devolviendo los bytes almacenados tras
+# una latencia fija y el parseo es el de un detalle real
+# (BeautifulSoup + page_dates). Requiere bs4/lxml.
+import os, sys, glob, time, argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from scrapers import pipeline, snapshots
+from scrapers.utils import make_soup, page_dates, clean_text
+
+def parse_page(url, raw):
+    soup = make_soup(raw)
+    h1 = soup.find("h1")
+    dates = page_dates(soup)
+    links = len(soup.select("a[href]"))
+    return (clean_text(h1.get_text()) if h1 else "", dates["fecha_inicio"], dates["fecha_fin"], links)
+
+def load_pages():
+    pages = list(snapshots.iter_pages(("html",)))
+    if pages:
+        return pages
+    for pat in ("data/sources/*.html", "data/debug/*.html"):
+        for path in sorted(glob.glob(os.path.join(ROOT, pat))):
+            with open(path, "rb") as f:
+                pages.append(f.read())
+    return pages
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=200, help="páginas a procesar (se repiten las guardadas)")
+    ap.add_argument("--latency-ms", type=float, default=50, help="latencia simulada por descarga")
+    ap.add_argument("--fetch-workers", type=int, default=16)
+    args = ap.parse_args()
+
+    stored = load_pages()
+    if not stored:
+        print("no hay páginas guardadas")
+        return
+    urls = [f"replay://{i}" for i in range(args.pages)]
+
+    def fetch(url):
+        time.sleep(args.latency_ms / 1000)
+        return stored[int(url.split("//")[1]) % len(stored)]
+
+    cpus = os.cpu_count() or 1
+    workers = sorted({0, 1, 2, 4, cpus} - {w for w in (2, 4) if w > cpus})
+    print(f"{args.pages} páginas ({len(stored)} distintas), latencia {args.latency_ms:.0f} ms, {cpus} CPUs")
+    base = None
+    for w in workers:
+        if w:
+            # arranque del pool fuera de la medida
+            pipeline.fetch_parse(urls[:w], parse_page, fetch=lambda u: stored[0], parse_workers=w)
+        t0 = time.perf_counter()
+        res = pipeline.fetch_parse(urls, parse_page, fetch=fetch,
+                                   fetch_workers=args.fetch_workers, parse_workers=w)
+        dt = time.perf_counter() - t0
+        base = base or dt
+        label = "in-process" if w == 0 else f"{w} procesos"
+        print(f"{label:<12} {dt:>7.2f} s  {len(res) / dt:>7.1f} páginas/s  x{base / dt:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# scripts/bench_startup.py
+# Mide el tiempo de arranque del colector (import + resolución de scrapers)
+# en procesos nuevos, para comparar el import perezoso con el import de bs4/lxml.
+import os, sys, time, argparse, statistics, subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+CASES = {
+    # importar el colector: yaml + registro, sin scrapers
+    "collector": "import scrapers.collector",
+    # fast path --only: se resuelve un único módulo de institución
+    "only_one": "import scrapers.collector; from scrapers import registry; registry.get('picasso')",
+    # todos los scrapers registrados (sin tocar la red)
+    "all_feeds": "import scrapers.collector; from scrapers import registry; [registry.get(i) for i in registry.available()]",
+    # referencia: coste de las dependencias de parseo que ahora son perezosas
+    "eager_parsers": "import bs4, lxml.etree, requests",
+}
+
+def run_once(code: str) -> float:
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - t0) * 1000
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=10)
+    args = ap.parse_args()
+
+    base = statistics.median(run_once("pass") for _ in range(args.runs))
+    print(f"{'case':<14} {'median ms':>10} {'- python':>10}")
+    print(f"{'python':<14} {base:>10.1f} {0:>10.1f}")
+    for name, code in CASES.items():
+        try:
+            ms = statistics.median(run_once(code) for _ in range(args.runs))
+        except subprocess.CalledProcessError:
+            print(f"{name:<14} {'error':>10}")
+            continue
+        print(f"{name:<14} {ms:>10.1f} {ms - base:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,34 @@
 # scripts/debug_fetch.py
-import os, re, json, argparse, requests
-from datetime import datetime
+# Captura de diagnóstico de los listados de config/feeds.yaml: descarga todas
+# las URLs configuradas en paralelo, guarda el HTML en el almacén de capturas
+# (scrapers.snapshots) y, por URL, los enlaces descubiertos y el desglose de
+# tiempos/tamaños en data/debug/.
+import os, re, sys, json, time, codecs, argparse, requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 from yaml import safe_load
 
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from scrapers import snapshots
+
 UA = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
     "(KHTML, like Gecko) Chrome/122.0 Safari/537.36"
 )
+CHUNK = 64 * 1024
+# solape entre trozos para no perder enlaces partidos en la frontera
+OVERLAP = 2048
+
+# una sola pasada: href="..." o rutas de detalle embebidas en scripts/JSON
+LINK_RE = re.compile(
+    r"""href=["'](?P<href>https?://[^"'\s>]+|/[^"'\s>]*)["']"""
+    r"""|(?P<path>/(?:actividades|actividad|exposiciones|exposicion|events?|eventos?)/[a-z0-9\-/]+)""",
+    re.I,
+)
+DETAIL_RE = re.compile(r"/(?:actividades|actividad|exposiciones|exposicion|events?|eventos?)/[^/?#]+", re.I)
 
 def fetch(url: str) -> requests.Response:
     return requests.get(
@@ -18,87 +39,135 @@ def fetch(url: str) -> requests.Response:
             "Referer": url.rsplit("/",1)[0] + "/",
         },
         timeout=60,
+        stream=True,
     )
 
-def discover_activity_links(html: str, base_host: str):
-    text = html.replace("\\/", "/")  # desescapa JSON embebido
-    links = set()
-
-    # href directos
-    for m in re.finditer(r'href=["\'](https?://[^"\']+|/actividades/[^\s"\'>]+)["\']', text, flags=re.I):
-        href = m.group(1)
-        links.add(href)
-
-    # rutas en scripts/JSON embebido
-    for m in re.finditer(r'(/actividades/[a-z0-9\-/]+)', text, flags=re.I):
-        links.add(m.group(1))
-
-    norm = []
-    for u in links:
-        if u.lower().startswith("http"):
-            norm.append(u)
-        else:
-            norm.append(base_host.rstrip("/") + u)
-    # quita índice general
-    norm = [u for u in norm if not re.match(r"https?://[^/]+/actividades/?$", u, flags=re.I)]
-    return sorted(set(norm))
+class LinkScanner:
+    """Extrae enlaces de detalle del HTML a medida que llega, trozo a trozo."""
+
+    def __init__(self, base_host: str):
+        self.host = base_host.rstrip("/")
+        self.links = set()
+        self._tail = ""
+
+    def feed(self, text: str, final: bool = False):
+        buf = self._tail + text
+        scan = buf.replace("\\/", "/")  # desescapa JSON embebido
+        for m in LINK_RE.finditer(scan):
+            if m.end() == len(scan) and not final:
+                continue  # puede estar cortado: se verá entero en el siguiente trozo
+            u = m.group("href") or m.group("path")
+            if u.startswith("/"):
+                u = self.host + u
+            elif not u.startswith(self.host):
+                continue
+            if DETAIL_RE.search(u):
+                self.links.add(u)
+        self._tail = buf[-OVERLAP:]
+
+    def result(self, listing: str):
+        listing = listing.rstrip("/")
+        return sorted(u for u in self.links if u.rstrip("/") != listing)
+
+def capture(iid: str, kind: str, url: str, out_dir: Path, ts: str) -> dict:
+    host = re.match(r"^https?://[^/]+", url).group(0)
+    stem = f"{iid}_{kind}_{ts}"
+    info = {"feed": iid, "kind": kind, "url": url, "fetched_at": ts}
+    t0 = time.perf_counter()
+    try:
+        r = fetch(url)
+        # r.elapsed: hasta recibir las cabeceras (DNS + conexión + TLS + servidor)
+        info.update({
+            "status_code": r.status_code,
+            "encoding": r.encoding,
+            "headers_sample": dict(list(r.headers.items())[:20]),
+            "t_headers_ms": round(r.elapsed.total_seconds() * 1000, 1),
+        })
+        scanner = LinkScanner(host)
+        decoder = codecs.getincrementaldecoder(r.encoding or "utf-8")(errors="replace")
+        t_first = None
+        scan_s = 0.0
+        body = []
+        for chunk in r.iter_content(CHUNK):
+            if t_first is None:
+                t_first = time.perf_counter()
+            body.append(chunk)
+            s0 = time.perf_counter()
+            scanner.feed(decoder.decode(chunk))
+            scan_s += time.perf_counter() - s0
+        scanner.feed(decoder.decode(b"", final=True), final=True)
+        t_end = time.perf_counter()
+        raw = b"".join(body)
+        fetched_at = datetime.strptime(ts, "%Y%m%dT%H%M%SZ").strftime("%Y-%m-%dT%H:%M:%SZ")
+        links = scanner.result(url)
+        info.update({
+            "t_first_byte_ms": round(((t_first or t_end) - t0) * 1000, 1),
+            "t_download_ms": round((t_end - (t_first or t_end)) * 1000, 1),
+            "t_scan_ms": round(scan_s * 1000, 1),
+            "t_total_ms": round((t_end - t0) * 1000, 1),
+            "bytes_wire": r.raw.tell(),
+            "bytes_decoded": len(raw),
+            "snapshot": snapshots.put(url, raw, fetched_at=fetched_at),
+            "discovered_links_count": len(links),
+            "discovered_links": links[:200],  # por si hay muchísimos
+        })
+        r.close()
+    except Exception as e:
+        info.update({"error": str(e), "t_total_ms": round((time.perf_counter() - t0) * 1000, 1)})
+        with open(out_dir / f"{stem}.err.txt", "w", encoding="utf-8") as f:
+            f.write(str(e))
+    with open(out_dir / f"{stem}.json", "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+    return info
+
+def load_targets(only: str):
+    with open(os.path.join(ROOT, "config", "feeds.yaml"), "r", encoding="utf-8") as f:
+        cfg = safe_load(f) or {}
+    feeds = cfg.get("feeds") or cfg.get("institutions") or []
+    ids = [fd.get("id") for fd in feeds]
+    if only != "all" and only not in ids:
+        sys.exit(f"feed desconocido: {only} (hay: {', '.join(ids)})")
+    targets = []
+    for fd in feeds:
+        if only != "all" and fd.get("id") != only:
+            continue
+        for kind, url in (fd.get("urls") or {}).items():
+            if url:
+                targets.append((fd["id"], kind, url))
+    return targets
 
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--only", choices=["picasso","thyssen","pompidou","all"], default="picasso",
-                    help="Qué institución debuggear (por defecto: picasso)")
+    ap.add_argument("--only", default="picasso",
+                    help="id de feed a debuggear o 'all' (por defecto: picasso)")
+    ap.add_argument("--workers", type=int, default=8)
     args = ap.parse_args()
 
-    # lee config
-    with open("config/feeds.yaml", "r", encoding="utf-8") as f:
-        cfg = safe_load(f)
-
-    out_dir = Path("data/debug")
+    targets = load_targets(args.only)
+    out_dir = Path(ROOT) / "data" / "debug"
     out_dir.mkdir(parents=True, exist_ok=True)
-    ts = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
 
-    targets = []
-    for inst in cfg.get("institutions", []):
-        iid = inst["id"]
-        if args.only != "all" and iid != args.only:
-            continue
-        url = inst.get("urls", {}).get("activities_list")
-        if not url:
+    print(f"[debug] {len(targets)} URLs de {len({t[0] for t in targets})} feeds")
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(args.workers, len(targets)))) as ex:
+        results = list(ex.map(lambda t: capture(*t, out_dir, ts), targets))
+    wall = time.perf_counter() - t0
+
+    print(f"{'feed':<10} {'url':<16} {'st':>3} {'hdr ms':>8} {'ttfb ms':>8} {'dl ms':>8} "
+          f"{'scan ms':>8} {'KiB':>7} {'wire':>7} {'links':>6}")
+    for i in results:
+        if "error" in i:
+            print(f"{i['feed']:<10} {i['kind']:<16} ERR {i['error']}")
             continue
-        targets.append((iid, url))
-
-    for iid, url in targets:
-        host = re.match(r"^https?://[^/]+", url).group(0)
-        print(f"[debug] fetching {iid} activities: {url}")
-        try:
-            r = fetch(url)
-            html = r.text
-            links = discover_activity_links(html, host)
-
-            # guarda HTML y un resumen JSON
-            html_path = out_dir / f"{iid}_activities_{ts}.html"
-            info_path = out_dir / f"{iid}_activities_{ts}.json"
-            with open(html_path, "w", encoding="utf-8") as f:
-                f.write(html)
-            with open(info_path, "w", encoding="utf-8") as f:
-                json.dump({
-                    "fetched_at": ts,
-                    "url": url,
-                    "status_code": r.status_code,
-                    "encoding": r.encoding,
-                    "headers_sample": dict(list(r.headers.items())[:20]),
-                    "discovered_links_count": len(links),
-                    "discovered_links": links[:200],  # por si hay muchísimos
-                }, f, ensure_ascii=False, indent=2)
-
-            print(f"[debug] saved: {html_path} ({len(html)} bytes)")
-            print(f"[debug] links discovered: {len(links)} → {info_path}")
-
-        except Exception as e:
-            err_path = out_dir / f"{iid}_activities_{ts}.err.txt"
-            with open(err_path, "w", encoding="utf-8") as f:
-                f.write(str(e))
-            print(f"[debug] ERROR {iid}: {e} (see {err_path})")
+        print(f"{i['feed']:<10} {i['kind']:<16} {i['status_code']:>3} {i['t_headers_ms']:>8.0f} "
+              f"{i['t_first_byte_ms']:>8.0f} {i['t_download_ms']:>8.0f} {i['t_scan_ms']:>8.1f} "
+              f"{i['bytes_decoded'] / 1024:>7.0f} {i['bytes_wire'] / 1024:>7.0f} {i['discovered_links_count']:>6}")
+    summary = out_dir / f"summary_{ts}.json"
+    with open(summary, "w", encoding="utf-8") as f:
+        json.dump({"fetched_at": ts, "wall_ms": round(wall * 1000, 1), "urls": results},
+                  f, ensure_ascii=False, indent=2)
+    print(f"[debug] {wall:.2f} s en total → {summary}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,91 @@
+# scripts/loadtest_api.py
+# Prueba de carga de app/api.py sobre un catálogo sintético: levanta el
+# servidor en un hilo, lanza N clientes keep-alive durante D segundos con
+# consultas mezcladas y reporta p50/p99 y peticiones/s. El catálogo sale de
+# scripts/synth_catalog.py (mismas proporciones que el catálogo real).
+import os, sys, time, random, argparse, tempfile, threading, http.client
+from datetime import date, timedelta
+from urllib.parse import urlencode
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.api import make_server
+from synth_catalog import synth_catalog, load_profile
+
+SOURCES = ["picasso", "pompidou", "thyssen", "latermica"]
+CATS = ["exposicion", "actividad"]
+WORDS = ["taller", "concierto", "visita", "picasso", "arte", "cine", "familia", "noche"]
+
+def queries(rnd: random.Random):
+    today = date.today()
+    while True:
+        kind = rnd.random()
+        if kind < 0.5:
+            d = today + timedelta(days=rnd.randint(0, 30))
+            q = {"desde": d.isoformat(), "hasta": (d + timedelta(days=rnd.choice([0, 1, 7]))).isoformat()}
+        elif kind < 0.7:
+            q = {"categoria": rnd.choice(CATS), "source": rnd.choice(SOURCES), "limit": 50}
+        elif kind < 0.9:
+            q = {"q": rnd.choice(WORDS), "limit": 50}
+        else:
+            yield "/meta"
+            continue
+        yield "/events?" + urlencode(q)
+
+def worker(port: int, stop: float, lat: list, seed: int, gzip_ok: bool):
+    rnd = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    headers = {"Accept-Encoding": "gzip"} if gzip_ok else {}
+    for path in queries(rnd):
+        if time.perf_counter() >= stop:
+            break
+        t0 = time.perf_counter()
+        conn.request("GET", path, headers=headers)
+        r = conn.getresponse()
+        r.read()
+        lat.append(time.perf_counter() - t0)
+    conn.close()
+
+def pct(xs, p):
+    return xs[min(len(xs) - 1, int(len(xs) * p))] * 1000
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=20000)
+    ap.add_argument("--clients", type=int, default=8)
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--no-gzip", action="store_true")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="loadtest_")
+    path = os.path.join(tmp, "catalog.jsonl")
+    synth_catalog(path, args.events, profile=load_profile())
+    t0 = time.perf_counter()
+    srv = make_server("127.0.0.1", 0, path)
+    print(f"catalog: {args.events} events, load {1000 * (time.perf_counter() - t0):.0f} ms")
+    port = srv.server_address[1]
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+
+    lats = [[] for _ in range(args.clients)]
+    stop = time.perf_counter() + args.seconds
+    ths = [threading.Thread(target=worker, args=(port, stop, lats[i], i, not args.no_gzip))
+           for i in range(args.clients)]
+    t0 = time.perf_counter()
+    for t in ths:
+        t.start()
+    for t in ths:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    srv.shutdown()
+
+    all_lat = sorted(x for l in lats for x in l)
+    if not all_lat:
+        print("no requests completed")
+        return
+    print(f"requests: {len(all_lat)} in {elapsed:.1f}s -> {len(all_lat) / elapsed:.0f} req/s")
+    print(f"latency: p50 {pct(all_lat, 0.50):.2f} ms  p99 {pct(all_lat, 0.99):.2f} ms  max {all_lat[-1] * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
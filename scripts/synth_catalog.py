@@ -0,0 +1,160 @@
+# scripts/synth_catalog.py
+# Catálogos sintéticos con el esquema de data/catalog.jsonl, de 1k a 1M
+# eventos. Las proporciones (fuentes, categorías, lugares, confianza, % sin
+# fecha, duraciones, desplazamiento de fecha_inicio respecto a hoy, imágenes,
+# ocurrencias, palabras de los títulos) se sacan del catálogo real si existe;
+# si no, de unos valores por defecto parecidos. Se escribe en streaming.
+#
+#   python scripts/synth_catalog.py --events 100000 --out /tmp/catalog.jsonl
+import os, json, random, hashlib, argparse
+from collections import Counter
+from datetime import date, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CATALOG = os.path.join(ROOT, "data", "catalog.jsonl")
+# con menos eventos fechados que esto las fechas salen del perfil por defecto
+MIN_DATED = 20
+
+DEFAULT_PROFILE = {
+    "sources": {
+        "thyssen": {"weight": 19, "host": "https://www.carmenthyssenmalaga.org", "lugar": "Museo Carmen Thyssen Málaga",
+                    "cats": {"exposicion": 5, "actividad": 14}, "confidence": 0.7},
+        "pompidou": {"weight": 11, "host": "https://centrepompidou-malaga.eu", "lugar": "Centre Pompidou Málaga",
+                     "cats": {"exposicion": 4, "actividad": 7}, "confidence": 0.7},
+        "picasso": {"weight": 6, "host": "https://www.museopicassomalaga.org", "lugar": "Museo Picasso Málaga",
+                    "cats": {"exposicion": 3, "actividad": 3}, "confidence": 0.9},
+        "latermica": {"weight": 4, "host": "https://www.latermicamalaga.com", "lugar": "La Térmica (Málaga)",
+                      "cats": {"actividad": 4}, "confidence": 0.8},
+    },
+    "undated": 0.15,
+    # días desde hoy hasta fecha_inicio / duración en días
+    "offsets": [-200, -90, -60, -30, -7, -1, 0, 1, 2, 3, 5, 7, 10, 14, 21, 30, 45, 60, 90, 120],
+    "durations": {"exposicion": [30, 60, 90, 120, 150, 180], "actividad": [0, 0, 0, 0, 1, 2, 7]},
+    "images": 0.6,
+    "occurrences": [0, 0, 0, 1, 2, 3],
+    "words": ["taller", "concierto", "visita", "guiada", "picasso", "arte", "cine", "familia",
+              "noche", "museo", "exposición", "ciclo", "encuentro", "danza", "música", "infantil"],
+}
+
+def _days(v):
+    try:
+        return date.fromisoformat(v[:10])
+    except (TypeError, ValueError):
+        return None
+
+def profile_from(items, today=None):
+    """Perfil de distribuciones a partir de un catálogo real."""
+    today = today or date.today()
+    prof = json.loads(json.dumps(DEFAULT_PROFILE))
+    if not items:
+        return prof
+    sources = {}
+    offsets, durations, occ, words = [], {}, [], Counter()
+    undated = images = 0
+    for it in items:
+        sid = it.get("source_id") or "otros"
+        src = sources.setdefault(sid, {"weight": 0, "host": None, "lugar": it.get("lugar") or "Málaga",
+                                       "cats": Counter(), "confidence": it.get("parse_confidence") or 0.7})
+        src["weight"] += 1
+        if not src["host"] and it.get("source_url"):
+            src["host"] = "/".join(it["source_url"].split("/")[:3])
+        cat = it.get("categoria") or "actividad"
+        src["cats"][cat] += 1
+        fi, ff = _days(it.get("fecha_inicio")), _days(it.get("fecha_fin"))
+        if fi is None:
+            undated += 1
+        else:
+            offsets.append((fi - today).days)
+            durations.setdefault(cat, []).append(max(0, ((ff or fi) - fi).days))
+        occ.append(len(it.get("ocurrencias") or []))
+        images += bool(it.get("imagen_url"))
+        words.update(w.lower() for w in (it.get("titulo") or "").split() if len(w) > 3)
+    for src in sources.values():
+        src["host"] = src["host"] or "https://example.org"
+        src["cats"] = dict(src["cats"])
+    prof["sources"] = sources
+    prof["images"] = images / len(items)
+    if len(offsets) >= MIN_DATED:
+        prof["undated"] = undated / len(items)
+        prof["offsets"] = offsets
+        prof["occurrences"] = occ
+        for cat, ds in durations.items():
+            prof["durations"][cat] = ds
+    if len(words) >= 10:
+        prof["words"] = [w for w, _ in words.most_common(200)]
+    return prof
+
+def load_profile(path=CATALOG):
+    items = []
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            items = [json.loads(l) for l in f if l.strip()]
+    return profile_from(items)
+
+def iter_events(n, seed=1, profile=None, today=None):
+    prof = profile or DEFAULT_PROFILE
+    today = today or date.today()
+    rnd = random.Random(seed)
+    sids = list(prof["sources"])
+    weights = [prof["sources"][s]["weight"] for s in sids]
+    cats = {s: (list(prof["sources"][s]["cats"]), list(prof["sources"][s]["cats"].values())) for s in sids}
+    offsets, occ, words = prof["offsets"], prof["occurrences"], prof["words"]
+    for i in range(n):
+        sid = rnd.choices(sids, weights)[0]
+        src = prof["sources"][sid]
+        cat = rnd.choices(*cats[sid])[0]
+        path = "exposiciones" if cat == "exposicion" else "actividades"
+        url = f"{src['host']}/{path}/synth-{i}"
+        fi = ff = None
+        ocurrencias = []
+        if rnd.random() >= prof["undated"]:
+            # offset empírico con algo de ruido para no repetir días exactos
+            d0 = today + timedelta(days=rnd.choice(offsets) + rnd.randint(-3, 3))
+            d1 = d0 + timedelta(days=rnd.choice(prof["durations"].get(cat) or [0]))
+            fi, ff = d0.isoformat(), d1.isoformat()
+            k = rnd.choice(occ)
+            if k and (d1 - d0).days:
+                days = sorted(rnd.sample(range((d1 - d0).days + 1), min(k, (d1 - d0).days + 1)))
+                # mismo formato que los scrapers: "YYYY-MM-DD"
+                ocurrencias = [(d0 + timedelta(days=x)).isoformat() for x in days]
+        yield {
+            "id": hashlib.md5(url.encode("utf-8")).hexdigest()[:16],
+            "source_id": sid,
+            "source_url": url,
+            "categoria": cat,
+            "titulo": " ".join(rnd.sample(words, min(len(words), rnd.randint(2, 5)))).capitalize(),
+            "descripcion": "",
+            "fecha_inicio": fi,
+            "fecha_fin": ff,
+            "ocurrencias": ocurrencias,
+            "all_day": True,
+            "lugar": src["lugar"],
+            "imagen_url": f"{src['host']}/img/{i}.jpg" if rnd.random() < prof["images"] else None,
+            "timezone": "Europe/Madrid",
+            "status": "activo",
+            "parse_confidence": src["confidence"],
+        }
+
+def synth_catalog(path, n, seed=1, profile=None):
+    """Escribe `n` eventos sintéticos en `path` (JSONL)."""
+    with open(path, "w", encoding="utf-8") as f:
+        for ev in iter_events(n, seed, profile):
+            f.write(json.dumps(ev, ensure_ascii=False) + "\n")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=10000)
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--default-profile", action="store_true",
+                    help="no usar data/catalog.jsonl como referencia")
+    ap.add_argument("--undated", type=float, help="fracción de eventos sin fecha")
+    args = ap.parse_args()
+    prof = DEFAULT_PROFILE if args.default_profile else load_profile()
+    if args.undated is not None:
+        prof = dict(prof, undated=args.undated)
+    synth_catalog(args.out, args.events, args.seed, prof)
+    print(f"{args.events} eventos -> {args.out} ({os.path.getsize(args.out) / 1e6:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+import http.client
+
+import pytest
+
+from app.api import make_server
+
+@pytest.fixture
+def server(tmp_path):
+    path = tmp_path / "catalog.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(5):
+            f.write(json.dumps({"id": str(i), "categoria": "actividad",
+                                "fecha_inicio": f"2025-10-0{i + 1}"}) + "\n")
+    srv = make_server("127.0.0.1", 0, str(path))
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv.server_address[1]
+    srv.shutdown()
+
+def _get(port, path):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.request("GET", path)
+    r = conn.getresponse()
+    body = r.read()
+    conn.close()
+    return r.status, body
+
+@pytest.mark.parametrize("qs", ["limit=-1", "offset=-3", "limit=abc"])
+def test_bad_paging_is_rejected(server, qs):
+    status, _ = _get(server, "/events?" + qs)
+    assert status == 400
+
+def test_paging(server):
+    status, body = _get(server, "/events?offset=1&limit=2")
+    doc = json.loads(body)
+    assert status == 200
+    assert doc["count"] == 5
+    assert [it["id"] for it in doc["items"]] == ["1", "2"]
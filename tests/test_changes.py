@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import json
+
+from scrapers import changes
+
+def _ev(i, **kw):
+    ev = {"id": i, "titulo": f"Evento {i}", "fecha_inicio": "2025-10-01"}
+    ev.update(kw)
+    return ev
+
+def test_delta_fields():
+    old = [_ev("a"), _ev("b")]
+    new = [_ev("a", titulo="Otro"), _ev("c")]
+    delta = changes.compute_delta(old, new)
+    assert [e["id"] for e in delta["added"]] == ["c"]
+    assert delta["removed"] == ["b"]
+    assert delta["changed"] == [{"id": "a", "fields": {"titulo": ["Evento a", "Otro"]}}]
+
+def test_derived_fields_are_not_changes():
+    old = [_ev("a", quality=0.9, quality_issues=[]), _ev("b")]
+    new = [_ev("a", quality=0.5, quality_issues=["image"], imagen_local="data/thumbs/x.webp"),
+           _ev("b", imagen_local=None, titulo="Otro")]
+    delta = changes.compute_delta(old, new)
+    assert delta["changed"] == [{"id": "b", "fields": {"titulo": ["Evento b", "Otro"]}}]
+
+def test_cursor(tmp_path):
+    path = str(tmp_path / "changes.jsonl")
+    assert changes.last_cursor(path) == 0
+    assert changes.append_delta(changes.compute_delta([], []), path) is None
+    assert changes.append_delta(changes.compute_delta([], [_ev("a")]), path) == 1
+    # una línea larga (más de un bloque de lectura) no rompe la lectura del final
+    big = [_ev(str(i), descripcion="x" * 100) for i in range(100)]
+    assert changes.append_delta(changes.compute_delta([_ev("a")], big), path) == 2
+    assert changes.last_cursor(path) == 2
+    assert [r["run"] for r in changes.iter_changes(0, path)] == [1, 2]
+    assert [r["run"] for r in changes.iter_changes(1, path)] == [2]
+    assert list(changes.iter_changes(2, path)) == []
+
+def _write(path, items):
+    with open(path, "w", encoding="utf-8") as f:
+        for it in items:
+            f.write(json.dumps(it, ensure_ascii=False) + "\n")
+    return str(path)
+
+def test_delta_files_matches_in_memory(tmp_path):
+    old = [_ev("a", quality=0.9), _ev("b"), _ev("c"), _ev("d", descripcion="x")]
+    new = [_ev("c", titulo="Otra"), _ev("a", quality=0.2, imagen_local="t.webp"), _ev("e"),
+           _ev("d"), _ev("d", descripcion="y")]   # id repetido: cuenta la última fila
+    delta = changes.compute_delta_files(_write(tmp_path / "old.jsonl", old),
+                                        _write(tmp_path / "new.jsonl", new))
+    assert delta == changes.compute_delta(old, new)
+    assert delta["changed"] == [{"id": "c", "fields": {"titulo": ["Evento c", "Otra"]}},
+                                {"id": "d", "fields": {"descripcion": ["x", "y"]}}]
+    # sin catálogo anterior, todo es nuevo
+    assert changes.compute_delta_files(str(tmp_path / "none.jsonl"), str(tmp_path / "new.jsonl")) == \
+        changes.compute_delta([], new)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from scrapers import collector, pipeline, registry
+from scrapers.budget import Budget, BudgetExceeded
+
+def _ev(sid, n):
+    return {"id": f"{sid}-{n}", "source_id": sid, "source_url": f"https://{sid}.example/{n}",
+            "titulo": f"{sid} {n}", "fecha_inicio": "2025-10-01"}
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    """Colector sobre tmp_path con scrapers falsos: `feeds[id]` es la función iter_collect."""
+    feeds = {}
+    catalog = str(tmp_path / "catalog.jsonl")
+    monkeypatch.setattr(collector, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(collector, "SOURCES_DIR", str(tmp_path / "sources"))
+    monkeypatch.setattr(collector, "CATALOG", catalog)
+    monkeypatch.setattr(collector, "MANUAL", str(tmp_path / "manual_events.csv"))
+    monkeypatch.setattr(collector, "CURATED", str(tmp_path / "curated.json"))
+    monkeypatch.setattr(collector, "load_config",
+                        lambda: {"feeds": [{"id": fid} for fid in feeds]})
+    monkeypatch.setattr(registry, "get", lambda fid: SimpleNamespace(iter_collect=feeds[fid]))
+    monkeypatch.setattr(collector, "finalize_file", lambda *a, **kw: None)
+    monkeypatch.setattr(collector, "publish_file", lambda tmp: os.replace(tmp, catalog))
+    return SimpleNamespace(feeds=feeds, catalog=catalog, tmp=tmp_path)
+
+def _catalog_ids(env):
+    return sorted(it["id"] for it in collector.iter_jsonl(env.catalog))
+
+def test_cut_feed_keeps_previous_items(env):
+    collector.write_jsonl(env.catalog, [_ev("a", 1), _ev("a", 2), _ev("b", 1)])
+
+    def cut_short(cfg, budget):
+        yield _ev("a", 3)
+        raise BudgetExceeded("sin tiempo")
+
+    env.feeds["a"] = cut_short
+    env.feeds["b"] = lambda cfg, budget: iter([_ev("b", 2)])
+    collector.collect()
+    # "a" se cortó: lo nuevo más lo anterior; "b" terminó: sólo lo nuevo
+    assert _catalog_ids(env) == ["a-1", "a-2", "a-3", "b-2"]
+
+def test_fetch_parse_raises_when_pages_are_skipped():
+    budget = Budget(10, low_water=1.0)  # siempre "justo"
+    with pytest.raises(BudgetExceeded):
+        pipeline.fetch_parse(["u1", "u2"], lambda u, raw: raw, fetch=lambda u: b"x",
+                             parse_workers=0, budget=budget)
+    assert pipeline.fetch_parse(["u1"], lambda u, raw: raw, fetch=lambda u: b"x",
+                                parse_workers=0) == {"u1": b"x"}
+
+def test_only_keeps_local_sources(env):
+    env.tmp.joinpath("manual_events.csv").write_text(
+        "titulo,fecha_inicio,source_id,source_url\n"
+        "Visita,2025-10-03,a,https://a.example/visita\n", encoding="utf-8")
+    old_manual = dict(_ev("a", 9), origen="manual")  # ya no está en el CSV
+    collector.write_jsonl(env.catalog, [_ev("a", 1), _ev("b", 1), old_manual,
+                                        dict(_ev("curated", 1), source_id="curated")])
+    env.feeds["a"] = lambda cfg, budget: iter([_ev("a", 2)])
+    env.feeds["b"] = lambda cfg, budget: iter([])
+    collector.collect(only="a")
+    items = list(collector.iter_jsonl(env.catalog))
+    # el manual con source_id "a" sigue; el borrado del CSV y el curado viejo no vuelven
+    assert sorted((it["source_id"], it.get("origen", "")) for it in items) == \
+        [("a", ""), ("a", "manual"), ("b", "")]
+    assert {it["id"] for it in items} >= {"a-2", "b-1"}
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+
+from scrapers import collector, daemon
+
+def _ev(sid, n, **kw):
+    ev = {"id": f"{sid}-{n}", "source_id": sid, "source_url": f"https://{sid}.example/{n}",
+          "titulo": f"{sid} {n}", "fecha_inicio": "2025-10-01"}
+    ev.update(kw)
+    return ev
+
+CONFIG = {
+    "daemon": {"min_interval_minutes": 30, "max_interval_minutes": 240, "jitter": 0},
+    "feeds": [{"id": "a", "refresh_minutes": 60}, {"id": "off", "active": False}],
+}
+
+@pytest.fixture
+def d(tmp_path, monkeypatch):
+    monkeypatch.setattr(collector, "CATALOG", str(tmp_path / "catalog.jsonl"))
+    published = []
+    monkeypatch.setattr(daemon.Daemon, "publish", lambda self: published.append(True))
+    dm = daemon.Daemon(CONFIG)
+    dm.published = published
+    return dm
+
+def test_interval_adapts_and_is_clamped(d, monkeypatch):
+    st = d.feeds["a"]
+    assert list(d.feeds) == ["a"] and st.interval == 3600
+    got = [[_ev("a", 1)]]
+    monkeypatch.setattr(collector, "collect_feed", lambda feed: got[0])
+
+    d._run_feed(st)                      # cambió: a la mitad
+    assert st.interval == 1800 and d.published == [True]
+    d._run_feed(st)                      # sin cambios: x1.5
+    assert st.interval == 2700 and len(d.published) == 1
+    got[0] = [_ev("a", 2)]
+    d._run_feed(st)                      # cambió, pero no baja de min_interval
+    assert st.interval == 1800
+    got[0] = [_ev("a", 2)]
+    for _ in range(10):
+        d._run_feed(st)
+    assert st.interval == 240 * 60       # tope max_interval
+    got[0] = None
+    d._run_feed(st)                      # error: se mantiene intervalo e items
+    assert st.interval == 240 * 60 and st.items == [_ev("a", 2)]
+    assert st.runs == 14 and st.changes == 2
+    assert not st.running and len(d._queue) == 14
+
+def test_fingerprint_ignores_derived_fields():
+    base = [_ev("a", 1), _ev("a", 2)]
+    derived = [dict(it, quality=0.4, quality_issues=["image"], imagen_local="data/thumbs/x.webp")
+               for it in reversed(base)]
+    assert daemon._fingerprint(base) == daemon._fingerprint(derived)
+    assert daemon._fingerprint(base) != daemon._fingerprint([_ev("a", 1), _ev("a", 2, titulo="Otro")])
+
+def test_publish_merges_local_items(tmp_path, monkeypatch):
+    monkeypatch.setattr(collector, "CATALOG", str(tmp_path / "catalog.jsonl"))
+    dm = daemon.Daemon(CONFIG)
+    dm.feeds["a"].items = [_ev("a", 1), _ev("a", 2)]
+    manual = dict(_ev("a", 2, titulo="Corregido"), origen="manual")  # misma source_url
+    monkeypatch.setattr(collector, "collect_local", lambda: [manual])
+    monkeypatch.setattr(collector, "finalize", lambda items: [dict(it, imagen_local=None) for it in items])
+    published = []
+
+    def publish_catalog(items):
+        assert dm._publish_lock.locked()
+        published.append(items)
+
+    monkeypatch.setattr(collector, "publish_catalog", publish_catalog)
+    dm.publish()
+    (items,) = published
+    assert sorted((it["id"], it["titulo"]) for it in items) == [("a-1", "a 1"), ("a-2", "Corregido")]
+    # finalize trabaja sobre copias: el estado del feed no se toca
+    assert all("imagen_local" not in it for it in dm.feeds["a"].items)
+
+def test_publish_is_serialized(tmp_path, monkeypatch):
+    monkeypatch.setattr(collector, "CATALOG", str(tmp_path / "catalog.jsonl"))
+    dm = daemon.Daemon(CONFIG)
+    dm.feeds["a"].items = [_ev("a", 1)]
+    monkeypatch.setattr(collector, "collect_local", lambda: [])
+    monkeypatch.setattr(collector, "finalize", lambda items: items)
+    active, overlaps = [0], []
+    lock = threading.Lock()
+
+    def publish_catalog(items):
+        with lock:
+            active[0] += 1
+            overlaps.append(active[0])
+        threading.Event().wait(0.01)
+        with lock:
+            active[0] -= 1
+
+    monkeypatch.setattr(collector, "publish_catalog", publish_catalog)
+    threads = [threading.Thread(target=dm.publish) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert overlaps == [1, 1, 1, 1]
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+import pytest
+
+from scrapers.utils import extract_dates, find_dates
+
+REF = date(2025, 9, 7)
+
+@pytest.mark.parametrize("text, start, end", [
+    # exposiciones en curso: el inicio queda en el pasado, el fin en el futuro
+    ("del 20 de marzo al 30 de octubre", "2025-03-20", "2025-10-30"),
+    ("Del 15 de abril al 2 de noviembre", "2025-04-15", "2025-11-02"),
+    ("15 abr - 2 nov", "2025-04-15", "2025-11-02"),
+    ("April 15 – November 2", "2025-04-15", "2025-11-02"),
+    # el rango cruza el cambio de año
+    ("del 20 de diciembre al 10 de enero", "2025-12-20", "2026-01-10"),
+    ("del 3 al 15 de octubre", "2025-10-03", "2025-10-15"),
+    ("20 de marzo al 30 de octubre de 2026", "2026-03-20", "2026-10-30"),
+])
+def test_range_year_inference(text, start, end):
+    res = extract_dates(text, REF)
+    assert (res["fecha_inicio"], res["fecha_fin"]) == (start, end)
+    assert res["ocurrencias"] == []
+    assert len(find_dates(text, REF)) == 1
+
+def test_single_date_without_year():
+    # más de 90 días en el pasado: la próxima
+    assert extract_dates("5 de marzo", REF)["fecha_inicio"] == "2026-03-05"
+    assert extract_dates("1 de agosto", REF)["fecha_inicio"] == "2025-08-01"
+
+def test_list_and_time():
+    res = extract_dates("3, 4 y 5 de octubre", REF)
+    assert res["ocurrencias"] == ["2025-10-03", "2025-10-04", "2025-10-05"]
+    res = extract_dates("12 de octubre a las 19:30", REF)
+    assert res["ocurrencias"] == ["2025-10-12T19:30"]
+
+@pytest.mark.parametrize("text, days", [
+    # números que no son días: sala, planta, horario
+    ("Sala 2, 3 de octubre", ["2025-10-03"]),
+    ("Planta 1 - 3 de octubre", ["2025-10-03"]),
+    ("Horario de 10 a 14, 3 de octubre", ["2025-10-03"]),
+    ("Sala 2, 3 y 4 de octubre", ["2025-10-03", "2025-10-04"]),
+    # días de la semana entre los días de la lista
+    ("Sábado 4 y domingo 5 de octubre", ["2025-10-04", "2025-10-05"]),
+    ("el sábado 4, el domingo 5 y el lunes 6 de octubre", ["2025-10-04", "2025-10-05", "2025-10-06"]),
+    ("los días 3, 4 y 5 de octubre", ["2025-10-03", "2025-10-04", "2025-10-05"]),
+])
+def test_bare_days(text, days):
+    spans = find_dates(text, REF)
+    assert [s.start for s in spans] == days
+    assert all(s.end == s.start for s in spans)
+
+def test_bare_range_needs_day_with_month():
+    assert find_dates("del 3 al 15 de octubre", REF)[0][:2] == ("2025-10-03", "2025-10-15")
+    # "12 a 3" no es un rango si detrás no viene directamente el día con mes
+    assert [s[:2] for s in find_dates("de 12 a 3, 5 de octubre", REF)] == [("2025-10-05", "2025-10-05")]
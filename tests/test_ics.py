@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from scrapers import ics
+
+EV = {"id": "e1", "titulo": "Concierto", "fecha_inicio": "2025-10-03", "fecha_fin": "2025-10-03",
+      "ocurrencias": ["2025-10-03T19:00", "2025-10-03T19:00", "2025-10-04"],
+      "timezone": "Europe/Madrid", "categoria": "actividad", "source_id": "picasso"}
+
+def test_occurrences_unique_and_tz():
+    text = ics.serialize_event(EV, "20250101T000000Z")
+    uids = [l for l in text.split("\r\n") if l.startswith("UID:")]
+    assert len(uids) == len(set(uids)) == 2
+    assert "DTSTART;TZID=Europe/Madrid:20251003T190000" in text
+
+def test_export_has_vtimezone_and_ignores_derived_fields(tmp_path):
+    catalog = tmp_path / "catalog.jsonl"
+    out = tmp_path / "ics"
+    catalog.write_text(json.dumps(EV) + "\n", encoding="utf-8")
+    assert ics.export(str(catalog), str(out))["serialized"] == 1
+    body = (out / "all.ics").read_text(encoding="utf-8")
+    assert "BEGIN:VTIMEZONE" in body and "TZID:Europe/Madrid" in body
+    catalog.write_text(json.dumps(dict(EV, quality=0.9, imagen_local="data/thumbs/x.jpg")) + "\n",
+                       encoding="utf-8")
+    assert ics.export(str(catalog), str(out))["reused"] == 1
+
+def test_export_cleans_tmp_on_error(tmp_path):
+    catalog = tmp_path / "catalog.jsonl"
+    out = tmp_path / "ics"
+    catalog.write_text(json.dumps(EV) + "\n{not json\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        ics.export(str(catalog), str(out))
+    assert not [p for p in out.iterdir() if p.name.endswith(".tmp")]
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import json
+
+from scrapers import collector, manual
+
+CSV = """titulo,fecha_inicio,fecha_fin,categoria,lugar,source_url,ocurrencias
+Taller,2025-10-03,2025-10-01,actividad,Málaga,https://example.org/taller,2025-10-03T18:00;2025-10-04
+,2025-10-03,,actividad,Málaga,,
+"""
+
+def test_manual_csv(tmp_path):
+    path = tmp_path / "manual_events.csv"
+    path.write_text(CSV, encoding="utf-8")
+    items = manual.collect_manual(str(path))
+    assert len(items) == 1  # la fila sin título se descarta
+    it = items[0]
+    assert it["source_id"] == "manual"
+    assert it["fecha_fin"] == "2025-10-03"  # fin anterior al inicio se corrige
+    assert it["ocurrencias"] == ["2025-10-03T18:00", "2025-10-04"]
+    assert it["all_day"] is False
+    assert it["id"] == manual.collect_manual(str(path))[0]["id"]  # id estable
+
+def test_curated_bad_types_are_skipped(tmp_path):
+    path = tmp_path / "curated.json"
+    path.write_text(json.dumps({"events": [
+        {"titulo": {"es": "x"}, "fecha_inicio": "2025-10-03"},
+        {"titulo": "Bien", "fecha_inicio": 20251003},
+        {"titulo": "Visita", "fecha_inicio": "2025-10-03", "precio_min": 5},
+        "no es un evento",
+    ]}), encoding="utf-8")
+    items = manual.collect_curated(str(path))
+    assert [it["titulo"] for it in items] == ["Visita"]
+    assert items[0]["precio_min"] == "5"
+
+def test_collect_local_sources_are_independent(tmp_path, monkeypatch):
+    csv_path = tmp_path / "manual_events.csv"
+    csv_path.write_text(CSV, encoding="utf-8")
+    monkeypatch.setattr(collector, "MANUAL", str(csv_path))
+    monkeypatch.setattr(collector, "CURATED", str(tmp_path / "curated.json"))
+
+    def broken(path):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(manual, "collect_curated", broken)
+    assert [it["titulo"] for it in collector.collect_local()] == ["Taller"]
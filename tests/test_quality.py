@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from scrapers import quality
+
+FULL = {"id": "ok", "source_id": "picasso", "titulo": "Expo", "source_url": "https://example.org/expo",
+        "fecha_inicio": "2025-10-01", "fecha_fin": "2025-10-31", "imagen_url": "https://example.org/i.jpg"}
+
+def _row(**kw):
+    it = dict(FULL)
+    it.update(kw)
+    return it
+
+def _scored(items, min_score=quality.MIN_SCORE):
+    checks = quality.check(quality.columns(items))
+    scores = quality.score(checks)
+    return scores, quality.low(checks, scores, min_score)
+
+@pytest.mark.parametrize("row, expected, is_low", [
+    (_row(), 1.0, False),
+    # sin fecha suma justo 0.5 (url + título + imagen), pero la fecha es obligatoria
+    (_row(fecha_inicio=None, fecha_fin=None), 0.5, True),
+    (_row(fecha_inicio="pronto"), 0.5, True),
+    # sin título suma 0.75 y tampoco pasa
+    (_row(titulo="  "), 0.75, True),
+    # lo mínimo que pasa: fecha y título, con fin anterior al inicio, sin url ni imagen
+    (_row(fecha_fin="2025-09-01", source_url="/expo", imagen_url=None), 0.6, False),
+    (_row(source_url="example.org/expo"), 0.85, False),
+])
+def test_score_boundaries(row, expected, is_low):
+    scores, low = _scored([row])
+    assert scores == [expected]
+    assert low == [is_low]
+
+def test_min_score_is_strict():
+    row = _row(fecha_fin="2025-09-01", source_url=None, imagen_url=None)  # 0.6
+    assert _scored([row], 0.6)[1] == [False]
+    assert _scored([row], 0.61)[1] == [True]
+
+def test_annotate_file(tmp_path):
+    path = tmp_path / "catalog.jsonl"
+    rows = [_row(), _row(id="sin-fecha", fecha_inicio=None), _row(id="sin-titulo", titulo=None, source_id="thyssen")]
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+    stats = quality.annotate_file(str(path), metrics=str(tmp_path / "m.json"),
+                                  index=str(tmp_path / "q.json"), workers=1)
+    out = [json.loads(l) for l in path.read_text(encoding="utf-8").splitlines()]
+    assert [it["quality_issues"] for it in out] == [[], ["dates", "ordered"], ["title"]]
+    assert quality.load_low(str(tmp_path / "q.json")) == ["sin-fecha", "sin-titulo"]
+    assert stats["picasso"]["low_confidence"] == 1 and stats["thyssen"]["low_confidence"] == 1
+    assert stats["picasso"]["checks"]["dates"] == 0.5
+
+def test_evaluate_in_processes_matches_serial(monkeypatch):
+    monkeypatch.setattr(quality, "CHUNK", 2)
+    cols = quality.columns([_row(), _row(titulo=""), _row(fecha_inicio=None), _row(imagen_url=None), _row()])
+    assert quality.evaluate(cols, workers=2) == quality.check(cols)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+import pytest
+
+from scrapers import quickranges
+
+TODAY = date(2025, 10, 15)
+
+def _ev(i, fi, ff=None, cat="actividad"):
+    return {"id": i, "categoria": cat, "fecha_inicio": fi, "fecha_fin": ff}
+
+ITEMS = [
+    _ev("expo", "2025-09-01", "2025-12-31", "exposicion"),
+    _ev("hoy", "2025-10-15T19:00"),
+    _ev("manana", "2025-10-16"),
+    _ev("semana", "2025-10-22"),
+    _ev("fin-mes", "2025-10-31"),
+    _ev("noviembre", "2025-11-02"),
+    _ev("sin-fecha", None),
+    _ev("sin-categoria", "2025-10-15", cat=None),
+]
+
+def test_build():
+    presets = quickranges.build(ITEMS, TODAY)["presets"]
+    assert presets["Hoy"] == {"*": ["expo", "hoy"], "exposicion": ["expo"], "actividad": ["hoy"]}
+    assert presets["Mañana"]["*"] == ["expo", "manana"]
+    assert presets["Próximos 7 días"]["*"] == ["expo", "hoy", "manana", "semana"]
+    assert presets["Este mes"]["*"] == ["expo", "hoy", "manana", "semana", "fin-mes"]
+    # "Todo": todos los que tienen categoría, los no fechados al final
+    assert presets["Todo"]["*"] == ["expo", "hoy", "manana", "semana", "fin-mes", "noviembre", "sin-fecha"]
+
+def test_lookup():
+    index = quickranges.build(ITEMS, TODAY)
+    cats = ["actividad", "exposicion"]
+    assert quickranges.lookup(index, "Hoy", cats, cats, TODAY) == ["expo", "hoy"]
+    assert quickranges.lookup(index, "Este mes", ["exposicion"], cats, TODAY) == ["expo"]
+    assert quickranges.lookup(index, "Hoy", [], cats, TODAY) == []
+    # índice de otro día, sin índice o preset que no está: None (filtro en vivo)
+    assert quickranges.lookup(index, "Hoy", cats, cats, date(2025, 10, 16)) is None
+    assert quickranges.lookup(None, "Hoy", cats, cats, TODAY) is None
+    assert quickranges.lookup(index, "Personalizado", cats, cats, TODAY) is None
+
+def test_write_and_load(tmp_path):
+    path = str(tmp_path / "quick_ranges.json")
+    doc = quickranges.write(ITEMS, path, TODAY)
+    assert quickranges.load(path) == doc
+    assert quickranges.load(str(tmp_path / "no.json")) is None
+
+def test_stale_index_falls_back_to_live_filter():
+    pd = pytest.importorskip("pandas")
+    from app import data
+
+    df = pd.DataFrame([it for it in ITEMS if it["categoria"]])
+    cats = data.categories(df)
+    stale = quickranges.build(ITEMS, date(2025, 10, 1))  # de otro día: "Hoy" sería otro
+    got = data.select(df, "Hoy", cats, cats, TODAY, TODAY, TODAY, index=stale, db=None)
+    assert got["id"].tolist() == ["expo", "hoy"]
+    fresh = quickranges.build(ITEMS, TODAY)
+    assert data.select(df, "Hoy", cats, cats, TODAY, TODAY, TODAY, index=fresh, db=None)["id"].tolist() == \
+        ["expo", "hoy"]
+    # "Personalizado" usa Desde/Hasta; "Todo" no filtra por fecha
+    got = data.select(df, "Personalizado", cats, cats, date(2025, 11, 1), date(2025, 11, 30), TODAY,
+                      index=fresh, db=None)
+    assert got["id"].tolist() == ["expo", "noviembre"]
+    assert len(data.select(df, "Todo", cats, cats, TODAY, TODAY, TODAY, index=stale, db=None)) == 7
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+from datetime import date
+
+from scrapers import shards
+
+def _ev(sid, i, fi, ff=None):
+    return {"id": f"{sid}-{i}", "source_id": sid, "titulo": f"Evento {i}",
+            "fecha_inicio": fi, "fecha_fin": ff}
+
+def _lines(items):
+    return [json.dumps(it, ensure_ascii=False) + "\n" for it in items]
+
+def test_write_unchanged_and_removed(tmp_path):
+    root = str(tmp_path / "shards")
+    items = [_ev("picasso", 1, "2025-10-01", "2026-01-18"), _ev("picasso", 2, "2025-11-02"),
+             _ev("thyssen", 1, None)]
+    assert shards.write(_lines(items), root) == {"shards": 3, "written": 3, "unchanged": 0, "removed": 0}
+    man = shards.load_manifest(root)["shards"]
+    assert man["picasso/2025-10"]["max_fecha_fin"] == "2026-01-18"
+    assert man["thyssen/undated"]["min_fecha_inicio"] is None
+
+    nov = os.path.join(root, "picasso", "2025-11.jsonl")
+    mtime = os.stat(nov).st_mtime_ns
+    # cambia un shard, desaparece la fuente thyssen
+    items[0]["titulo"] = "Otro"
+    assert shards.write(_lines(items[:2]), root) == {"shards": 2, "written": 1, "unchanged": 1, "removed": 1}
+    assert os.stat(nov).st_mtime_ns == mtime  # el shard sin cambios no se reescribe
+    assert not os.path.exists(os.path.join(root, "thyssen"))
+    assert sorted(shards.load_manifest(root)["shards"]) == ["picasso/2025-10", "picasso/2025-11"]
+    assert not [n for n in os.listdir(os.path.join(root, "picasso")) if n.endswith(".tmp")]
+
+    # un shard borrado a mano con el mismo hash se vuelve a escribir
+    os.remove(nov)
+    assert shards.write(_lines(items[:2]), root)["written"] == 1
+    assert os.path.exists(nov)
+
+def test_select(tmp_path):
+    root = str(tmp_path / "shards")
+    shards.write(_lines([_ev("picasso", 1, "2025-10-01", "2026-01-18"), _ev("picasso", 2, "2025-11-02"),
+                         _ev("thyssen", 1, "2025-12-05"), _ev("thyssen", 2, None)]), root)
+
+    def keys(*a, **kw):
+        return [os.path.relpath(p, root)[:-len(".jsonl")] for p in shards.select(*a, root=root, **kw)]
+
+    # la expo de octubre sigue abierta en diciembre (max_fecha_fin)
+    assert keys(date(2025, 12, 1), date(2025, 12, 31)) == ["picasso/2025-10", "thyssen/2025-12"]
+    assert keys(date(2025, 11, 2), date(2025, 11, 2), sources=["picasso"]) == \
+        ["picasso/2025-10", "picasso/2025-11"]
+    assert keys(date(2026, 2, 1), None) == []
+    assert keys(include_undated=True) == ["picasso/2025-10", "picasso/2025-11",
+                                          "thyssen/2025-12", "thyssen/undated"]
+    assert [it["id"] for it in shards.iter_events(date(2025, 12, 1), date(2025, 12, 31), root=root)] == \
+        ["picasso-1", "thyssen-1"]
+
+def test_rebuild(tmp_path):
+    root = str(tmp_path / "shards")
+    items = [_ev("thyssen", 1, None), _ev("picasso", 1, "2025-10-01", "2026-01-18"),
+             _ev("picasso", 2, "2025-11-02")]
+    shards.write(_lines(items), root)
+    catalog = str(tmp_path / "catalog.jsonl")
+    assert shards.rebuild(catalog, root) == 3
+    with open(catalog, encoding="utf-8") as f:
+        got = [json.loads(line) for line in f]
+    # mismo contenido, en el orden del manifiesto (fuente, mes)
+    assert got == [items[1], items[2], items[0]]
+    assert shards.write_from(catalog, root)["written"] == 0
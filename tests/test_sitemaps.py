@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from scrapers import pipeline, sitemaps
+from scrapers.budget import BudgetExceeded
+
+BASE = "https://example.org"
+INDEX = BASE + "/sitemap_index.xml"
+EXPOS = BASE + "/expos.xml"
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    monkeypatch.setattr(sitemaps, "STATE", str(tmp_path / "state.json"))
+    monkeypatch.setattr(sitemaps, "find_sitemaps", lambda base, budget=None: [INDEX])
+    pages = {}
+
+    def fake(url, budget=None):
+        body = pages.get(url)
+        if body is None:
+            raise ValueError("HTTP 404")
+        yield from body
+
+    monkeypatch.setattr(sitemaps, "iter_sitemap", fake)
+    return pages
+
+def test_failed_sitemap_keeps_previous_state(site):
+    site[INDEX] = [("sitemap", EXPOS, "2025-09-01")]
+    site[EXPOS] = [("url", BASE + "/expo/a", "2025-08-01"), ("url", BASE + "/otra", None)]
+    first = sitemaps.discover(BASE, lambda u: "/expo/" in u, "k")
+    assert first == {BASE + "/expo/a": "2025-08-01"}
+
+    # el sub-sitemap cambió pero ahora da error: se conserva lo anterior
+    site[INDEX] = [("sitemap", EXPOS, "2025-10-01")]
+    del site[EXPOS]
+    assert sitemaps.discover(BASE, lambda u: "/expo/" in u, "k") == first
+    state = sitemaps._load_state()["k"]["sitemaps"]
+    assert state[EXPOS]["urls"] == first
+
+    # y si cae el índice, sus hijos se siguen reutilizando
+    del site[INDEX]
+    assert sitemaps.discover(BASE, lambda u: "/expo/" in u, "k") == first
+
+def test_never_read_sitemap_is_not_saved(site):
+    site[INDEX] = [("sitemap", EXPOS, "2025-09-01")]
+    assert sitemaps.discover(BASE, lambda u: True, "k") == {}
+    assert EXPOS not in sitemaps._load_state()["k"]["sitemaps"]
+
+def test_no_sitemap(site):
+    assert sitemaps.discover(BASE, lambda u: True, "k") is None
+
+def _collect(planned, fetch):
+    # como los scrapers: detalles, luego mark_seen sólo si la descarga terminó
+    parsed = pipeline.fetch_parse(planned.urls, lambda u, raw: raw.decode(), fetch=fetch,
+                                  parse_workers=0)
+    sitemaps.mark_seen(planned, parsed)
+    return parsed
+
+def test_seen_only_after_details(site, tmp_path, monkeypatch):
+    catalog = tmp_path / "catalog.jsonl"
+    monkeypatch.setattr(sitemaps, "CATALOG", str(catalog))
+    a, b = BASE + "/expo/a", BASE + "/expo/b"
+    match = lambda u: "/expo/" in u
+    old, new = (date.today() - timedelta(days=3)).isoformat(), date.today().isoformat()
+    site[INDEX] = [("url", a, old), ("url", b, old)]
+
+    first = sitemaps.plan(BASE, match, "k", "src")
+    assert first.urls == [a, b] and first.reused == []
+    assert "seen" not in sitemaps._load_state()["k"]      # aún no se descargó nada
+    fail_b = {b}
+
+    def fetch(url):
+        if url in fail_b:
+            raise ValueError("HTTP 500")
+        return url.encode()
+
+    assert _collect(first, fetch) == {a: a}
+    assert sitemaps._load_state()["k"]["seen"] == {a: old}  # b falló: no se marca
+    catalog.write_text(json.dumps({"source_id": "src", "source_url": a}) + "\n", encoding="utf-8")
+
+    # las dos cambian y el plazo se acaba a mitad de los detalles
+    site[INDEX] = [("url", a, new), ("url", b, new)]
+    second = sitemaps.plan(BASE, match, "k", "src")
+    assert second.urls == [a, b]
+
+    def fetch_out_of_time(url):
+        if url == b:
+            raise BudgetExceeded("sin tiempo")
+        return url.encode()
+
+    with pytest.raises(BudgetExceeded):
+        _collect(second, fetch_out_of_time)
+    assert sitemaps._load_state()["k"]["seen"] == {a: old}
+
+    # la siguiente ejecución vuelve a descargar las dos
+    third = sitemaps.plan(BASE, match, "k", "src")
+    assert third.urls == [a, b]
+    fail_b.clear()
+    _collect(third, fetch)
+    assert sitemaps._load_state()["k"]["seen"] == {a: new, b: new}
+    fourth = sitemaps.plan(BASE, match, "k", "src")
+    assert fourth.urls == [b] and [it["source_url"] for it in fourth.reused] == [a]
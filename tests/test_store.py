@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+from datetime import date
+
+import pytest
+
+from scrapers import store
+
+def _ev(i, fi="2025-10-01", **kw):
+    ev = {"id": i, "titulo": f"Evento {i}", "fecha_inicio": fi, "categoria": "expo"}
+    ev.update(kw)
+    return ev
+
+def test_upsert_and_deactivate(tmp_path):
+    db = str(tmp_path / "c.sqlite")
+    assert store.upsert([_ev("b"), _ev("a")], path=db, seen_at="2025-10-01T10:00:00+00:00") == \
+        {"upserted": 2, "deactivated": 0}
+    # misma marca de tiempo (publicaciones en el mismo segundo): "a" ya no viene
+    assert store.upsert([_ev("c"), _ev("b", titulo="Otro")], path=db,
+                        seen_at="2025-10-01T10:00:00+00:00") == {"upserted": 2, "deactivated": 1}
+    assert [it["id"] for it in store.iter_events(db)] == ["c", "b"]  # orden del catálogo
+    assert [it["id"] for it in store.query(path=db)] == ["b", "c"]
+    assert [it["id"] for it in store.query(path=db, include_inactive=True)] == ["a", "b", "c"]
+    assert store.query(path=db, categorias=[]) == []
+
+    # vuelve a aparecer
+    store.upsert([_ev("a")], path=db, seen_at="2025-10-02T10:00:00+00:00")
+    got = store.query(path=db)
+    assert [it["id"] for it in got] == ["a"]
+    assert got[0]["first_seen"] == "2025-10-01T10:00:00+00:00"
+
+def test_query_range(tmp_path):
+    db = str(tmp_path / "c.sqlite")
+    store.upsert([_ev("a", "2025-10-01", fecha_fin="2025-10-10"), _ev("b", "2025-10-05T19:00"),
+                  _ev("c", "2025-11-01"), _ev("d", None)], path=db)
+    ids = [it["id"] for it in store.query(date(2025, 10, 5), date(2025, 10, 5), path=db)]
+    assert ids == ["a", "b"]
+
+def test_reads_are_read_only(tmp_path):
+    db = str(tmp_path / "c.sqlite")
+    with pytest.raises(sqlite3.OperationalError):
+        store.query(path=db)  # no crea la base
+    assert not os.path.exists(db)
+    store.upsert([_ev("a")], path=db)
+    conn = store.connect_ro(db)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM events")
+    finally:
+        conn.close()
+
+def test_updated_at_ignores_derived_fields(tmp_path):
+    db = str(tmp_path / "c.sqlite")
+    store.upsert([_ev("a"), _ev("b")], path=db, seen_at="2025-10-01T10:00:00+00:00")
+    store.upsert([_ev("a", quality=0.4, imagen_local="data/thumbs/x.webp"), _ev("b", titulo="Otro")],
+                 path=db, seen_at="2025-10-02T10:00:00+00:00")
+    conn = store.connect_ro(db)
+    try:
+        rows = dict(conn.execute("SELECT id, updated_at FROM events"))
+    finally:
+        conn.close()
+    assert rows == {"a": "2025-10-01T10:00:00+00:00", "b": "2025-10-02T10:00:00+00:00"}
+    # data sigue siendo la fila completa
+    assert [it.get("quality") for it in store.query(path=db)] == [0.4, None]